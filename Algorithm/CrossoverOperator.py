@@ -1,14 +1,19 @@
 import numpy as np
 from Algorithm.helperFunctions import *
+from Algorithm import jitKernels
 class CrossoverOperator:
-    def __init__(self, parent1, parent2, crossoverType,RNG_Seed=42):
+    def __init__(self, parent1, parent2, crossoverType,RNG_Seed=42, RNG=None):
+        """
+        :param RNG: A numpy Generator to draw from (e.g. the EA's own), so that no new Generator is built per call.
+                    If None, one is built from RNG_Seed
+        """
         self.parent1 = parent1
         self.parent2 = parent2
         self.crossoverType = crossoverType
 
         # DEFINE A NUMPY RANDOM NUMBER GENERATOR FOR THE ALGORITHM TO USE
         self.RNG_Seed = RNG_Seed
-        self.RNG = np.random.default_rng(seed=self.RNG_Seed)
+        self.RNG = np.random.default_rng(seed=self.RNG_Seed) if RNG is None else RNG
 
     def processCrossover(self):
         if self.crossoverType == 'orderedCrossover':
@@ -18,12 +23,23 @@ class CrossoverOperator:
         else:
             raise Exception('Invalid Crossover Operator/n Valid options are orderedCrossover and cycleCrossover')
 
+    # BATCH ENTRY POINT: parent1 AND parent2 ARE (k x n) MATRICES AND ROW i OF EACH FORMS THE iTH PARENT PAIR
+    def processBatchCrossover(self):
+        if self.crossoverType == 'orderedCrossover':
+            return self.batchOrderedCrossover(self.parent1, self.parent2)
+        elif self.crossoverType == 'cycleCrossover':
+            return self.batchCycleCrossover(self.parent1, self.parent2)
+        else:
+            raise Exception('Invalid Crossover Operator/n Valid options are orderedCrossover and cycleCrossover')
+
 
     def orderedCrossover(self, parent1, parent2):
         """
         This algorithm takes the two parents and randomly slices both of them at a specific point in the array. The right
         hand side (RHS) split points are swapped between parents and the remainder (LHS subset) are taken and ordered
-        according to the original order of the other respective parent
+        according to the original order of the other respective parent.
+        Each step is a single pass over integer arrays (a boolean lookup table replaces the membership tests), so the
+        whole operator is O(n). The passes themselves are done by jitKernels.orderedCrossover
         :param parent1:
         :param parent2:
         :return: child1:
@@ -31,32 +47,12 @@ class CrossoverOperator:
         """
         # Generate random crossover point
         crossoverPoint = self.RNG.choice(len(parent1))
+        parent1 = np.asarray(parent1)
+        parent2 = np.asarray(parent2)
 
-        # SPLIT BOTH PARENTS ACCORDING TO XOVER POINT
-        parent1_leftSplit = parent1[:crossoverPoint] # get left hand side slice
-        parent2_leftSplit = parent2[:crossoverPoint]
-
-        parent1_rightSplit = parent1[crossoverPoint:]  # get right hand side slice
-        parent2_rightSplit = parent2[crossoverPoint:]
-
-        # SWAP THE SECOND SECTIONS OF EACH PARENT WITH EACH OTHER
-        parent1_rightSwap = parent2_rightSplit
-        parent2_rightSwap = parent1_rightSplit
-
-        # FOR BOTH PARENTS
-        # SUBTRACT THE REMAINING SUBSET FROM THE ORIGINAL PARENT
-
-        parent1_subsetRemainder = [x for x in parent1 if not x in parent1_rightSwap]
-        parent2_subsetRemainder = [x for x in parent2 if not x in parent2_rightSwap]
-
-        # ORDER THIS SUBTRACTED SUBSET ACCORDING TO THE ORDER OF THE ORIGINAL RESP. PARENT
-        sortAccording(parent1_subsetRemainder, parent1, len(parent1_subsetRemainder), len(parent1))
-        sortAccording(parent2_subsetRemainder, parent2, len(parent2_subsetRemainder),
-                                            len(parent2))
-
-        # CONCATENATE THE LEFT HAND SIDE AND NEW RIGHT HAND SIDE OF EACH PARENT TO RESULT IN THE RESP. CHILD
-        child1 = np.concatenate([parent1_subsetRemainder, parent1_rightSwap], axis=0 )
-        child2 = np.concatenate([parent2_subsetRemainder, parent2_rightSwap], axis=0)
+        # SPLIT BOTH PARENTS ACCORDING TO XOVER POINT, SWAP THE RIGHT HAND SIDES AND FILL EACH LEFT HAND SIDE WITH THE
+        # REMAINING CITIES IN THE ORDER OF THE RESP. PARENT (A COMPILED KERNEL IF NUMBA IS INSTALLED, SEE jitKernels)
+        child1, child2 = jitKernels.orderedCrossover(parent1, parent2, crossoverPoint)
 
         # CHECK THAT EACH CHILD IS A VALID POPULATION MEMBER (I.E. A PERMUTATION OF SUBSET [1:len(D)]
         checkPermutation(parent1, child1)
@@ -73,36 +69,110 @@ class CrossoverOperator:
 
         This Algorithm has been adapted from this Forum Answer (DATE ACCESSED: 21 OCT 2023):
         https://codereview.stackexchange.com/questions/226179/easiest-way-to-implement-cycle-crossover
+        The cycle walk uses a precomputed inverse permutation of parent1 instead of list.index(), so it is O(n), and is
+        done by jitKernels.cycleCrossover
         :param parent1:
         :param parent2:
         :return: child1:
         :return: child2:
         """
-        # SET THE PARENT ARRAYS TO LIST FOR THIS ALGORITHM
-        parent1 = parent1.tolist()
-        parent2 = parent2.tolist()
-        # INITIALISE CYCLES ARRAY AND SET cycle_no TO 1
-        cycles = [-1] * len(parent1)
-        cycle_no = 1
-        cyclestart = (i for i, v in enumerate(cycles) if v < 0) # cyclestart is a generator that
-        # returns the next place for a cycle to start.
+        parent1 = np.asarray(parent1)
+        parent2 = np.asarray(parent2)
 
-        for pos in cyclestart:
+        # LABEL EVERY CYCLE WITH ONE WALK ALONG THE INVERSE PERMUTATION OF parent1 AND INSERT ALTERNATING CYCLES TO
+        # EACH CHILD (A COMPILED KERNEL IF NUMBA IS INSTALLED, SEE jitKernels)
+        child1, child2 = jitKernels.cycleCrossover(parent1, parent2)
 
-            # WHILST THE CYCLE NUMBER OF PARENT ELEMENT IS UNDEFINED (= -1) FIND THE CORRESPONDING CYCLE
-            while cycles[pos] < 0:
-                cycles[pos] = cycle_no
-                pos = parent1.index((parent2[pos]))
+        # CHECK THAT EACH CHILD IS A VALID POPULATION MEMBER (I.E. A PERMUTATION OF SUBSET [1:len(D)]
+        checkPermutation(parent1, child1)
+        checkPermutation(parent2, child2)
 
-            cycle_no += 1
-        # print('Cycles: ', cycles)
+        return child1, child2
+
+    # DEFINE THE METHOD THAT APPLIES THE ORDERED CROSSOVER TO EVERY ROW OF A BATCH OF PARENT PAIRS AT ONCE
+    def batchOrderedCrossover(self, parents1, parents2):
+        """
+        The batch form of orderedCrossover: each row pair gets its own random crossover point and the children are
+        built with vectorised index arithmetic over the whole (k x n) matrices instead of a Python loop over pairs
+        :param parents1: A (k x n) matrix of first parents
+        :param parents2: A (k x n) matrix of second parents
+        :return: children1: A (k x n) matrix of first children
+        :return: children2: A (k x n) matrix of second children
+        """
+        parents1 = np.asarray(parents1)
+        parents2 = np.asarray(parents2)
+        numPairs, numCities = parents1.shape
+
+        # Generate one random crossover point per parent pair
+        crossoverPoints = self.RNG.integers(0, numCities, size=numPairs)
+
+        # FLAG THE RIGHT HAND SIDE POSITIONS OF EVERY ROW (THESE ARE SWAPPED BETWEEN THE PARENTS)
+        rightHandSide = np.arange(numCities)[None, :] >= crossoverPoints[:, None]
+
+        children1 = self.batchOrderedChildren(parents1, parents2, rightHandSide)
+        children2 = self.batchOrderedChildren(parents2, parents1, rightHandSide)
+
+        # CHECK THAT EACH CHILD IS A VALID POPULATION MEMBER (I.E. A PERMUTATION OF SUBSET [1:len(D)]
+        checkBatchPermutation(children1)
+        checkBatchPermutation(children2)
+
+        return children1, children2
+
+    def batchOrderedChildren(self, parents, donors, rightHandSide):
+        rows = np.arange(len(parents))[:, None]
+
+        # MARK THE CITIES OF EACH DONOR'S RIGHT HAND SIDE IN A PER-ROW BOOLEAN LOOKUP TABLE INDEXED BY CITY
+        inRightSwap = np.zeros(parents.shape, dtype=bool)
+        inRightSwap[rows, donors] = rightHandSide
+
+        # MOVE THE GENES OF EACH PARENT THAT ARE NOT IN THE SWAPPED SECTION TO THE FRONT, KEEPING THEIR ORDER
+        # (THERE ARE EXACTLY crossoverPoint OF THEM, SO THEY FILL THE LEFT HAND SIDE)
+        remainderOrder = np.argsort(inRightSwap[rows, parents], axis=1, kind='stable')
+        remainder = np.take_along_axis(parents, remainderOrder, axis=1)
+
+        # CONCATENATE THE LEFT HAND SIDE AND NEW RIGHT HAND SIDE OF EACH PARENT TO RESULT IN THE RESP. CHILD
+        return np.where(rightHandSide, donors, remainder)
+
+    # DEFINE THE METHOD THAT APPLIES THE CYCLE CROSSOVER TO EVERY ROW OF A BATCH OF PARENT PAIRS AT ONCE
+    def batchCycleCrossover(self, parents1, parents2):
+        """
+        The batch form of cycleCrossover. Every cycle is labelled by its first (smallest) position, found for all rows
+        at once by pointer jumping along the cycle map in ceil(log2(n)) vectorised steps. Cycles are then numbered in
+        order of their first position, exactly as in cycleCrossover
+        :param parents1: A (k x n) matrix of first parents
+        :param parents2: A (k x n) matrix of second parents
+        :return: children1: A (k x n) matrix of first children
+        :return: children2: A (k x n) matrix of second children
+        """
+        parents1 = np.asarray(parents1)
+        parents2 = np.asarray(parents2)
+        numPairs, numCities = parents1.shape
+        rows = np.arange(numPairs)[:, None]
+        positions = np.broadcast_to(np.arange(numCities), parents1.shape)
+
+        # PRECOMPUTE THE INVERSE PERMUTATION OF EVERY parent1 ROW AND HENCE THE NEXT POSITION OF EVERY CYCLE WALK
+        parents1_position = np.empty(parents1.shape, dtype=np.intp)
+        parents1_position[rows, parents1] = positions
+        nextPosition = parents1_position[rows, parents2]
+
+        # POINTER JUMPING: AFTER t STEPS cycleStart HOLDS THE SMALLEST POSITION WITHIN 2^t STEPS ALONG EACH CYCLE
+        cycleStart = positions.copy()
+        stepsCovered = 1
+        while stepsCovered < numCities:
+            cycleStart = np.minimum(cycleStart, cycleStart[rows, nextPosition])
+            nextPosition = nextPosition[rows, nextPosition]
+            stepsCovered *= 2
+
+        # NUMBER THE CYCLES 1, 2, 3... IN ORDER OF THEIR FIRST POSITION
+        cycleNumbers = np.cumsum(cycleStart == positions, axis=1)
+        oddCycles = cycleNumbers[rows, cycleStart] % 2 == 1
 
         # GENERATE THE OFFSPRING BY INSERTING ALTERNATING CYCLES TO EACH CHILD
-        child1 = np.array([parent1[i] if n % 2 else parent2[i] for i, n in enumerate(cycles)])
-        child2 = np.array([parent2[i] if n % 2 else parent1[i] for i, n in enumerate(cycles)])
+        children1 = np.where(oddCycles, parents1, parents2)
+        children2 = np.where(oddCycles, parents2, parents1)
 
         # CHECK THAT EACH CHILD IS A VALID POPULATION MEMBER (I.E. A PERMUTATION OF SUBSET [1:len(D)]
-        checkPermutation(parent1, child1)
-        checkPermutation(parent2, child2)
+        checkBatchPermutation(children1)
+        checkBatchPermutation(children2)
 
-        return child1, child2
\ No newline at end of file
+        return children1, children2
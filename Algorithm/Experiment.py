@@ -0,0 +1,212 @@
+import csv
+import itertools
+import json
+import os
+import time
+import numpy as np
+from multiprocessing import Pool
+
+from Algorithm import EA
+from Algorithm import jitKernels
+from TSPtoADJ import TSPInstance
+
+# THE STATE A WORKER PROCESS SETS UP ONCE (IN experimentWorkerInit): THE PARSED TSP INSTANCE AND THE FIXED EA ARGUMENTS
+experimentWorkerState = {}
+
+
+# DEFINE THE FUNCTION THAT EVERY WORKER PROCESS RUNS ONCE WHEN THE POOL STARTS
+def experimentWorkerInit(TSP, fixedArguments):
+    # PARSE THE TSP INSTANCE ONCE PER WORKER RATHER THAN ONCE PER JOB
+    experimentWorkerState['instance'] = TSP if isinstance(TSP, TSPInstance) else TSPInstance(TSP)
+    experimentWorkerState['fixedArguments'] = fixedArguments
+
+    # COMPILE (OR LOAD) THE OPTIONAL NUMBA KERNELS HERE, SO THAT IT IS NOT PART OF THE wallTime OF THE FIRST JOB
+    jitKernels.compileKernels()
+
+
+# DEFINE THE FUNCTION THAT RUNS ONE (CONFIGURATION, SEED) JOB (IT IS MODULE LEVEL SO THAT THE POOL CAN PICKLE IT)
+def runExperimentJob(configuration, seed):
+    """
+    :param configuration: A dictionary of EA arguments (multiSwapAmount is applied with setMultiSwapAmount)
+    :param seed: The RNG_Seed of the run
+    :return: configuration, seed, selectedTour, selectedTourFitness, wallTime
+    """
+    arguments = dict(experimentWorkerState['fixedArguments'], **configuration)
+    multiSwapAmount = arguments.pop('multiSwapAmount', None)
+
+    startTime = time.perf_counter()
+    algorithm = EA(experimentWorkerState['instance'], RNG_Seed=seed, **arguments)
+    if multiSwapAmount is not None:
+        algorithm.setMultiSwapAmount(multiSwapAmount)
+    selectedTour, selectedTourFitness = algorithm.applyEA()
+    wallTime = time.perf_counter() - startTime
+
+    return configuration, seed, selectedTour, float(selectedTourFitness), wallTime
+
+
+# imap_unordered PASSES EACH JOB AS ONE ARGUMENT
+def runExperimentJobArguments(job):
+    return runExperimentJob(*job)
+
+
+class Experiment:
+    def __init__(self, TSP, parameterGrid, seeds, resultsFile, numProcesses=None, **fixedArguments):
+        """
+        CONSTRUCTOR METHOD FOR Experiment CLASS. RUNS THE EA ONCE FOR EVERY (CONFIGURATION, SEED) PAIR OF A PARAMETER
+        GRID OVER A POOL OF WORKER PROCESSES. EVERY FINISHED RUN IS APPENDED TO A CSV FILE AS SOON AS IT COMPLETES, AND
+        RUNS ALREADY IN THE FILE ARE SKIPPED, SO AN INTERRUPTED EXPERIMENT CAN BE RESTARTED WITH THE SAME CALL.
+        The TSP file and fixed arguments are recorded in a settings file next to the results (resultsFile + '.json'),
+        and restarting with different ones raises an Exception instead of reusing runs made with the old settings.
+        :param TSP: The TSPLIB XML file (or TSPInstance) defining the problem
+        :param parameterGrid: A dictionary mapping EA argument names (e.g. crossoverType, mutationType,
+                              replacementType, populationSize, tournamentSize, multiSwapAmount) to lists of values.
+                              Every combination of values is one configuration
+        :param seeds: The RNG_Seed values to run every configuration with (or an int n, for seeds 0..n-1)
+        :param resultsFile: The CSV file the runs are written to (and read back from when restarting)
+        :param numProcesses: The number of worker processes (defaults to the number of cores). With 1 process the
+                             runs are done in this process, without a pool
+        :param fixedArguments: EA arguments shared by every configuration (e.g. terminationCriterion)
+        """
+        self.TSP = TSP
+        self.parameterNames = sorted(parameterGrid)
+        self.parameterGrid = parameterGrid
+        self.seeds = list(range(seeds)) if isinstance(seeds, int) else list(seeds)
+        self.resultsFile = resultsFile
+        self.numProcesses = (os.cpu_count() or 1) if numProcesses is None else numProcesses
+        self.fixedArguments = fixedArguments
+
+        clashingArguments = set(self.parameterNames) & set(fixedArguments)
+        if clashingArguments:
+            raise Exception('Arguments given both in parameterGrid and as fixed arguments: ', sorted(clashingArguments))
+
+        self.fieldNames = self.parameterNames + ['seed', 'fitness', 'wallTime', 'tour']
+        self.settingsFile = resultsFile + '.json'
+        self.settings = {'TSP': str(TSP.file_name if isinstance(TSP, TSPInstance) else TSP),
+                         'fixedArguments': {name: self.settingValue(value) for name, value in fixedArguments.items()}}
+
+    # DEFINE THE METHOD THAT CONVERTS A FIXED ARGUMENT TO THE FORM IT IS RECORDED IN THE SETTINGS FILE
+    @staticmethod
+    def settingValue(value):
+        # PLAIN VALUES ARE RECORDED AS THEY ARE; OBJECTS (E.G. AN Instrumentation) ONLY BY THEIR TYPE
+        if value is None or isinstance(value, (bool, int, float, str, list, tuple, dict, np.generic)):
+            return repr(value)
+        return type(value).__name__
+
+    # DEFINE THE METHOD THAT RETURNS EVERY CONFIGURATION OF THE GRID AS A DICTIONARY OF EA ARGUMENTS
+    def configurations(self):
+        return [dict(zip(self.parameterNames, values))
+                for values in itertools.product(*[self.parameterGrid[name] for name in self.parameterNames])]
+
+    # DEFINE THE METHOD THAT RETURNS THE KEY IDENTIFYING A CONFIGURATION IN THE RESULTS FILE
+    def configurationKey(self, configuration):
+        # VALUES ARE COMPARED AS THEY ARE WRITTEN TO THE CSV FILE
+        return tuple(str(configuration[name]) for name in self.parameterNames)
+
+    # DEFINE THE METHOD THAT READS BACK EVERY RUN ALREADY IN THE RESULTS FILE
+    def readResults(self):
+        if not os.path.exists(self.resultsFile) or os.path.getsize(self.resultsFile) == 0:
+            return []
+        with open(self.resultsFile, newline='') as file:
+            reader = csv.DictReader(file)
+            if reader.fieldnames != self.fieldNames:
+                raise Exception('Results file ' + self.resultsFile + ' has columns ', reader.fieldnames,
+                                ' but this experiment writes ', self.fieldNames)
+            rows = list(reader)
+
+        # REFUSE TO REUSE RUNS THAT WERE MADE WITH A DIFFERENT TSP FILE OR DIFFERENT FIXED ARGUMENTS
+        if rows:
+            if not os.path.exists(self.settingsFile):
+                raise Exception('Results file ' + self.resultsFile + ' has no settings file ', self.settingsFile)
+            with open(self.settingsFile) as file:
+                settings = json.load(file)
+            if settings != self.settings:
+                raise Exception('Results file ' + self.resultsFile + ' was made with the settings ', settings,
+                                ' but this experiment uses ', self.settings)
+        return rows
+
+    # DEFINE THE METHOD THAT LISTS THE (CONFIGURATION, SEED) JOBS THAT ARE NOT IN THE RESULTS FILE YET
+    def pendingJobs(self):
+        completedJobs = {(tuple(row[name] for name in self.parameterNames), row['seed']) for row in self.readResults()}
+        return [(configuration, seed)
+                for configuration in self.configurations()
+                for seed in self.seeds
+                if (self.configurationKey(configuration), str(seed)) not in completedJobs]
+
+    # DEFINE THE METHOD THAT RUNS EVERY PENDING JOB AND APPENDS EACH RESULT TO THE RESULTS FILE AS IT FINISHES
+    def runExperiment(self):
+        """
+        :return: summary - As returned by summarise, over every run in the results file
+        """
+        jobs = self.pendingJobs()
+        writeHeader = not os.path.exists(self.resultsFile) or os.path.getsize(self.resultsFile) == 0
+
+        with open(self.resultsFile, 'a', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=self.fieldNames)
+            if writeHeader:
+                with open(self.settingsFile, 'w') as settingsFile:
+                    json.dump(self.settings, settingsFile, indent=2)
+                writer.writeheader()
+                file.flush()
+
+            if self.numProcesses == 1:
+                experimentWorkerInit(self.TSP, self.fixedArguments)
+                try:
+                    self.writeResults(writer, file, (runExperimentJob(*job) for job in jobs))
+                finally:
+                    experimentWorkerState.clear()
+            else:
+                with Pool(self.numProcesses, initializer=experimentWorkerInit,
+                          initargs=(self.TSP, self.fixedArguments)) as pool:
+                    # chunksize=1 SO THAT EVERY RUN IS WRITTEN AS SOON AS IT FINISHES
+                    self.writeResults(writer, file, pool.imap_unordered(runExperimentJobArguments, jobs, chunksize=1))
+
+        return self.summarise()
+
+    def writeResults(self, writer, file, results):
+        for configuration, seed, selectedTour, selectedTourFitness, wallTime in results:
+            row = {name: configuration[name] for name in self.parameterNames}
+            row.update(seed=seed, fitness=repr(selectedTourFitness), wallTime='%.6f' % wallTime,
+                       tour=' '.join(str(city) for city in np.asarray(selectedTour).tolist()))
+            writer.writerow(row)
+            file.flush()
+
+    # DEFINE THE METHOD THAT SUMMARISES THE RESULTS FILE PER CONFIGURATION
+    def summarise(self):
+        """
+        :return: summary - One dictionary per configuration with its parameter values and the number of runs, the
+                 mean, median and best (lowest) final fitness, the mean and total wall time (s) and the best tour
+        """
+        runs = {}
+        for row in self.readResults():
+            runs.setdefault(tuple(row[name] for name in self.parameterNames), []).append(row)
+
+        summary = []
+        for key, rows in runs.items():
+            fitness = np.array([float(row['fitness']) for row in rows])
+            wallTime = np.array([float(row['wallTime']) for row in rows])
+            summary.append(dict(zip(self.parameterNames, key),
+                                runs=len(rows),
+                                meanFitness=float(np.mean(fitness)),
+                                medianFitness=float(np.median(fitness)),
+                                bestFitness=float(np.min(fitness)),
+                                meanWallTime=float(np.mean(wallTime)),
+                                totalWallTime=float(np.sum(wallTime)),
+                                bestTour=rows[int(np.argmin(fitness))]['tour']))
+
+        # LIST THE CONFIGURATIONS FROM BEST TO WORST MEAN FITNESS
+        summary.sort(key=lambda configurationSummary: configurationSummary['meanFitness'])
+        return summary
+
+    # DEFINE THE METHOD THAT PRINTS THE SUMMARY AS A TABLE
+    def printSummary(self, summary=None):
+        summary = self.summarise() if summary is None else summary
+        columns = self.parameterNames + ['runs', 'meanFitness', 'medianFitness', 'bestFitness', 'meanWallTime']
+        table = [[str(configurationSummary[column]) if column in self.parameterNames or column == 'runs'
+                  else '%.2f' % configurationSummary[column] for column in columns]
+                 for configurationSummary in summary]
+        widths = [max([len(column)] + [len(row[i]) for row in table]) for i, column in enumerate(columns)]
+
+        print('  '.join(column.ljust(width) for column, width in zip(columns, widths)).rstrip())
+        for row in table:
+            print('  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+
@@ -0,0 +1,81 @@
+import numpy as np
+from collections import OrderedDict
+
+from Algorithm.helperFunctions import canonicalTours
+from Algorithm import jitKernels
+
+
+class FitnessCache:
+    def __init__(self, adj_mat, maxSize=100000, symmetric=True):
+        """
+        CONSTRUCTOR METHOD FOR FitnessCache CLASS. A BOUNDED LEAST RECENTLY USED (LRU) MAP FROM TOURS TO THEIR FITNESS.
+        A closed tour has the same cost whichever city it starts from (and, on a symmetric instance, in whichever
+        direction it is walked), so every tour is first rotated to start at city 0 (and, if symmetric, turned to the
+        direction whose second city is smaller) and the bytes of this canonical tour are the key. Re-evaluating a tour
+        that is already in the cache is then one dictionary lookup instead of n distance lookups.
+        :param adj_mat: The Adjacency Matrix representing the TSP
+        :param maxSize: The most tours kept, the least recently used tour is dropped first
+        :param symmetric: Whether the TSP is symmetric (a tour and its reverse then share one entry)
+        """
+        if maxSize < 1:
+            raise Exception('The fitness cache must hold at least 1 tour, got ', maxSize)
+        self.adj_mat = adj_mat
+        self.maxSize = maxSize
+        self.symmetric = symmetric
+
+        self.entries = OrderedDict() # canonical tour bytes -> fitness, from least to most recently used
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def hitRate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    # DEFINE THE METHOD THAT EMPTIES THE CACHE AND RESETS ITS COUNTERS
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    # DEFINE THE METHOD THAT PUTS EVERY ROW OF A TOUR MATRIX INTO CANONICAL FORM (IN ONE VECTORISED PASS)
+    def canonicalTours(self, tours):
+        return canonicalTours(tours, self.symmetric)
+
+    # DEFINE THE METHOD THAT RETURNS THE FITNESS OF EVERY TOUR, ONLY EVALUATING THE ONES THAT ARE NOT CACHED
+    def evaluate(self, tours):
+        """
+        :param tours: Either a 2D array with one tour per row, or a single 1D tour (as for batch_cost)
+        :return: A vector holding the fitness of each tour (or a scalar for a single tour)
+        """
+        singleTour = np.ndim(tours) == 1
+        keys = [tour.tobytes() for tour in self.canonicalTours(tours)]
+        fitness = np.empty(len(keys), dtype=np.float64)
+
+        missedRows = []
+        for row, key in enumerate(keys):
+            cachedFitness = self.entries.get(key)
+            if cachedFitness is None:
+                missedRows.append(row)
+            else:
+                self.entries.move_to_end(key)
+                fitness[row] = cachedFitness
+        self.hits += len(keys) - len(missedRows)
+        self.misses += len(missedRows)
+
+        # EVALUATE EVERY MISSED TOUR IN ONE VECTORISED CALL AND CACHE THE RESULTS
+        if missedRows:
+            fitness[missedRows] = jitKernels.tourCost(self.adj_mat, np.atleast_2d(np.asarray(tours))[missedRows])
+            for row in missedRows:
+                self.entries[keys[row]] = float(fitness[row])
+            while len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+
+        return fitness[0] if singleTour else fitness
+
+    def __repr__(self):
+        return 'FitnessCache(size=' + str(len(self)) + ', maxSize=' + str(self.maxSize) + ', hits=' + \
+               str(self.hits) + ', misses=' + str(self.misses) + ')'
@@ -0,0 +1,91 @@
+import cProfile
+import numpy as np
+from time import perf_counter
+
+
+class Instrumentation:
+    def __init__(self, callback=None, callbackInterval=None, profileFile=None):
+        """
+        CONSTRUCTOR METHOD FOR Instrumentation CLASS. RECORDS THE CUMULATIVE WALL TIME AND CALL COUNT OF EVERY STAGE OF
+        AN EA RUN (initialisation, selection, crossover, mutation, evaluation, localSearch, replacement, diversity) AND
+        COUNTERS SUCH AS THE NUMBER OF TOURS EVALUATED. An EA only touches it when it was built with one, so a run
+        without instrumentation pays for nothing more than an "is None" test per stage.
+        Evaluation is timed wherever it happens, so its time is also part of the stage that asked for it (e.g. the
+        steady state replacement, which evaluates the two children before inserting them).
+        :param callback: If given, called with the report (see report) every callbackInterval generations, or at the
+                         end of every EA.evolve call if callbackInterval is None
+        :param callbackInterval: The number of generations between callbacks
+        :param profileFile: If given, every EA.evolve call is also run under cProfile and the accumulated statistics
+                            are written to this file (read it with pstats.Stats(profileFile))
+        """
+        if callbackInterval is not None and callbackInterval < 1:
+            raise Exception('callbackInterval must be at least 1, got ', callbackInterval)
+        self.callback = callback
+        self.callbackInterval = callbackInterval
+        self.profileFile = profileFile
+        self.profiler = None
+        self.reset()
+
+    # DEFINE THE METHOD THAT CLEARS EVERY TIME AND COUNTER (E.G. AT THE START OF A NEW RUN)
+    def reset(self):
+        self.stageTimes = {}
+        self.stageCalls = {}
+        self.counters = {}
+        if self.profileFile is not None:
+            self.profiler = cProfile.Profile()
+
+    # DEFINE THE METHOD THAT ADDS THE TIME SINCE startTime TO stage, RETURNING THE CURRENT TIME AS THE NEXT START TIME
+    def record(self, stage, startTime):
+        now = perf_counter()
+        self.stageTimes[stage] = self.stageTimes.get(stage, 0.0) + now - startTime
+        self.stageCalls[stage] = self.stageCalls.get(stage, 0) + 1
+        return now
+
+    def count(self, counter, amount=1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    # DEFINE THE METHOD THAT WRAPS AN EVALUATION FUNCTION SO THAT ITS TIME AND THE NUMBER OF TOURS IT SCORES ARE RECORDED
+    def timedEvaluation(self, evaluate):
+        def instrumentedEvaluate(tours):
+            startTime = perf_counter()
+            fitness = evaluate(tours)
+            self.record('evaluation', startTime)
+            self.count('evaluations', 1 if np.ndim(tours) == 1 else len(tours))
+            return fitness
+
+        instrumentedEvaluate.uninstrumented = evaluate
+        return instrumentedEvaluate
+
+    # DEFINE THE METHODS THAT RUN PART OF AN EA RUN UNDER cProfile (IF A profileFile WAS GIVEN)
+    def startProfiling(self):
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stopProfiling(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profileFile)
+
+    # DEFINE THE METHOD THAT RETURNS EVERY TIME AND COUNTER AS A DICTIONARY OF PLAIN VALUES
+    def report(self):
+        """
+        :return: report - {'stages': {stage: {'seconds', 'calls', 'secondsPerCall'}}, 'counters': {counter: value}}
+        """
+        return {'stages': {stage: {'seconds': seconds,
+                                   'calls': self.stageCalls[stage],
+                                   'secondsPerCall': seconds / self.stageCalls[stage]}
+                           for stage, seconds in self.stageTimes.items()},
+                'counters': dict(self.counters)}
+
+    # DEFINE THE METHOD THAT PRINTS THE STAGES AS A TABLE, FROM THE MOST TO THE LEAST TIME SPENT
+    def printReport(self, report=None):
+        report = self.report() if report is None else report
+        print('%-16s %12s %12s %14s' % ('stage', 'seconds', 'calls', 'us/call'))
+        for stage, timing in sorted(report['stages'].items(), key=lambda item: -item[1]['seconds']):
+            print('%-16s %12.4f %12d %14.2f' % (stage, timing['seconds'], timing['calls'],
+                                                1e6 * timing['secondsPerCall']))
+        for counter, value in report['counters'].items():
+            print('%-16s %12s' % (counter, value))
+
+    def __repr__(self):
+        return 'Instrumentation(stages=' + str(sorted(self.stageTimes)) + ', counters=' + str(self.counters) + ')'
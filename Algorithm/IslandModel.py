@@ -0,0 +1,213 @@
+import os
+import numpy as np
+from multiprocessing import Pool, shared_memory
+
+from Algorithm import EA
+from Algorithm.Population import *
+from Algorithm import jitKernels
+from TSPtoADJ import TSPInstance, CoordinateDistances
+
+# THE STATE A WORKER PROCESS SETS UP ONCE (IN islandWorkerInit) AND REUSES FOR EVERY EPOCH: THE SHARED DISTANCE MATRIX,
+# THE EA ARGUMENTS AND ONE EA OBJECT PER ISLAND THAT THE WORKER HAS RUN SO FAR
+islandWorkerState = {}
+
+
+# DEFINE THE FUNCTION THAT EVERY WORKER PROCESS RUNS ONCE WHEN THE POOL STARTS
+def islandWorkerInit(sharedName, shape, dtype, file_name, symmetric, eaArguments, edgeWeightType=None):
+    """
+    Attach to the distance matrix in shared memory, so every worker reads the same (read-only) block instead of
+    receiving its own pickled copy of it. If edgeWeightType is given the block holds city coordinates instead, and
+    the worker computes distances from them with a CoordinateDistances
+    """
+    sharedMatrix = shared_memory.SharedMemory(name=sharedName)
+    adj_mat = np.ndarray(shape, dtype=dtype, buffer=sharedMatrix.buf)
+    adj_mat.flags.writeable = False
+    if edgeWeightType is not None:
+        adj_mat = CoordinateDistances(adj_mat, edgeWeightType)
+
+    islandWorkerState['sharedMatrix'] = sharedMatrix # keep the block attached for as long as the worker lives
+    islandWorkerState['instance'] = TSPInstance.fromMatrix(adj_mat, file_name, symmetric)
+    islandWorkerState['eaArguments'] = eaArguments
+    islandWorkerState['islands'] = {}
+
+    # COMPILE (OR LOAD) THE OPTIONAL NUMBA KERNELS BEFORE THE FIRST EPOCH IS RUN
+    jitKernels.compileKernels()
+
+
+# DEFINE THE FUNCTION THAT SETS UP THE WORKER STATE IN THIS PROCESS (WHEN THE ISLANDS ARE RUN WITHOUT A POOL)
+def islandLocalInit(instance, eaArguments):
+    islandWorkerState['instance'] = instance
+    islandWorkerState['eaArguments'] = eaArguments
+    islandWorkerState['islands'] = {}
+    jitKernels.compileKernels()
+
+
+# DEFINE THE FUNCTION THAT EVOLVES ONE ISLAND FOR ONE EPOCH (IT IS MODULE LEVEL SO THAT THE POOL CAN PICKLE IT)
+def runIslandEpoch(islandIndex, islandSeed, state, numGenerations):
+    """
+    :param islandIndex: The index of the island
+    :param islandSeed: The RNG_Seed (a SeedSequence) of the island's EA
+    :param state: The island's EA state after the previous epoch and migration, or None for the first epoch
+    :param numGenerations: The number of generations to run
+    :return: state - The island's EA state after numGenerations more generations
+    """
+    islands = islandWorkerState['islands']
+    if islandIndex not in islands:
+        islands[islandIndex] = EA(islandWorkerState['instance'], RNG_Seed=islandSeed,
+                                  **islandWorkerState['eaArguments'])
+    island = islands[islandIndex]
+
+    # THE RUN IS ALWAYS CONTINUED FROM THE GIVEN STATE, SO IT DOES NOT MATTER WHICH WORKER RAN THE ISLAND BEFORE
+    if state is None:
+        island.initialiseRun()
+    else:
+        island.setState(state)
+    island.evolve(numGenerations)
+
+    return island.getState()
+
+
+class IslandModel:
+    def __init__(self, TSP, numIslands, migrationInterval, populationSize, tournamentSize, topology='ring',
+                 migrantCount=1, RNG_Seed=42, terminationCriterion=10000, numProcesses=None, **eaArguments):
+        """
+        CONSTRUCTOR METHOD FOR IslandModel CLASS. numIslands INDEPENDENT EA POPULATIONS ARE EVOLVED IN A POOL OF WORKER
+        PROCESSES AND EVERY migrationInterval GENERATIONS EACH ISLAND SENDS COPIES OF ITS BEST migrantCount TOURS TO
+        ITS NEIGHBOURS, WHERE THEY REPLACE THE WORST MEMBERS (Whitley et al., The Island Model Genetic Algorithm, 1998).
+        Islands only communicate at migrations, so the larger migrationInterval is, the closer the speed up gets to
+        the number of processes.
+        :param TSP: The TSPLIB XML file (or TSPInstance) defining the problem
+        :param numIslands: The number of populations
+        :param migrationInterval: The number of generations each island runs between migrations (an epoch)
+        :param populationSize: The size of each island's population
+        :param tournamentSize: The tournament size used on each island
+        :param topology: 'ring' (island i sends to island i+1) or 'fullyConnected' (every island sends to every other)
+        :param migrantCount: The number of best tours each island sends to each of its neighbours
+        :param RNG_Seed: The master seed, every island's seed is derived from it so that runs are reproducible
+        :param terminationCriterion: The number of generations each island runs in total
+        :param numProcesses: The number of worker processes (defaults to one per island, up to the number of cores).
+                             With 1 process the islands are run in this process, without a pool
+        :param eaArguments: Any further EA arguments (mutationType, crossoverType, replacementType, evolutionMode...)
+        """
+        self.TSP = TSP
+        self.instance = TSP if isinstance(TSP, TSPInstance) else TSPInstance(TSP)
+
+        if topology not in ['ring', 'fullyConnected']:
+            raise Exception('Invalid Topology ( ' + str(topology) + ' ).\n Valid options are ', ['ring', 'fullyConnected'])
+        self.topology = topology
+        self.numIslands = numIslands
+        self.migrationInterval = migrationInterval
+        self.migrantCount = migrantCount
+        self.terminationCriterion = terminationCriterion
+
+        # EVERY ISLAND RECEIVES migrantCount TOURS FROM EACH NEIGHBOUR AND MUST KEEP AT LEAST ONE OF ITS OWN MEMBERS
+        if migrantCount * len(self.sources(0)) >= populationSize:
+            raise Exception('Too many migrants for a population of ', populationSize, ', got ',
+                            migrantCount * len(self.sources(0)))
+
+        self.eaArguments = dict(eaArguments, populationSize=populationSize, tournamentSize=tournamentSize)
+        self.numProcesses = min(numIslands, os.cpu_count() or 1) if numProcesses is None else numProcesses
+
+        # SPAWN ONE INDEPENDENT SEED SEQUENCE PER ISLAND FROM THE MASTER SEED
+        self.RNG_Seed = RNG_Seed
+        seedSequence = np.random.SeedSequence(RNG_Seed)
+        self.islandSeeds = seedSequence.spawn(numIslands)
+        self.RNG = np.random.default_rng(seedSequence)
+
+        # THE EA STATE OF EVERY ISLAND AFTER THE LAST EPOCH
+        self.islandStates = [None] * numIslands
+
+    # DEFINE THE METHOD THAT RETURNS THE ISLANDS THAT SEND MIGRANTS TO island
+    def sources(self, island):
+        if self.topology == 'ring':
+            return [(island - 1) % self.numIslands] if self.numIslands > 1 else []
+        return [source for source in range(self.numIslands) if source != island]
+
+    # DEFINE THE METHOD THAT APPLIES THE ALGORITHM
+    def applyIslandModel(self):
+        """
+        :return: selectedTour - The tour with the lowest fitness over all islands
+        :return: selectedTourFitness - Its fitness
+        """
+        if self.numProcesses == 1:
+            islandLocalInit(self.instance, self.eaArguments)
+            try:
+                self.runEpochs(lambda jobs: [runIslandEpoch(*job) for job in jobs])
+            finally:
+                islandWorkerState.clear()
+        else:
+            # COPY THE DISTANCE MATRIX (OR, FOR A COORDINATE INSTANCE, ITS COORDINATES) INTO SHARED MEMORY ONCE, THE
+            # WORKERS ATTACH TO IT WHEN THE POOL STARTS
+            edgeWeightType = None
+            if isinstance(self.instance.adj_mat, CoordinateDistances):
+                adj_mat = self.instance.adj_mat.coords
+                edgeWeightType = self.instance.adj_mat.edgeWeightType
+            else:
+                adj_mat = np.ascontiguousarray(self.instance.adj_mat)
+            sharedMatrix = shared_memory.SharedMemory(create=True, size=max(adj_mat.nbytes, 1))
+            try:
+                np.ndarray(adj_mat.shape, dtype=adj_mat.dtype, buffer=sharedMatrix.buf)[:] = adj_mat
+                with Pool(self.numProcesses, initializer=islandWorkerInit,
+                          initargs=(sharedMatrix.name, adj_mat.shape, adj_mat.dtype, self.instance.file_name,
+                                    self.instance.symmetric, self.eaArguments, edgeWeightType)) as pool:
+                    self.runEpochs(lambda jobs: pool.starmap(runIslandEpoch, jobs))
+            finally:
+                sharedMatrix.close()
+                sharedMatrix.unlink()
+
+        # EVALUATE WHICH TOUR HAS THE LOWEST FITNESS OVER ALL ISLANDS
+        tours = np.concatenate([state['tours'] for state in self.islandStates])
+        fitness = np.concatenate([self.rankingFitness(state) for state in self.islandStates])
+        finalPopulation_Victors = np.flatnonzero(fitness == np.min(fitness))
+
+        # IF THERE ARE MORE THAN 1 CHROMOSOME WITH THE LOWEST FITNESS, THEN RANDOMLY SELECT ONE OF THEM
+        selectedTourIndex = self.RNG.choice(finalPopulation_Victors)
+        return tours[selectedTourIndex], fitness[selectedTourIndex]
+
+    # DEFINE THE METHOD THAT RUNS EVERY EPOCH, WITH A MIGRATION BETWEEN CONSECUTIVE EPOCHS
+    def runEpochs(self, mapIslands):
+        self.islandStates = [None] * self.numIslands
+        remainingGenerations = self.terminationCriterion
+        while remainingGenerations > 0:
+            numGenerations = min(self.migrationInterval, remainingGenerations)
+            self.islandStates = mapIslands([(island, self.islandSeeds[island], self.islandStates[island], numGenerations)
+                                            for island in range(self.numIslands)])
+            remainingGenerations -= numGenerations
+
+            if remainingGenerations > 0:
+                self.migrate(self.islandStates)
+
+    # DEFINE THE METHOD THAT RETURNS THE FITNESS THE MEMBERS OF AN ISLAND ARE RANKED BY
+    def rankingFitness(self, state):
+        # UNDER THE 'penalise' DUPLICATE POLICY SOME STORED FITNESSES INCLUDE THE PENALTY, SO THE TRUE COSTS ARE USED
+        # (AS IN EA.selectBest)
+        if self.eaArguments.get('duplicatePolicy') == 'penalise':
+            return jitKernels.tourCost(self.instance.adj_mat, state['tours'])
+        return state['fitness']
+
+    # DEFINE THE METHOD THAT EXCHANGES THE BEST TOURS BETWEEN ISLANDS (SYNCHRONOUSLY, IN THE MASTER PROCESS)
+    def migrate(self, islandStates):
+        populations = [Population(state['tours'], state['fitness']) for state in islandStates]
+
+        # CHOOSE EVERY ISLAND'S EMIGRANTS BY THEIR TRUE COST BEFORE ANY ISLAND IS CHANGED (THEY ARRIVE WITH THAT COST)
+        emigrants = []
+        for population, state in zip(populations, islandStates):
+            emigrantCandidates = Population(population.tours, self.rankingFitness(state))
+            emigrantIndices = emigrantCandidates.bestIndices(self.migrantCount)
+            emigrants.append((emigrantCandidates.tours[emigrantIndices], emigrantCandidates.fitness[emigrantIndices]))
+
+        # REPLACE THE WORST MEMBERS OF EVERY ISLAND WITH THE IMMIGRANTS FROM ITS NEIGHBOURS
+        for island, population in enumerate(populations):
+            sources = self.sources(island)
+            if not sources:
+                continue
+            immigrantTours = np.concatenate([emigrants[source][0] for source in sources])
+            immigrantFitness = np.concatenate([emigrants[source][1] for source in sources])
+
+            for index, tour, tourFitness in zip(population.worstIndices(len(immigrantTours)),
+                                                immigrantTours, immigrantFitness):
+                population.replace(index, tour, tourFitness)
+
+            islandStates[island]['tours'] = population.tours
+            islandStates[island]['fitness'] = population.fitness
+
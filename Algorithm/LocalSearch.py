@@ -0,0 +1,204 @@
+import numpy as np
+from collections import deque
+
+
+class LocalSearch:
+    def __init__(self, adj_mat, neighbourCount=8, orOptSegmentLength=3):
+        """
+        CONSTRUCTOR METHOD FOR LocalSearch CLASS. A 2-OPT AND OR-OPT HILL CLIMBER FOR SYMMETRIC TSPs (Johnson and
+        McGeoch, The Traveling Salesman Problem: A Case Study in Local Optimization, 1997). Moves are only tried
+        between a city and its neighbourCount nearest neighbours, and cities whose neighbourhood has not changed since
+        they last failed to improve are skipped (don't-look bits), so each pass is close to linear in the tour length.
+        :param adj_mat: The (symmetric) Adjacency Matrix representing the TSP
+        :param neighbourCount: The length of each city's candidate list of nearest neighbours
+        :param orOptSegmentLength: The longest segment of consecutive cities that an Or-opt move relocates
+        """
+        self.adj_mat = adj_mat
+        self.numCities = len(adj_mat)
+        self.neighbourCount = max(1, min(neighbourCount, self.numCities - 1))
+        self.orOptSegmentLength = orOptSegmentLength
+
+        # PRECOMPUTE THE CANDIDATE LISTS ONCE, EACH SORTED FROM NEAREST TO FURTHEST
+        self.neighbours = self.candidateLists().tolist()
+
+    # DEFINE THE METHOD THAT FINDS THE neighbourCount NEAREST NEIGHBOURS OF EVERY CITY
+    def candidateLists(self, blockSize=1024):
+        candidates = np.empty((self.numCities, self.neighbourCount), dtype=np.intp)
+
+        # KEEP EACH BLOCK TO ABOUT 2^22 DISTANCES, SO THAT LAZY (COORDINATE) MATRICES OF LARGE INSTANCES FIT IN MEMORY
+        blockSize = max(1, min(blockSize, (1 << 22) // self.numCities))
+
+        # WORK THROUGH THE MATRIX A BLOCK OF ROWS AT A TIME SO THAT ONLY ONE BLOCK IS COPIED AT ONCE
+        for start in range(0, self.numCities, blockSize):
+            rows = np.arange(start, min(start + blockSize, self.numCities))
+            distances = np.array(self.adj_mat[rows], dtype=np.float64)
+            distances[np.arange(len(rows)), rows] = np.inf # a city is not its own neighbour
+
+            nearest = np.argpartition(distances, self.neighbourCount - 1, axis=1)[:, :self.neighbourCount]
+            nearestOrder = np.argsort(np.take_along_axis(distances, nearest, axis=1), axis=1, kind='stable')
+            candidates[rows] = np.take_along_axis(nearest, nearestOrder, axis=1)
+
+        return candidates
+
+    # DEFINE THE METHOD THAT IMPROVES A SINGLE TOUR
+    def improve(self, tour, tourCost, budget):
+        """
+        Apply improving 2-opt and Or-opt moves to tour until it is locally optimal or budget is used up
+        :param tour: The tour vector to improve (it is not modified)
+        :param tourCost: The cost of tour
+        :param budget: The maximum number of candidate moves to evaluate
+        :return: improvedTour: The improved tour vector
+        :return: improvedTourCost: Its cost
+        :return: evaluations: The number of candidate moves that were evaluated
+        """
+        tourList = np.asarray(tour).tolist()
+        position = [0] * self.numCities
+        for i, city in enumerate(tourList):
+            position[city] = i
+
+        # EVERY CITY STARTS WITH ITS DON'T-LOOK BIT OFF, I.E. IN THE QUEUE OF CITIES STILL TO BE PROCESSED
+        queue = deque(tourList)
+        queued = [True] * self.numCities
+
+        evaluations = 0
+        improvedTourCost = float(tourCost)
+        while queue and evaluations < budget:
+            city = queue.popleft()
+            queued[city] = False
+
+            gain, moveEvaluations, touchedCities = self.twoOptMove(tourList, position, city)
+            evaluations += moveEvaluations
+            if gain <= 0:
+                gain, moveEvaluations, touchedCities = self.orOptMove(tourList, position, city)
+                evaluations += moveEvaluations
+
+            # AN IMPROVING MOVE TURNS THE DON'T-LOOK BITS OF THE CITIES AT ITS ENDPOINTS BACK OFF
+            if gain > 0:
+                improvedTourCost -= gain
+                for touchedCity in touchedCities + [city]:
+                    if not queued[touchedCity]:
+                        queue.append(touchedCity)
+                        queued[touchedCity] = True
+
+        return np.array(tourList, dtype=np.asarray(tour).dtype), improvedTourCost, evaluations
+
+    # DEFINE THE METHOD THAT TRIES THE 2-OPT MOVES FROM city TO ITS CANDIDATES (FIRST IMPROVEMENT)
+    def twoOptMove(self, tourList, position, city):
+        D = self.adj_mat
+        n = self.numCities
+        evaluations = 0
+
+        # TRY REPLACING THE EDGE TO city'S SUCCESSOR (direction = 1) AND THEN TO ITS PREDECESSOR (direction = -1)
+        for direction in (1, -1):
+            cityNext = tourList[(position[city] + direction) % n]
+            cityNextDistance = D[city, cityNext]
+
+            for candidate in self.neighbours[city]:
+                evaluations += 1
+
+                # THE NEW EDGE (city, candidate) MUST BE SHORTER THAN THE EDGE IT REPLACES, AND THE CANDIDATE LISTS
+                # ARE SORTED, SO NO LATER CANDIDATE CAN IMPROVE EITHER
+                partialGain = cityNextDistance - D[city, candidate]
+                if partialGain <= 0:
+                    break
+
+                candidateNext = tourList[(position[candidate] + direction) % n]
+                if candidate == cityNext or candidateNext == city:
+                    continue
+
+                gain = partialGain + D[candidate, candidateNext] - D[cityNext, candidateNext]
+                if gain > 1e-9:
+                    # REVERSE THE PATH BETWEEN THE TWO REMOVED EDGES
+                    if direction == 1:
+                        self.reverse(tourList, position, position[cityNext], position[candidate])
+                    else:
+                        self.reverse(tourList, position, position[candidate], position[cityNext])
+                    return float(gain), evaluations, [cityNext, candidate, candidateNext]
+
+        return 0.0, evaluations, []
+
+    # DEFINE THE METHOD THAT TRIES TO MOVE A SEGMENT OF 1..orOptSegmentLength CITIES STARTING AT city NEXT TO A CANDIDATE
+    def orOptMove(self, tourList, position, city):
+        D = self.adj_mat
+        n = self.numCities
+        evaluations = 0
+
+        for segmentLength in range(1, self.orOptSegmentLength + 1):
+            if segmentLength >= n - 2:
+                break
+            segmentStart = city
+            segmentEnd = tourList[(position[city] + segmentLength - 1) % n]
+            segmentPrevious = tourList[(position[segmentStart] - 1) % n]
+            segmentNext = tourList[(position[segmentEnd] + 1) % n]
+
+            # THE GAIN FROM CUTTING THE SEGMENT OUT AND JOINING ITS TWO NEIGHBOURS
+            removalGain = D[segmentPrevious, segmentStart] + D[segmentEnd, segmentNext] - D[segmentPrevious, segmentNext]
+            if removalGain <= 1e-9:
+                continue
+
+            # RE-INSERT THE SEGMENT WITH ONE OF ITS ENDS NEXT TO A NEAR NEIGHBOUR OF THAT END
+            for segmentEndpoint, otherEndpoint in ((segmentStart, segmentEnd), (segmentEnd, segmentStart)):
+                for candidate in self.neighbours[segmentEndpoint]:
+                    evaluations += 1
+                    candidateDistance = D[segmentEndpoint, candidate]
+                    if candidateDistance >= removalGain:
+                        break
+                    if (position[candidate] - position[segmentStart]) % n < segmentLength:
+                        continue # the candidate is inside the segment
+
+                    for direction in (1, -1):
+                        candidateNext = tourList[(position[candidate] + direction) % n]
+                        if (position[candidateNext] - position[segmentStart]) % n < segmentLength:
+                            continue # the edge (candidate, candidateNext) is one of the removed edges
+
+                        gain = removalGain - (candidateDistance + D[otherEndpoint, candidateNext]
+                                              - D[candidate, candidateNext])
+                        if gain > 1e-9:
+                            self.moveSegment(tourList, position, segmentStart, segmentLength,
+                                             segmentEndpoint, candidate, candidateNext)
+                            return float(gain), evaluations, [segmentPrevious, segmentNext, segmentStart, segmentEnd,
+                                                              candidate, candidateNext]
+
+        return 0.0, evaluations, []
+
+    # DEFINE THE METHOD THAT REVERSES THE CYCLIC PATH OF POSITIONS i..j (INCLUSIVE) OF THE TOUR
+    def reverse(self, tourList, position, i, j):
+        n = self.numCities
+        pathLength = (j - i) % n + 1
+
+        # IN A SYMMETRIC CLOSED TOUR REVERSING A PATH IS THE SAME AS REVERSING THE REST OF THE TOUR, SO REVERSE THE
+        # SHORTER OF THE TWO
+        if 2 * pathLength > n:
+            i, j = (j + 1) % n, (i - 1) % n
+            pathLength = n - pathLength
+
+        for k in range(pathLength // 2):
+            cityI, cityJ = tourList[i], tourList[j]
+            tourList[i], tourList[j] = cityJ, cityI
+            position[cityJ], position[cityI] = i, j
+            i = (i + 1) % n
+            j = (j - 1) % n
+
+    # DEFINE THE METHOD THAT MOVES A SEGMENT BETWEEN candidate AND candidateNext, WITH segmentEndpoint NEXT TO candidate
+    def moveSegment(self, tourList, position, segmentStart, segmentLength, segmentEndpoint, candidate, candidateNext):
+        n = self.numCities
+        start = position[segmentStart]
+        segment = [tourList[(start + k) % n] for k in range(segmentLength)]
+        rest = [tourList[(start + segmentLength + k) % n] for k in range(n - segmentLength)]
+
+        # ORIENT THE SEGMENT SO THAT segmentEndpoint TOUCHES candidate
+        candidateIndex = rest.index(candidate)
+        if rest[(candidateIndex + 1) % len(rest)] == candidateNext:
+            # candidate COMES FIRST: ... candidate, segmentEndpoint ... otherEndpoint, candidateNext ...
+            insertAt = candidateIndex + 1
+            if segment[0] != segmentEndpoint:
+                segment.reverse()
+        else:
+            # candidateNext COMES FIRST: ... candidateNext, otherEndpoint ... segmentEndpoint, candidate ...
+            insertAt = candidateIndex
+            if segment[-1] != segmentEndpoint:
+                segment.reverse()
+
+        tourList[:] = rest[:insertAt] + segment + rest[insertAt:]
+        for i, city in enumerate(tourList):
+            position[city] = i
@@ -1,16 +1,22 @@
 import numpy
 import numpy as np
 from Algorithm.helperFunctions import *
+from costFunction import swap_cost_delta, insert_cost_delta
+from Algorithm import jitKernels
 
 class MutationOperator:
-    def __init__(self, child, mutationType, multiSwapAmount=5, RNG_Seed=42):
+    def __init__(self, child, mutationType, multiSwapAmount=5, RNG_Seed=42, RNG=None):
+        """
+        :param RNG: A numpy Generator to draw from (e.g. the EA's own), so that no new Generator is built per call.
+                    If None, one is built from RNG_Seed
+        """
         self.child = child
         self.mutationType = mutationType
         self.multiSwapAmount = multiSwapAmount
 
         # DEFINE A NUMPY RANDOM NUMBER GENERATOR FOR THE ALGORITHM TO USE
         self.RNG_Seed = RNG_Seed
-        self.RNG = np.random.default_rng(seed=self.RNG_Seed)
+        self.RNG = np.random.default_rng(seed=self.RNG_Seed) if RNG is None else RNG
 
         self.mutationTypeDict = {'singleSwap': self.singleSwap,
                                     'multiSwap': self.multiSwap,
@@ -18,6 +24,15 @@ class MutationOperator:
                                     'insert': self.insert,
                                     'scramble': self.scramble}  # a dictionary of all valid functions
 
+        self.batchMutationTypeDict = {'singleSwap': self.batchSingleSwap,
+                                      'multiSwap': self.batchMultiSwap,
+                                      'inversion': self.batchInversion,
+                                      'insert': self.batchInsert,
+                                      'scramble': self.batchScramble}  # their batch (k x n matrix) counterparts
+
+        # THE MOVES APPLIED BY THE LAST MUTATION, AS (moveType, index1, index2), USED FOR DELTA EVALUATION
+        self.mutationMoves = []
+
     def processMutation(self):
         if self.mutationType in self.mutationTypeDict:
             return self.mutationTypeDict[self.mutationType](self.child)
@@ -25,20 +40,57 @@ class MutationOperator:
             raise Exception("Invalid Replacement Function ( " + self.mutationType + " ).\n Valid options are ",
                             [key for key in self.mutationTypeDict])
 
+    # DEFINE THE METHOD THAT MUTATES THE CHILD AND ALSO RETURNS THE RESULTING CHANGE IN TOUR COST
+    def processMutationWithDelta(self, adj_mat, symmetric=True):
+        """
+        Apply the mutation and compute the cost delta from only the edges it changed (2-4 per move), so the mutated
+        child's fitness is childCost + costDelta without re-evaluating the whole tour.
+        :param adj_mat: The Adjacency Matrix representing the TSP
+        :param symmetric: Whether adj_mat is symmetric (reversing a segment only has an O(1) delta if it is)
+        :return: mutatedChild: The mutated tour
+        :return: costDelta: The change in tour cost, or None if it cannot be computed cheaply (scramble, or
+                            inversion on an asymmetric instance) and the mutated child has to be fully evaluated
+        """
+        mutatedChild = self.processMutation()
+
+        # REPLAY THE RECORDED MOVES ON A WORKING COPY OF THE CHILD, SUMMING THE DELTA OF EACH MOVE
+        tour = np.array(self.child, copy=True)
+        costDelta = 0.0
+        for moveType, index1, index2 in self.mutationMoves:
+            if moveType == 'swap':
+                costDelta += swap_cost_delta(adj_mat, tour, index1, index2)
+                tour[index1], tour[index2] = tour[index2], tour[index1]
+            elif moveType == 'inversion' and symmetric:
+                costDelta += jitKernels.twoOptDelta(adj_mat, tour, index1, index2)
+                tour[index1:index2 + 1] = tour[index1:index2 + 1][::-1]
+            elif moveType == 'insert':
+                costDelta += insert_cost_delta(adj_mat, tour, index1, index2)
+                tour[index1:index2 + 1] = np.roll(tour[index1:index2 + 1], 1)
+            else:
+                return mutatedChild, None
+
+        return mutatedChild, costDelta
+
+    # BATCH ENTRY POINT: child IS A (k x n) MATRIX AND EVERY ROW IS MUTATED INDEPENDENTLY
+    def processBatchMutation(self):
+        if self.mutationType in self.batchMutationTypeDict:
+            return self.batchMutationTypeDict[self.mutationType](self.child)
+        else:
+            raise Exception("Invalid Replacement Function ( " + self.mutationType + " ).\n Valid options are ",
+                            [key for key in self.batchMutationTypeDict])
+
     # DEFINE THE METHOD THAT IMPLEMENTS THE SINGLE SWAP ALGORITHM
+    # (EVERY MUTATION DRAWS ITS RANDOM POSITIONS HERE AND LEAVES THE ARRAY WORK TO A jitKernels FUNCTION, WHICH IS A
+    # COMPILED KERNEL IF NUMBA IS INSTALLED, SO BOTH BACKENDS DRAW THE SAME RANDOM NUMBERS AND GIVE THE SAME CHILD)
     def singleSwap(self, child):
-        # COPY CONTENTS OF child TO NEW mutatedChild ARRAY
-        mutatedChild = np.zeros(len(child),dtype=np.int8) # Have to initialise like this as python does not support
-        # constant variables
-        mutatedChild += child
+        # VIEW child WITH AN int16/int32 TYPE WIDE ENOUGH FOR EVERY CITY INDEX (THE KERNEL RETURNS A NEW ARRAY)
+        child = np.asarray(child, dtype=tourDtype(len(child)))
 
         # GENERATE A 2 DISTINCT ELEMENT RANDOM SUBSET FROM THE SET OF INTEGERS UP TO |child| - 1
         mutationIndices = self.RNG.choice(len(child),2, replace=False)
-        # print('point 1: ', child[mutationIndices[0]],' ', 'point 2: ', child[mutationIndices[1]])
-        # print('Mutation Indices: ', mutationIndices)
+        self.mutationMoves = [('swap', mutationIndices[0], mutationIndices[1])]
 
-
-        np.put(mutatedChild, mutationIndices, [child[mutationIndices[1]], child[mutationIndices[0]]])
+        mutatedChild = jitKernels.swapMutation(child, mutationIndices)
 
         # APPLY PERMUTATION CONTINUITY CHECK BETWEEN CHILD AND MUTATED CHILD
         checkPermutation(child, mutatedChild)
@@ -47,49 +99,35 @@ class MutationOperator:
 
     # DEFINE THE MULTISWAP METHOD AS SUCCESSIVE ITERATIONS OF SINGLE SWAP UP TO multiSwapAmount TIMES
     def multiSwap(self, child):
-        # COPY CONTENTS OF child TO NEW mutatedChild ARRAY
-        mutatedChild = np.zeros(len(child), dtype=np.int8)
-        mutatedChild += child
+        child = np.asarray(child, dtype=tourDtype(len(child)))
 
+        # PERFORM THE SAME DRAW USED IN SINGLE SWAP FOR EVERY ITERATION, THEN APPLY ALL THE SWAPS IN ORDER AT ONCE
+        swaps = np.empty((self.multiSwapAmount, 2), dtype=np.intp)
+        self.mutationMoves = []
         for i in range(self.multiSwapAmount):
-            # PERFORM THE SAME ALGORITHM USED IN SINGLE SWAP
-            mutationIndices = self.RNG.choice(len(child), 2, replace=False)
-
-            # print('point 1: ', mutatedChild[mutationIndices[0]],' ', 'point 2: ', mutatedChild[mutationIndices[1]])
-            # print('Mutation Indices: ', mutationIndices) # For Debugging Purposes
+            swaps[i] = self.RNG.choice(len(child), 2, replace=False)
+            self.mutationMoves.append(('swap', swaps[i, 0], swaps[i, 1]))
 
-            np.put(mutatedChild, mutationIndices, [mutatedChild[mutationIndices[1]], mutatedChild[mutationIndices[0]]])
-            # print('Mutated Child iteration ', i, ': ', mutatedChild) # For debugging Purpose
+        mutatedChild = jitKernels.swapMutation(child, swaps)
 
-            # APPLY PERMUTATION CONTINUITY CHECK BETWEEN CHILD AND MUTATED CHILD
-            checkPermutation(child, mutatedChild)
+        # APPLY PERMUTATION CONTINUITY CHECK BETWEEN CHILD AND MUTATED CHILD
+        checkPermutation(child, mutatedChild)
 
         return mutatedChild
 
     # DEFINE THE METHOD THAT IMPLEMENTS THE INVERSION ALGORITHM
     def inversion(self, child):
-        # COPY CONTENTS OF child TO NEW mutatedChild ARRAY
-        mutatedChild = np.zeros(len(child), dtype=np.int8)
-        mutatedChild += child
+        child = np.asarray(child, dtype=tourDtype(len(child)))
 
         # GENERATE TWO RANDOM POSITIONS IN THE CHROMOSOME TO GENERATE A CONTIGUOUS SUBSET
         mutationIndices = self.RNG.choice(len(child), 2, replace=False)
-        # print('mutation Indices ', mutationIndices) #For debugging purposes
 
         # ORDER THIS ARRAY OF INDEXES FROM SMALLEST TO LARGEST
         sortedMutationIndices = np.sort(mutationIndices)
-        # print('Sorted Mutation Indices ', sortedMutationIndices) # For debugging purposes
-
-        # GENERATE THE CHROMOSOME SUBSET FROM THE CHILD
-        childSubset = mutatedChild[sortedMutationIndices[0]:sortedMutationIndices[1]+1] #The slice operator is 1 indexed
-        # print('Subset: ', childSubset) #For debugging purposes
+        self.mutationMoves = [('inversion', sortedMutationIndices[0], sortedMutationIndices[1])]
 
-        # REVERSE THE ORDER OF THIS SUBSET
-        childSubsetReversed = childSubset[::-1]
-        # print('Subset Reversed: ', childSubsetReversed) # For debugging purposes
-
-        # REPLACE THIS REVERSED SUBSET WITH THE ORIGINAL SUBSET WITHIN THE CHILD
-        mutatedChild[sortedMutationIndices[0]:sortedMutationIndices[1]+1] = childSubsetReversed
+        # REVERSE THE ORDER OF THE SUBSET child[INDEX 1..INDEX 2] (INCLUSIVE) WITHIN THE CHILD
+        mutatedChild = jitKernels.inversionMutation(child, sortedMutationIndices[0], sortedMutationIndices[1])
 
         # APPLY PERMUTATION CONTINUITY CHECK BETWEEN CHILD AND MUTATED CHILD
         checkPermutation(child, mutatedChild)
@@ -98,28 +136,23 @@ class MutationOperator:
 
     # DEFINE THE SCRAMBLE MUTATION THAT IS SIMILAR TO THE INVERSION ALGORITHM BUT THE SUBSET IS SCRAMBLED
     def scramble(self, child):
-        mutatedChild = np.zeros(len(child), dtype=np.int8)
-        mutatedChild += child
-        # print(child)
+        child = np.asarray(child, dtype=tourDtype(len(child)))
 
         # GENERATE TWO RANDOM POSITIONS IN THE CHROMOSOME TO GENERATE A CONTIGUOUS SUBSET
         mutationIndices = self.RNG.choice(len(child)+1, 2, replace=False) # chose len(child)+1 to permute entire child
-        # print('mutation Indices ', mutationIndices) #For debugging purposes
 
         # ORDER THIS ARRAY OF INDEXES FROM SMALLEST TO LARGEST
         sortedMutationIndices = np.sort(mutationIndices)
-        # print('Sorted Mutation Indices ', sortedMutationIndices) # For debugging purposes
-
-        # GENERATE THE CHROMOSOME SUBSET FROM THE CHILD
-        childSubset = mutatedChild[sortedMutationIndices[0]:sortedMutationIndices[1]+1] #The slice operator is 1 indexed
-        # print('Subset: ', childSubset) #For debugging purposes
+        self.mutationMoves = [('scramble', sortedMutationIndices[0], sortedMutationIndices[1])]
 
-        # PERMUTE THE ELEMENTS OF THE SUBSET
-        childSubsetPermuted = self.RNG.permutation(childSubset)
-        # print('Subset Permuted: ', childSubsetPermuted) # For debugging purposes
+        # PERMUTE THE POSITIONS OF THE SUBSET (THE SECOND INDEX MAY BE len(child), SO THE SUBSET IS CLIPPED TO THE END)
+        # (PERMUTING THE POSITIONS DRAWS THE SAME RANDOM NUMBERS AS PERMUTING THE SUBSET ITSELF)
+        subsetLength = min(sortedMutationIndices[1], len(child) - 1) - sortedMutationIndices[0] + 1
+        subsetOrder = self.RNG.permutation(subsetLength)
 
-        # REPLACE THIS SCRAMBLED SUBSET WITH THE ORIGINAL SUBSET WITHIN THE CHILD
-        mutatedChild[sortedMutationIndices[0]:sortedMutationIndices[1]+1] = childSubsetPermuted
+        # REPLACE THE SUBSET WITH ITS SCRAMBLED ORDER WITHIN THE CHILD
+        mutatedChild = jitKernels.scrambleMutation(child, sortedMutationIndices[0], sortedMutationIndices[1],
+                                                   subsetOrder)
 
         # APPLY PERMUTATION CONTINUITY CHECK BETWEEN CHILD AND MUTATED CHILD
         checkPermutation(child, mutatedChild)
@@ -128,35 +161,93 @@ class MutationOperator:
 
     # DEFINES THE METHOD THAT IMPLEMENTS THE INSERT MUTATION ALGORITHM
     def insert(self, child):
-        mutatedChild = np.zeros(len(child), dtype=np.int8)
-        mutatedChild += child
+        child = np.asarray(child, dtype=tourDtype(len(child)))
 
         # GENERATE TWO RANDOM POSITIONS IN THE CHROMOSOME TO GENERATE A CONTIGUOUS SUBSET
-        mutationIndices = self.RNG.choice(len(child), 2,
-                                          replace=False)  # chose len(child)+1 to permute entire child
-        print('mutation Indices ', mutationIndices)  # For debugging purposes
+        mutationIndices = self.RNG.choice(len(child), 2, replace=False)
 
         # ORDER THIS ARRAY OF INDEXES FROM SMALLEST TO LARGEST
         sortedMutationIndices = np.sort(mutationIndices)
-        # print('Sorted Mutation Indices ', sortedMutationIndices)  # For debugging purposes
+        self.mutationMoves = [('insert', sortedMutationIndices[0], sortedMutationIndices[1])]
 
-        # DEFINE A RANGE ARRAY THAT WILL PERFORM THE INSERTION
-        # THIS SUB-ALGORITHM WAS TAKEN FROM Divakar's STACK OVERFLOW answer
-        # https://stackoverflow.com/questions/40332763/inplace-changing-position-of-an-element-in-array-by-shifting-others-forward-nu
-        range_array = np.arange(child.size)
+        # MOVE THE GENE AT [INDEX 2] TO [INDEX 1], SHIFTING THE GENES IN BETWEEN ONE PLACE TO THE RIGHT
+        # (THE NUMPY FALLBACK IS A ROLL OF THE SUBSET, AS IN Divakar's STACK OVERFLOW answer
+        # https://stackoverflow.com/questions/40332763/inplace-changing-position-of-an-element-in-array-by-shifting-others-forward-nu)
+        mutatedChild = jitKernels.insertMutation(child, sortedMutationIndices[0], sortedMutationIndices[1])
+
+        # APPLY PERMUTATION CONTINUITY CHECK BETWEEN CHILD AND MUTATED CHILD
+        checkPermutation(child, mutatedChild)
 
-        # STORE THE SECOND INDEX IN A TEMPORARY ARRAY
-        tmp_index_array = mutatedChild[sortedMutationIndices[1]]
+        return mutatedChild
 
-        # SET THE VALUES OF mutatedChild (NOT EQUAL TO [INDEX 1]+1) = VALUES (NOT EQUAL TO INDEX 2)
-        mutatedChild[range_array != (sortedMutationIndices[0])] = mutatedChild[range_array != sortedMutationIndices[1]]
+    # DEFINE THE METHOD THAT DRAWS TWO DISTINCT RANDOM POSITIONS FOR EVERY ROW OF A BATCH, RETURNED SMALLEST FIRST
+    def batchMutationIndices(self, numRows, numPositions):
+        firstIndices = self.RNG.integers(0, numPositions, size=numRows)
+        secondIndices = (firstIndices + self.RNG.integers(1, numPositions, size=numRows)) % numPositions
+        return np.minimum(firstIndices, secondIndices)[:, None], np.maximum(firstIndices, secondIndices)[:, None]
 
-        # SET THE VALUE OF mutatedChild at [INDEX 1]+1 TO BE tmp_index_array
-        mutatedChild[sortedMutationIndices[0]] = tmp_index_array
+    # DEFINE THE BATCH FORM OF singleSwap: SWAP TWO RANDOM POSITIONS IN EVERY ROW
+    def batchSingleSwap(self, children):
+        mutatedChildren = np.array(children, copy=True)
+        rows = np.arange(len(mutatedChildren))[:, None]
+        lowIndices, highIndices = self.batchMutationIndices(*mutatedChildren.shape)
 
-        # APPLY PERMUTATION CONTINUITY CHECK BETWEEN CHILD AND MUTATED CHILD
-        checkPermutation(child, mutatedChild)
+        mutatedChildren[rows, lowIndices], mutatedChildren[rows, highIndices] = \
+            mutatedChildren[rows, highIndices], mutatedChildren[rows, lowIndices]
 
-        print('original child ', child, ' mutated child ', mutatedChild)
+        checkBatchPermutation(mutatedChildren)
+        return mutatedChildren
 
-        return mutatedChild
\ No newline at end of file
+    # DEFINE THE BATCH FORM OF multiSwap AS SUCCESSIVE BATCH SINGLE SWAPS UP TO multiSwapAmount TIMES
+    def batchMultiSwap(self, children):
+        mutatedChildren = np.array(children, copy=True)
+        for i in range(self.multiSwapAmount):
+            mutatedChildren = self.batchSingleSwap(mutatedChildren)
+        return mutatedChildren
+
+    # DEFINE THE BATCH FORM OF inversion: REVERSE A RANDOM CONTIGUOUS SUBSET OF EVERY ROW
+    def batchInversion(self, children):
+        children = np.asarray(children)
+        lowIndices, highIndices = self.batchMutationIndices(*children.shape)
+        positions = np.arange(children.shape[1])[None, :]
+
+        # POSITION j INSIDE [low, high] READS FROM low + high - j, EVERY OTHER POSITION READS FROM ITSELF
+        insideSubset = (positions >= lowIndices) & (positions <= highIndices)
+        sourcePositions = np.where(insideSubset, lowIndices + highIndices - positions, positions)
+
+        mutatedChildren = np.take_along_axis(children, sourcePositions, axis=1)
+        checkBatchPermutation(mutatedChildren)
+        return mutatedChildren
+
+    # DEFINE THE BATCH FORM OF scramble: RANDOMLY PERMUTE A RANDOM CONTIGUOUS SUBSET OF EVERY ROW
+    def batchScramble(self, children):
+        children = np.asarray(children)
+        numRows, numPositions = children.shape
+        # chose numPositions+1 (as in scramble) so that the subset can run to the end of the child
+        lowIndices, highIndices = self.batchMutationIndices(numRows, numPositions + 1)
+        highIndices = np.minimum(highIndices, numPositions - 1)
+        positions = np.arange(numPositions)[None, :]
+
+        # SORT THE POSITIONS BY A KEY THAT IS THE POSITION ITSELF OUTSIDE THE SUBSET AND A RANDOM VALUE IN
+        # [low, high + 1) INSIDE IT, SO ONLY THE SUBSET IS SHUFFLED AND IT STAYS WHERE IT WAS
+        insideSubset = (positions >= lowIndices) & (positions <= highIndices)
+        randomKeys = lowIndices + self.RNG.random(children.shape) * (highIndices - lowIndices + 1)
+        sourcePositions = np.argsort(np.where(insideSubset, randomKeys, positions), axis=1, kind='stable')
+
+        mutatedChildren = np.take_along_axis(children, sourcePositions, axis=1)
+        checkBatchPermutation(mutatedChildren)
+        return mutatedChildren
+
+    # DEFINE THE BATCH FORM OF insert: MOVE THE GENE AT THE SECOND POSITION TO THE FIRST, SHIFTING THE REST RIGHT
+    def batchInsert(self, children):
+        children = np.asarray(children)
+        lowIndices, highIndices = self.batchMutationIndices(*children.shape)
+        positions = np.arange(children.shape[1])[None, :]
+
+        sourcePositions = np.where(positions == lowIndices, highIndices,
+                                   np.where((positions > lowIndices) & (positions <= highIndices),
+                                            positions - 1, positions))
+
+        mutatedChildren = np.take_along_axis(children, sourcePositions, axis=1)
+        checkBatchPermutation(mutatedChildren)
+        return mutatedChildren
@@ -0,0 +1,173 @@
+import heapq
+import numpy as np
+
+from Algorithm.helperFunctions import canonicalTours
+
+
+class Population:
+    def __init__(self, tours, fitness, trackDuplicates=False, symmetric=True):
+        """
+        CONSTRUCTOR METHOD FOR Population CLASS. ALL TOURS ARE HELD IN ONE CONTIGUOUS (populationSize x numCities)
+        INTEGER MATRIX AND ALL FITNESSES IN ONE float64 VECTOR, SO THAT COPYING OR INDEXING THE POPULATION ONLY
+        TOUCHES RAW ARRAY DATA RATHER THAN ONE PYTHON OBJECT PER MEMBER.
+        :param tours: A 2D Array with one tour vector per row
+        :param fitness: A 1D Array with the fitness of each tour (row) in tours
+        :param trackDuplicates: If True, a count of every distinct tour (by its canonical form, see canonicalTours) is
+                                kept up to date as members are replaced, so that contains() and uniqueCount are O(1)
+        :param symmetric: Whether a tour and its reverse count as the same tour when tracking duplicates
+        """
+        self.tours = np.ascontiguousarray(tours)
+        self.fitness = np.ascontiguousarray(fitness, dtype=np.float64)
+
+        if self.tours.ndim != 2 or len(self.tours) != len(self.fitness):
+            raise Exception('Invalid Population: expected a 2D tour matrix with one fitness per row, got ',
+                            self.tours.shape, self.fitness.shape)
+
+        # KEEP AN ORDERED INDEX OF THE FITNESS VECTOR SO THAT BEST/WORST QUERIES DO NOT RESCAN THE POPULATION
+        self.fitnessIndex = FitnessIndex(self.fitness)
+
+        # OPTIONALLY KEEP A HASH MAP FROM EVERY DISTINCT TOUR TO THE NUMBER OF MEMBERS HOLDING IT
+        self.trackDuplicates = trackDuplicates
+        self.symmetric = symmetric
+        if trackDuplicates:
+            self.rebuildTourCounts()
+
+    def __len__(self):
+        return len(self.fitness)
+
+    @property
+    def numCities(self):
+        return self.tours.shape[1]
+
+    # DEFINE THE METHOD THAT REPLACES A POPULATION MEMBER IN PLACE
+    def replace(self, index, tour, fitness):
+        """
+        Overwrite the index-th member of the population with tour and its fitness, without reallocating either array
+        :param index: The slot of the population to be replaced
+        :param tour: The new tour vector
+        :param fitness: The fitness of the new tour vector
+        """
+        if self.trackDuplicates:
+            self.removeTourKey(self.tourKeys[index])
+            self.tourKeys[index] = self.tourKey(tour)
+            self.tourCounts[self.tourKeys[index]] = self.tourCounts.get(self.tourKeys[index], 0) + 1
+
+        self.tours[index] = tour
+        self.fitness[index] = fitness
+        self.fitnessIndex.update(index, fitness)
+
+    # DEFINE THE METHOD THAT OVERWRITES EVERY MEMBER OF THE POPULATION IN PLACE (E.G. FOR A GENERATIONAL UPDATE)
+    def assign(self, tours, fitness):
+        self.tours[:] = tours
+        self.fitness[:] = fitness
+        self.fitnessIndex.rebuild()
+        if self.trackDuplicates:
+            self.rebuildTourCounts()
+
+    # DEFINE THE METHODS THAT KEEP THE COUNT OF EVERY DISTINCT TOUR (ONLY USED WHEN trackDuplicates IS SET)
+    def tourKey(self, tour):
+        return canonicalTours(tour, self.symmetric)[0].tobytes()
+
+    def rebuildTourCounts(self):
+        self.tourKeys = [canonicalTour.tobytes() for canonicalTour in canonicalTours(self.tours, self.symmetric)]
+        self.tourCounts = {}
+        for key in self.tourKeys:
+            self.tourCounts[key] = self.tourCounts.get(key, 0) + 1
+
+    def removeTourKey(self, key):
+        if self.tourCounts[key] == 1:
+            del self.tourCounts[key]
+        else:
+            self.tourCounts[key] -= 1
+
+    # DEFINE THE METHOD THAT CHECKS IN O(1) (AFTER PUTTING tour IN CANONICAL FORM) WHETHER A MEMBER HOLDS tour
+    def contains(self, tour):
+        if not self.trackDuplicates:
+            raise Exception('Population was not built with trackDuplicates=True')
+        return self.tourKey(tour) in self.tourCounts
+
+    # DEFINE THE DIVERSITY MEASURES: THE NUMBER OF DISTINCT TOURS AND THEIR SHARE OF THE POPULATION
+    @property
+    def uniqueCount(self):
+        if not self.trackDuplicates:
+            raise Exception('Population was not built with trackDuplicates=True')
+        return len(self.tourCounts)
+
+    @property
+    def diversity(self):
+        return self.uniqueCount / len(self)
+
+    # DEFINE THE METHODS THAT RETURN THE INDEX OF THE BEST (LOWEST) AND WORST (HIGHEST) FITNESS
+    # (IF THERE ARE MORE THAN ONE MEMBER WITH THE SAME FITNESS, THE LOWEST INDEX IS RETURNED)
+    def argmin(self):
+        return self.fitnessIndex.best(1)[0]
+
+    def argmax(self):
+        return self.fitnessIndex.worst(1)[0]
+
+    # DEFINE THE METHODS THAT RETURN THE INDICES OF THE k BEST (LOWEST) AND k WORST (HIGHEST) FITNESSES
+    def bestIndices(self, k):
+        return np.array(self.fitnessIndex.best(k), dtype=np.intp)
+
+    def worstIndices(self, k):
+        return np.array(self.fitnessIndex.worst(k), dtype=np.intp)
+
+    def copy(self):
+        return Population(self.tours.copy(), self.fitness.copy(), self.trackDuplicates, self.symmetric)
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __repr__(self):
+        return 'Population(size=' + str(len(self)) + ', numCities=' + str(self.numCities) + ')'
+
+
+class FitnessIndex:
+    def __init__(self, fitness):
+        """
+        CONSTRUCTOR METHOD FOR FitnessIndex CLASS. A MIN HEAP AND A MAX HEAP OVER THE SLOTS OF A FITNESS VECTOR THAT
+        ARE UPDATED LAZILY: REPLACING A SLOT PUSHES A NEW (fitness, index, version) ENTRY AND THE OLD ENTRY IS SKIPPED
+        WHEN IT REACHES THE TOP OF THE HEAP. THIS GIVES O(log N) UPDATES AND O(k log N) BEST/WORST k QUERIES.
+        :param fitness: The fitness vector to index (a reference is kept and used when the heaps are rebuilt)
+        """
+        self.fitness = fitness
+        self.rebuild()
+
+    # DEFINE THE METHOD THAT REBUILDS BOTH HEAPS FROM THE CURRENT FITNESS VECTOR IN O(N)
+    def rebuild(self):
+        self.versions = [0] * len(self.fitness)
+        self.minHeap = [(f, i, 0) for i, f in enumerate(self.fitness.tolist())]
+        self.maxHeap = [(-f, i, 0) for i, f in enumerate(self.fitness.tolist())]
+        heapq.heapify(self.minHeap)
+        heapq.heapify(self.maxHeap)
+
+    # DEFINE THE METHOD THAT RECORDS A NEW FITNESS FOR A SLOT
+    def update(self, index, fitness):
+        index = int(index)
+        fitness = float(fitness)
+        version = self.versions[index] + 1
+        self.versions[index] = version
+
+        heapq.heappush(self.minHeap, (fitness, index, version))
+        heapq.heappush(self.maxHeap, (-fitness, index, version))
+
+        # ONCE STALE ENTRIES OUTNUMBER LIVE ONES, REBUILD TO KEEP THE HEAPS O(N) IN SIZE
+        if len(self.minHeap) > 2 * len(self.versions) + 16:
+            self.rebuild()
+
+    def best(self, k):
+        return self.peek(self.minHeap, k)
+
+    def worst(self, k):
+        return self.peek(self.maxHeap, k)
+
+    # DEFINE THE METHOD THAT RETURNS THE INDICES OF THE TOP k LIVE ENTRIES OF A HEAP WITHOUT REMOVING THEM
+    def peek(self, heap, k):
+        taken = []
+        while len(taken) < k and heap:
+            entry = heapq.heappop(heap)
+            if entry[2] == self.versions[entry[1]]: # discard stale entries for slots that have since been replaced
+                taken.append(entry)
+        for entry in taken:
+            heapq.heappush(heap, entry)
+        return [entry[1] for entry in taken]
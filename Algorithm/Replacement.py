@@ -1,25 +1,35 @@
 import numpy as np
 
 from costFunction import *
-import copy
+from Algorithm.Population import *
+from Algorithm.helperFunctions import canonicalTours
+from Algorithm import jitKernels
 
 class Replacement:
-    def __init__(self, population, adj_mat, child1, child2, replacementType, RNG_Seed=42, replacement_FIFOindex=0):
+    def __init__(self, adj_mat, replacementType, RNG_Seed=42, replacement_FIFOindex=0, roundRobinSize=10,
+                 inPlace=False, RNG=None, fitnessCache=None, duplicatePolicy=None, duplicatePenalty=0.05):
         """
         CONSTRUCTOR METHOD FOR Replacement CLASS. THESE ALGORITHMS ARE BASED ON (Eiben et al. Introduction to
         Evolutionary Computing pg 88 - 89).
-        :param population:
+        A Replacement object is a long-lived strategy: it is built once per run and applied every generation, so any
+        state the strategy needs between generations (e.g. the FIFO cursor) is kept on the object itself.
         :param adj_mat: The Adjacency Matrix representing the TSP
-        :param child1:
-        :param child2:
         :param replacementType: Valid options are: FIFO, Random, ReplaceWorst, Elitism, RoundRobin, muPlusLambda
+                                (and muCommaLambda for batches of offspring)
         :param RNG_Seed: The seed integer used for the pseudo random number generator numpy object
         :param replacement_FIFOindex: The index (for iterative applications of Replace) used to track the FIFO replacement Algorithm
+        :param roundRobinSize: The size of the round-robin tournament used by the RoundRobin strategy
+        :param inPlace: If True, only the replaced slots of the given population are overwritten and the same
+                        Population object is returned. If False, the population is copied first and left untouched
+        :param RNG: A numpy Generator to draw from (e.g. the EA's own). If None, one is built from RNG_Seed
+        :param fitnessCache: An optional FitnessCache that children are evaluated through
+        :param duplicatePolicy: What to do with a child that is already a member of the population (the population
+                                must be built with trackDuplicates=True): None (insert it as usual), 'reject' (never
+                                insert it, the slot keeps its member) or 'penalise' (insert it with its fitness
+                                worsened by a factor of 1 + duplicatePenalty, so fitness based selection avoids it)
+        :param duplicatePenalty: The relative fitness penalty used by the 'penalise' policy
         """
-        self.population = population
         self.adj_mat = adj_mat
-        self.child1 = child1
-        self.child2 = child2
 
         self.replacementType = replacementType
         self.replacementTypeDict = {'Random':self.random,
@@ -28,120 +38,202 @@ class Replacement:
                                     'Elitism': self.elitism,
                                     'RoundRobin': self.roundRobin,
                                     'muPlusLambda': self.muPlusLambda} # a dictionary of all valid functions
+        self.batchReplacementTypeDict = {'muPlusLambda': self.batchMuPlusLambda,
+                                         'muCommaLambda': self.batchMuCommaLambda} # for generational (batch) offspring
 
         # DEFINE A NUMPY RANDOM NUMBER GENERATOR FOR THE ALGORITHM TO USE
         self.RNG_Seed = RNG_Seed
-        self.RNG = np.random.default_rng(seed=self.RNG_Seed)
+        self.RNG = np.random.default_rng(seed=self.RNG_Seed) if RNG is None else RNG
 
         self.FIFOindex = replacement_FIFOindex # used for the FIFO replacement strategy
-
-
-    def applyReplacement(self):
-
-        if self.replacementType in self.replacementTypeDict:
-            return self.replacementTypeDict[self.replacementType](self.population, self.child1, self.child2)
-        else:
+        self.roundRobinSize = roundRobinSize # used for the RoundRobin replacement strategy
+        self.inPlace = inPlace
+        self.fitnessCache = fitnessCache
+
+        if duplicatePolicy not in [None, 'reject', 'penalise']:
+            raise Exception('Invalid Duplicate Policy ( ' + str(duplicatePolicy) + ' ).\n Valid options are ',
+                            [None, 'reject', 'penalise'])
+        self.duplicatePolicy = duplicatePolicy
+        self.duplicatePenalty = duplicatePenalty
+
+        if self.replacementType not in self.replacementTypeDict and \
+                self.replacementType not in self.batchReplacementTypeDict:
             raise Exception("Invalid Replacement Function ( " + self.replacementType + " ).\n Valid options are ",
-                            [key for key in self.replacementTypeDict])
+                            [key for key in self.replacementTypeDict] + ['muCommaLambda'])
+
+    def applyReplacement(self, population, child1, child2, child1Fitness=None, child2Fitness=None):
+        """
+        Apply the chosen replacement strategy to insert the two offspring into population
+        :param population: The Population before replacement
+        :param child1: First Offspring generated by Crossover and Mutation Stages
+        :param child2: Second Offspring generated by Crossover and Mutation Stages
+        :param child1Fitness: The fitness of child1 if it is already known (e.g. from a mutation cost delta),
+                              otherwise None and it is evaluated here
+        :param child2Fitness: As child1Fitness, for child2
+        :return: newPopulation - A Population object holding the tour matrix and fitness vector
+        """
+        if self.replacementType not in self.replacementTypeDict:
+            raise Exception("Replacement Function ( " + self.replacementType + " ) only accepts a batch of offspring, "
+                            "use applyBatchReplacement")
+
+        # PENALISE CHILDREN THAT ARE ALREADY IN THE POPULATION BEFORE THE STRATEGY COMPARES OR INSERTS THEM
+        if self.duplicatePolicy == 'penalise':
+            child1Fitness, child2Fitness = self.childrenFitness(child1, child2, child1Fitness, child2Fitness)
+            child1Fitness = self.penalisedFitness(population, child1, child1Fitness)
+            child2Fitness = self.penalisedFitness(population, child2, child2Fitness)
+
+        return self.replacementTypeDict[self.replacementType](population, child1, child2, child1Fitness, child2Fitness)
+
+    # DEFINE THE METHOD THAT EVALUATES A TOUR (OR A MATRIX OF TOURS), THROUGH THE FITNESS CACHE IF THERE IS ONE
+    def evaluate(self, tours):
+        if self.fitnessCache is not None:
+            return self.fitnessCache.evaluate(tours)
+        return jitKernels.tourCost(self.adj_mat, tours)
+
+    # DEFINE THE METHOD THAT INSERTS A CHILD INTO A SLOT, UNLESS IT IS A DUPLICATE THAT THE POLICY REJECTS
+    def insertChild(self, population, index, child, childFitness):
+        if self.duplicatePolicy == 'reject' and population.contains(child):
+            return
+        population.replace(index, child, childFitness)
+
+    # DEFINE THE METHOD THAT RETURNS THE FITNESS A CHILD IS INSERTED WITH UNDER THE 'penalise' POLICY
+    def penalisedFitness(self, population, child, childFitness):
+        if population.contains(child):
+            return childFitness * (1 + self.duplicatePenalty)
+        return childFitness
+
+    # DEFINE THE METHOD THAT EVALUATES ONLY THE CHILDREN WHOSE FITNESS IS NOT ALREADY KNOWN
+    def childrenFitness(self, child1, child2, child1Fitness=None, child2Fitness=None):
+        if child1Fitness is None and child2Fitness is None:
+            return self.evaluate(np.array([child1, child2]))
+        if child1Fitness is None:
+            child1Fitness = self.evaluate(child1)
+        if child2Fitness is None:
+            child2Fitness = self.evaluate(child2)
+        return child1Fitness, child2Fitness
+
+    def applyBatchReplacement(self, population, offspring, offspringFitness):
+        """
+        Apply the chosen survivor selection to a whole generation of offspring
+        :param population: The Population before replacement
+        :param offspring: A (λ x n) matrix of offspring tours
+        :param offspringFitness: The fitness of each offspring tour
+        :return: newPopulation - A Population object holding the tour matrix and fitness vector
+        """
+        if self.replacementType not in self.batchReplacementTypeDict:
+            raise Exception("Invalid Batch Replacement Function ( " + self.replacementType + " ).\n Valid options are ",
+                            [key for key in self.batchReplacementTypeDict])
+        return self.batchReplacementTypeDict[self.replacementType](population, offspring, offspringFitness)
+
+    # DEFINE THE METHODS THAT SAVE AND RESTORE THE STATE THE STRATEGY KEEPS BETWEEN GENERATIONS
+    def getState(self):
+        return {'FIFOindex': self.FIFOindex, 'RNG': self.RNG.bit_generator.state}
+
+    def setState(self, state):
+        self.FIFOindex = state['FIFOindex']
+        self.RNG.bit_generator.state = state['RNG']
+
+    # DEFINE THE METHOD THAT RETURNS THE POPULATION THAT A STRATEGY SHOULD WRITE ITS RESULT INTO
+    def prepareNewPopulation(self, population):
+        # IN PLACE MODE WRITES STRAIGHT INTO population, OTHERWISE THE OLD POPULATION IS LEFT UNTOUCHED
+        if self.inPlace:
+            return population
+        return population.copy()
 
     # DEFINE THE METHOD TO IMPLEMENT FIFO AGE BASED REPLACEMENT
-    def fifo(self,population, child1, child2):
+    def fifo(self, population, child1, child2, child1Fitness=None, child2Fitness=None):
         """
         This algorithm randomly selects one of the children and replaces one of the original members of the population in
         a first in first out (FIFO) manner
 
-        :param population: The initial Population before replacement. It is a 2D Array that takes the form
-                                array[array[FitnessScore], array[TourVector]]
+        :param population: The initial Population before replacement (a Population object holding the tour matrix
+                                and fitness vector)
         :param child1: First Offspring generated by Crossover and Mutation Stages
         :param child2: Second Offspring generated by Crossover and Mutation Stages
-        :return: newPopulation - A 2D Array that takes the form array[array[FitnessScore], array[TourVector]]
+        :param child1Fitness: The fitness of child1 if it is already known, otherwise None
+        :param child2Fitness: The fitness of child2 if it is already known, otherwise None
+        :return: newPopulation - A Population object holding the tour matrix and fitness vector
         """
-        # COPY CONTENTS OF OLD POPULATION TO NEW POPULATION
-        newPopulation = copy.deepcopy(population)
+        # COPY CONTENTS OF OLD POPULATION TO NEW POPULATION (UNLESS REPLACING IN PLACE)
+        newPopulation = self.prepareNewPopulation(population)
         # RANDOMLY SELECT ONE OF THE OFFSPRING
-        candidateChild = self.RNG.choice([child1,child2])
+        candidateChildIndex = self.RNG.choice(2)
+        candidateChild = [child1, child2][candidateChildIndex]
 
-        # CALCULATE FITNESS FUNCTION OF THIS CHILD
-        candidateChildFitness = cost(self.adj_mat,candidateChild,len(self.adj_mat))
+        # CALCULATE FITNESS FUNCTION OF THIS CHILD (UNLESS IT IS ALREADY KNOWN)
+        candidateChildFitness = [child1Fitness, child2Fitness][candidateChildIndex]
+        if candidateChildFitness is None:
+            candidateChildFitness = self.evaluate(candidateChild)
 
 
         # REPLACE THE FIFOindex -th POPULATION MEMBER WITH candidateChild
-        newPopulation[0][self.FIFOindex] = candidateChildFitness
-        newPopulation[1][self.FIFOindex] = candidateChild
+        self.insertChild(newPopulation, self.FIFOindex, candidateChild, candidateChildFitness)
 
         # CHECK TO VERIFY THAT FIFOindex HAS NOT REACHED population_size, IF SO THEN REINITIALISE IT
-        if self.FIFOindex == len(population[0])-1:
+        if self.FIFOindex == len(population)-1:
             self.FIFOindex = 0
         else:
             self.FIFOindex += 1
 
-        return self.FIFOindex, newPopulation
+        return newPopulation
 
     # DEFINE THE METHOD THAT IMPLEMENTS A SINGLE GENERATION AGE BASED RANDOM REPLACEMENT
-    def random(self,population,child1,child2):
+    def random(self, population, child1, child2, child1Fitness=None, child2Fitness=None):
         """
         For this algorithm, two members of the initial population are to be randomly selected for replacement by the
         respective two children
 
-        :param population: The initial Population before replacement. It is a 2D Array that takes the form
-                                array[array[FitnessScore], array[TourVector]]
+        :param population: The initial Population before replacement (a Population object holding the tour matrix
+                                and fitness vector)
         :param child1: First Offspring generated by Crossover and Mutation Stages
         :param child2: Second Offspring generated by Crossover and Mutation Stages
-        :return: newPopulation - A 2D Array that takes the form array[array[FitnessScore], array[TourVector]]
+        :param child1Fitness: The fitness of child1 if it is already known, otherwise None
+        :param child2Fitness: The fitness of child2 if it is already known, otherwise None
+        :return: newPopulation - A Population object holding the tour matrix and fitness vector
         """
-        # COPY CONTENTS OF OLD POPULATION TO NEW POPULATION
-        newPopulation = copy.deepcopy(population)
+        # COPY CONTENTS OF OLD POPULATION TO NEW POPULATION (UNLESS REPLACING IN PLACE)
+        newPopulation = self.prepareNewPopulation(population)
 
         # CALCULATE FITNESS FUNCTION OF THE TWO CHILDREN
-        child1Fitness = cost(self.adj_mat,child1,len(self.adj_mat))
-        child2Fitness = cost(self.adj_mat,child2,len(self.adj_mat))
+        child1Fitness, child2Fitness = self.childrenFitness(child1, child2, child1Fitness, child2Fitness)
 
         # RANDOMLY SELECT TWO PARENTS IN population TO BE REPLACED BY THE OFFSPRING
-        replacementIndices = self.RNG.choice(len(population[0]), 2, replace=False)
+        replacementIndices = self.RNG.choice(len(population), 2, replace=False)
 
         # SET EACH CHILD TO BE THE VALUES FOR THE INDICES IN replacementIndices WITHIN population
-        newPopulation[0][replacementIndices[0]] = child1Fitness
-        newPopulation[1][replacementIndices[0]] = child1
-
-        newPopulation[0][replacementIndices[1]] = child2Fitness
-        newPopulation[1][replacementIndices[1]] = child2
+        self.insertChild(newPopulation, replacementIndices[0], child1, child1Fitness)
+        self.insertChild(newPopulation, replacementIndices[1], child2, child2Fitness)
 
         return newPopulation
 
     # DEFINE THE METHOD THAT IMPLEMENTS THE FITNESS BASED replaceWorst REPLACEMENT STRATEGY
-    def replaceWorst(self,population, child1, child2):
+    def replaceWorst(self, population, child1, child2, child1Fitness=None, child2Fitness=None):
         """
         Here, this algorithm selects the worst two performing populations members and replaces them with the offspring set
-        :param population: The initial Population before replacement. It is a 2D Array that takes the form
-                                array[array[FitnessScore], array[TourVector]]
+        :param population: The initial Population before replacement (a Population object holding the tour matrix
+                                and fitness vector)
         :param child1: First Offspring generated by Crossover and Mutation Stages
         :param child2: Second Offspring generated by Crossover and Mutation Stages
-        :return: newPopulation - A 2D Array that takes the form array[array[FitnessScore], array[TourVector]]
+        :param child1Fitness: The fitness of child1 if it is already known, otherwise None
+        :param child2Fitness: The fitness of child2 if it is already known, otherwise None
+        :return: newPopulation - A Population object holding the tour matrix and fitness vector
         """
-        # COPY CONTENTS OF OLD POPULATION TO NEW POPULATION
-        newPopulation = copy.deepcopy(population)
+        # COPY CONTENTS OF OLD POPULATION TO NEW POPULATION (UNLESS REPLACING IN PLACE)
+        newPopulation = self.prepareNewPopulation(population)
 
-        # SORT ELEMENTS OF POPULATION BASED ON FITNESS AND SELECT LAST TWO ELEMENTS
-        replacementCandidates = np.array([np.unique(newPopulation[0])[-1], np.unique(newPopulation[0])[-2]])
-        # we are selecting last two elements as they have the worst fitness (highest score)
-
-        # FIND THE CORRESPONDING INDICES FOR THESE FITNESS ELEMENTS
+        # QUERY THE POPULATION'S FITNESS INDEX FOR THE TWO MEMBERS WITH THE WORST FITNESS (HIGHEST SCORE)
         # IF THERE ARE MORE THAN ONE INDEX WITH THE SAME RESP. FITNESS, TAKE THE FIRST ONE (WLOG)
-        replacementCandidate1 = np.argwhere(newPopulation[0]==replacementCandidates[0]).flatten()[0]
-        replacementCandidate2 = np.argwhere(newPopulation[0]==replacementCandidates[1]).flatten()[0]
-        # given np.argwhere() returns an ndarray, we are flattening it and taken the resultant first element
+        replacementCandidate1, replacementCandidate2 = newPopulation.worstIndices(2)
 
         # SET THE VALUES OF replacementCandidate INDICES IN POPULATION TO BE THE OFFSPRING
-        newPopulation[0][replacementCandidate1] = cost(self.adj_mat,child1, len(child1))
-        newPopulation[0][replacementCandidate2] = cost(self.adj_mat, child2, len(child2)) # Find fitnesses of Children
-
-        newPopulation[1][replacementCandidate1] = child1
-        newPopulation[1][replacementCandidate2] = child2
+        child1Fitness, child2Fitness = self.childrenFitness(child1, child2, child1Fitness, child2Fitness) # Find fitnesses of Children
+        self.insertChild(newPopulation, replacementCandidate1, child1, child1Fitness)
+        self.insertChild(newPopulation, replacementCandidate2, child2, child2Fitness)
 
         return newPopulation
 
     # DEFINE THE METHOD THAT IMPLEMENTS THE FITNESS BASED elitism REPLACEMENT STRATEGY
-    def elitism(self,population, child1, child2):
+    def elitism(self, population, child1, child2, child1Fitness=None, child2Fitness=None):
         """
         A METHOD THAT IMPLEMENTS THE FITNESS BASED elitism REPLACEMENT STRATEGY.
         This scheme is commonly used in conjunction with age-based
@@ -152,36 +244,32 @@ class Replacement:
         into the population has equal or better fitness, then it is kept and one of the
         offspring is discarded. (Eiben and Smith, 2015)
 
-        :param population: The initial Population before replacement. It is a 2D Array that takes the form
-                                array[array[FitnessScore], array[TourVector]]
+        :param population: The initial Population before replacement (a Population object holding the tour matrix
+                                and fitness vector)
         :param child1: First Offspring generated by Crossover and Mutation Stages
         :param child2: Second Offspring generated by Crossover and Mutation Stages
-        :return: newPopulation - A 2D Array that takes the form array[array[FitnessScore], array[TourVector]]
+        :param child1Fitness: The fitness of child1 if it is already known, otherwise None
+        :param child2Fitness: The fitness of child2 if it is already known, otherwise None
+        :return: newPopulation - A Population object holding the tour matrix and fitness vector
         """
-        # COPY CONTENTS OF OLD POPULATION TO NEW POPULATION
-        newPopulation = copy.deepcopy(population)
+        # COPY CONTENTS OF OLD POPULATION TO NEW POPULATION (UNLESS REPLACING IN PLACE)
+        newPopulation = self.prepareNewPopulation(population)
 
-        # FIND THE INDEX OF THE POPULATION MEMBER WITH THE BEST FITNESS
-        bestParents = list(np.where(newPopulation[0] == (np.min(newPopulation[0])))[
-                                      0])  # find and return all instances with the lowest fitness
-        # Note we also have to add list(...[0]) syntax as np.where returns a tuple of (array[], any) in this case
+        # FIND THE BEST FITNESS FROM THE POPULATION'S FITNESS INDEX AND EVERY MEMBER THAT HAS IT
+        bestParents = np.flatnonzero(newPopulation.fitness == newPopulation.fitness[newPopulation.argmin()])
 
         # IF THERE ARE MORE THAN 1 CHROMOSOME WITH THE BEST FITNESS, THEN RANDOMLY SELECT ONE OF THEM
         selectedBestParentIndex = self.RNG.choice(bestParents)
-        selectedBestParent = population[1][selectedBestParentIndex]
 
         # APPLY PARTS OF THE random REPLACEMENT ALGORITHM TO FIND THE INDICES TO REPLACE
         # CALCULATE FITNESS FUNCTION OF THE TWO CHILDREN
-        child1Fitness = cost(self.adj_mat, child1, len(self.adj_mat))
-        child2Fitness = cost(self.adj_mat, child2, len(self.adj_mat))
+        child1Fitness, child2Fitness = self.childrenFitness(child1, child2, child1Fitness, child2Fitness)
 
-        # CREATE A POPULATION MATRIX OF JUST THE OFFSPRING
-        offspringPopulation = np.zeros((2, len(population)), dtype=object)
-        offspringPopulation[0][0], offspringPopulation[0][1] = child1Fitness, child2Fitness
-        offspringPopulation[1][0], offspringPopulation[1][1] = child1, child2
+        # CREATE A POPULATION OF JUST THE OFFSPRING
+        offspringPopulation = Population(np.array([child1, child2]), [child1Fitness, child2Fitness])
 
         # RANDOMLY SELECT TWO PARENTS IN population TO BE REPLACED BY THE OFFSPRING
-        replacementIndices = self.RNG.choice(len(population[0]), 2, replace=False)
+        replacementIndices = self.RNG.choice(len(population), 2, replace=False)
 
 
         # CHECK THAT IF selectedBestParent IS CHOSEN THEN IT ISNT REPLACED UNLESS ONE OF THE CHILDREN HAS A BETTER FITNESS
@@ -189,43 +277,40 @@ class Replacement:
             # DEDUCE THE OTHER REPLACEMENT INDEX
             notSelectedBestParentIndex = replacementIndices[replacementIndices != selectedBestParentIndex].item()
 
-            # DEDUCE THE BEST OFFSPRING OUT OF THE TWO CHILDREN
-            bestOffspringindex = list(np.where(offspringPopulation[0] == (np.min(offspringPopulation[0])))[0])[0]
-            bestOffspringFitness = offspringPopulation[0][bestOffspringindex]
-            bestOffspring = offspringPopulation[1][bestOffspringindex]
+            # DEDUCE THE BEST OFFSPRING OUT OF THE TWO CHILDREN (THE FIRST ONE IF THEY HAVE THE SAME FITNESS)
+            bestOffspringindex = offspringPopulation.argmin()
+            bestOffspringFitness = offspringPopulation.fitness[bestOffspringindex]
+            bestOffspring = offspringPopulation.tours[bestOffspringindex]
 
             # CHECK THAT THE BEST FIT OFFSPRING IS OR ISNT BETTER THAN selectedBestParent
-            if population[0][selectedBestParentIndex] >= bestOffspringFitness:
-                newPopulation[0][selectedBestParentIndex] = bestOffspringFitness # Replace bestParent with bestOffspring
-                newPopulation[1][selectedBestParentIndex] = bestOffspring
+            if population.fitness[selectedBestParentIndex] >= bestOffspringFitness:
+                # Replace bestParent with bestOffspring
+                self.insertChild(newPopulation, selectedBestParentIndex, bestOffspring, bestOffspringFitness)
 
                 # REPLACE THE OTHER PARENT WITH THE OTHER OFFSPRING (THE WORSE ONE)
-                notBestOffspringFitness = np.delete(offspringPopulation[0], bestOffspringindex).item()
-                notBestOffspring = np.delete(offspringPopulation[1], bestOffspringindex).item()
-
-                newPopulation[0][notSelectedBestParentIndex] = notBestOffspringFitness
-                newPopulation[1][notSelectedBestParentIndex] = notBestOffspring
+                notBestOffspringindex = 1 - bestOffspringindex
+                self.insertChild(newPopulation, notSelectedBestParentIndex,
+                                 offspringPopulation.tours[notBestOffspringindex],
+                                 offspringPopulation.fitness[notBestOffspringindex])
                 return newPopulation
 
             # DISCARD RANDOMLY ONE OF THE OFFSPRING
             randomOffSpringIndex = self.RNG.choice(2) # 2 is chosen given that there are only 2 offspring
 
-            newPopulation[0][notSelectedBestParentIndex] = offspringPopulation[0][randomOffSpringIndex]
-            newPopulation[1][notSelectedBestParentIndex] = offspringPopulation[1][randomOffSpringIndex]
+            self.insertChild(newPopulation, notSelectedBestParentIndex,
+                             offspringPopulation.tours[randomOffSpringIndex],
+                             offspringPopulation.fitness[randomOffSpringIndex])
             return  newPopulation
 
         # OTHERWISE RETURN THE SAME newPopulation AS IN THE random ALGORITHM CASE
         # SET EACH CHILD TO BE THE VALUES FOR THE INDICES IN replacementIndices WITHIN population
-        newPopulation[0][replacementIndices[0]] = child1Fitness
-        newPopulation[1][replacementIndices[0]] = child1
-
-        newPopulation[0][replacementIndices[1]] = child2Fitness
-        newPopulation[1][replacementIndices[1]] = child2
+        self.insertChild(newPopulation, replacementIndices[0], child1, child1Fitness)
+        self.insertChild(newPopulation, replacementIndices[1], child2, child2Fitness)
 
         return newPopulation
 
     # DEFINE A METHOD THAT IMPLEMENTS THE ROUND ROBIN FITNESS BASED REPLACEMENT ALGORITHM
-    def roundRobin(self,population, child1, child2, roundRobinSize=10):
+    def roundRobin(self, population, child1, child2, child1Fitness=None, child2Fitness=None):
         """
         The method works by holding pairwise tournament competitions in round-robin format,
         where each individual is evaluated against q others randomly chosen from the merged parent and offspring populations.
@@ -236,80 +321,55 @@ class Replacement:
         :param population:
         :param child1: First Offspring generated by Crossover and Mutation Stages
         :param child2: Second Offspring generated by Crossover and Mutation Stages
-        :param roundRobinSize: The size of the round-robin tournament generated
-        :return: newPopulation - A 2D Array that takes the form array[array[FitnessScore], array[TourVector]]
+        :param child1Fitness: The fitness of child1 if it is already known, otherwise None
+        :param child2Fitness: The fitness of child2 if it is already known, otherwise None
+        :return: newPopulation - A Population object holding the tour matrix and fitness vector
         """
-        # APPLY AN INITIAL CHECK TO MAKE SURE THAT roundRobinSize IS < len(population)
-        if roundRobinSize > len(population):
-            Exception('Size of Round Robin Tournament ', roundRobinSize, ' is not less than or equal to the population, '
-                      , len(population))
-        # INITIALISE A NEW POPULATION ARRAY
-        newPopulation = copy.deepcopy(population)
+        roundRobinSize = self.roundRobinSize
+
+        # APPLY AN INITIAL CHECK TO MAKE SURE THAT roundRobinSize IS <= THE SIZE OF THE MERGED POOL
+        if roundRobinSize > len(population) + 2:
+            raise Exception('Size of Round Robin Tournament ', roundRobinSize,
+                            ' is not less than or equal to the population and offspring, ', len(population) + 2)
+        # INITIALISE A NEW POPULATION ARRAY (UNLESS REPLACING IN PLACE)
+        newPopulation = self.prepareNewPopulation(population)
 
         # GENERATE THE ROUND ROBIN TOURNAMENT
 
         ## COMBINE population AND OFFSPRING INTO A TOTAL POOL
-        populationAndOffspring = copy.deepcopy(population).tolist()
-
         ### CALCULATE FITNESS FUNCTION OF THE TWO CHILDREN
-        child1Fitness = cost(self.adj_mat, child1, len(self.adj_mat))
-        child2Fitness = cost(self.adj_mat, child2, len(self.adj_mat))
-
         children = np.array([child1, child2])
-        childrenFitness = np.array([child1Fitness,child2Fitness])
-        for i in range(2):
-            populationAndOffspring[1].append(children[i])
-            populationAndOffspring[0].append(childrenFitness[i])
+        childrenFitness = np.array(self.childrenFitness(child1, child2, child1Fitness, child2Fitness), dtype=np.float64)
 
+        populationAndOffspringTours = np.concatenate([population.tours, children], axis=0)
+        populationAndOffspringFitness = np.concatenate([population.fitness, childrenFitness])
 
         ## SELECT AT RANDOM roundRobinSize NUMBER OF TOURNAMENT PLAYERS
-        tournamentindices = self.RNG.choice(len(populationAndOffspring[0]),roundRobinSize,replace=False)
-        tournament = np.zeros((3, roundRobinSize), dtype=object) # There is a 3rd column to count number of wins each
-        # player has
-        for i in range(roundRobinSize):
-            tournament[1][i] = populationAndOffspring[1][tournamentindices[i]]
-            tournament[0][i] = populationAndOffspring[0][tournamentindices[i]]
+        tournamentindices = self.RNG.choice(len(populationAndOffspringFitness),roundRobinSize,replace=False)
+        tournamentFitness = populationAndOffspringFitness[tournamentindices]
+
         # HOLD THE ROUND ROBIN TOURNAMENT COMPARING EACH i AND j IN THE tournament ARRAY
-        for i in range(roundRobinSize):
-            for j in range(roundRobinSize):
-                if tournament[0][i] < tournament[0][j]:
-                    tournament[2][i] += 1 # Add 1 to Tournament score for ith element if it is lower than jth element
-
-        # APPLY SIMILAR SUB ALGORITHM TO replaceWorst IN ORDER TO FIND THE population
-
-        # SORT ELEMENTS OF tournament BASED ON TOURNAMENT SCORE AND SELECT LAST len(population) ELEMENTS
-        tournamentVictorsSorted = np.array([np.sort(tournament[2])[-(i+1)] for i in range(len(tournament[2]+1))])
-        # we are selecting last len(population) elements as they have the highest tournament scores
-        # we are also using 1 indexing for the for loop list comprehension
-
-        # FIND THE CORRESPONDING INDICES FOR THESE TOURNAMENT SCORE ELEMENTS
-        # IF THERE ARE MORE THAN ONE INDEX WITH THE SAME RESP. TOURNAMENT SCORE, TAKE THE FIRST ONE (WLOG)
-
-        tournamentVictorsIndices = []
-        duplicateCounter = 0
-        for i in range(len(tournamentVictorsSorted)):
-            placeholder = np.argwhere(tournament[2] == tournamentVictorsSorted[i]).flatten()
-            if len(placeholder) == 1:
-                tournamentVictorsIndices.append(placeholder[0])
-            else:
-                tournamentVictorsIndices.append(placeholder[duplicateCounter])
-                if duplicateCounter == len(placeholder) - 1:
-                    duplicateCounter = 0
-                else:
-                    duplicateCounter += 1
+        # (a win is added to the ith player for every jth player with a higher fitness)
+        tournamentWins = np.sum(tournamentFitness[:, None] < tournamentFitness[None, :], axis=1)
 
-        # given np.argwhere() returns an ndarray, we are flattening it and taken the resultant first element
+        # SORT THE TOURNAMENT PLAYERS FROM MOST TO FEWEST WINS
+        # IF THERE ARE MORE THAN ONE PLAYER WITH THE SAME NUMBER OF WINS, KEEP THEIR ORIGINAL ORDER (WLOG)
+        tournamentVictorsIndices = tournamentindices[np.argsort(-tournamentWins, kind='stable')]
 
         # ADD THE RESULTANT VALUES FOR THE TOURNAMENT VICTORS TO newPopulation
-        for i in range(len(tournamentVictorsIndices)):
-            newPopulation[0][i] = tournament[0][tournamentVictorsIndices[i]]
-            newPopulation[1][i] = tournament[1][tournamentVictorsIndices[i]]
-        print('New Population: ', newPopulation)
+        # (ONLY VICTORS THAT ARE OFFSPRING ARE SUBJECT TO THE DUPLICATE POLICY, PARENTS ARE ALREADY MEMBERS)
+        for i in range(roundRobinSize):
+            if tournamentVictorsIndices[i] >= len(population):
+                self.insertChild(newPopulation, i, populationAndOffspringTours[tournamentVictorsIndices[i]],
+                                 populationAndOffspringFitness[tournamentVictorsIndices[i]])
+            else:
+                newPopulation.replace(i, populationAndOffspringTours[tournamentVictorsIndices[i]],
+                                      populationAndOffspringFitness[tournamentVictorsIndices[i]])
 
         return newPopulation
 
     # DEFINE THE METHOD THAT IMPLEMENTS THE muPlusLambda ALGORITHM
-    def muPlusLambda(self,population, child1, child2):
+    def muPlusLambda(self, population, child1, child2, child1Fitness=None, child2Fitness=None):
         """
         " In general [the mu + lambda algortihm], it refers to the case where the
         set of offspring and parents are merged and ranked according to (estimated)
@@ -318,53 +378,95 @@ class Replacement:
         :param population:
         :param child1: First Offspring generated by Crossover and Mutation Stages
         :param child2: Second Offspring generated by Crossover and Mutation Stages
-        :return: newPopulation - A 2D Array that takes the form array[array[FitnessScore], array[TourVector]]
+        :param child1Fitness: The fitness of child1 if it is already known, otherwise None
+        :param child2Fitness: The fitness of child2 if it is already known, otherwise None
+        :return: newPopulation - A Population object holding the tour matrix and fitness vector
         """
-        # COPY CONTENTS OF OLD POPULATION TO NEW POPULATION
-        newPopulation = copy.deepcopy(population)
-
-        # MERGE OFFSPRING AND INITIAL POPULATION
-        populationAndOffspring = copy.deepcopy(population).tolist()
-
-        ## CALCULATE FITNESS FUNCTION OF THE TWO CHILDREN
-        child1Fitness = cost(self.adj_mat, child1, len(self.adj_mat))
-        child2Fitness = cost(self.adj_mat, child2, len(self.adj_mat))
-
-        children = [child1, child2]
-        childrenFitness = [child1Fitness, child2Fitness]
-
-        for i in range(2):
-            populationAndOffspring[1].append(children[i])
-            populationAndOffspring[0].append(childrenFitness[i])
-
+        # CALCULATE FITNESS FUNCTION OF THE TWO CHILDREN
+        children = np.array([child1, child2])
+        childrenFitness = np.array(self.childrenFitness(child1, child2, child1Fitness, child2Fitness), dtype=np.float64)
+
+        # ONLY THE len(children) WORST PARENTS CAN BE PUSHED OUT OF THE TOP μ OF THE MERGED POOL, SO MERGE THE
+        # OFFSPRING WITH JUST THOSE PARENTS (FOUND FROM THE POPULATION'S FITNESS INDEX) RATHER THAN THE WHOLE POPULATION
+        worstParents = population.worstIndices(len(children))
+        candidateFitness = np.concatenate([population.fitness[worstParents], childrenFitness])
+
+        # ORDER THESE CANDIDATES BASED ON THEIR FITNESS (BEST TO WORST), THE LAST len(children) ARE DISCARDED
+        # IF THERE ARE MORE THAN ONE MEMBER WITH THE SAME FITNESS, THE PARENT IS KEPT (WLOG)
+        rankedCandidates = np.argsort(candidateFitness, kind='stable')
+        keptCandidates = rankedCandidates[:len(worstParents)]
+        discardedCandidates = rankedCandidates[len(worstParents):]
+        survivingOffspring = keptCandidates[keptCandidates >= len(worstParents)] - len(worstParents)
+        discardedParents = worstParents[discardedCandidates[discardedCandidates < len(worstParents)]]
+
+        # EVERY OFFSPRING THAT MADE THE CUT TAKES THE SLOT OF ONE PARENT THAT DID NOT (THE REST ARE UNCHANGED)
+        newPopulation = self.prepareNewPopulation(population)
+        for parentIndex, offspringIndex in zip(discardedParents, survivingOffspring):
+            self.insertChild(newPopulation, parentIndex, children[offspringIndex], childrenFitness[offspringIndex])
 
-        # ORDER THIS MERGED POPULATION BASED ON THEIR FITNESS (BEST TO WORST)
-        # SORT ELEMENTS OF tournament BASED ON TOURNAMENT SCORE AND SELECT LAST len(population) ELEMENTS
-        populationAndOffspringSorted = np.array([np.sort(populationAndOffspring[0])[i]
-                                                 for i in range(len(populationAndOffspring[1]))])
-        # we are selecting last len(population) elements as they have the highest tournament scores
+        return newPopulation
 
-        # SET newPopulation TO BE THE BEST (population_size) NUMBER OF MEMBERS
+    # DEFINE THE METHOD THAT IMPLEMENTS THE muPlusLambda ALGORITHM FOR A WHOLE GENERATION OF OFFSPRING
+    def batchMuPlusLambda(self, population, offspring, offspringFitness):
+        """
+        The generational form of muPlusLambda: the λ offspring and μ parents are merged and the best μ are kept.
+        The top μ are found with a single partial sort (np.argpartition) over the merged fitness vector
+        :param population: The Population of μ parents
+        :param offspring: A (λ x n) matrix of offspring tours
+        :param offspringFitness: The fitness of each offspring tour
+        :return: newPopulation - A Population object holding the tour matrix and fitness vector
+        """
+        populationAndOffspringTours = np.concatenate([population.tours, offspring], axis=0)
+        populationAndOffspringFitness = np.concatenate([population.fitness, offspringFitness])
+        return self.keepBest(population, populationAndOffspringTours, populationAndOffspringFitness,
+                             offspringStart=len(population))
 
-        ## FIND THE CORRESPONDING INDICES FOR THESE TOURNAMENT SCORE ELEMENTS
-        ### IF THERE ARE MORE THAN ONE INDEX WITH THE SAME RESP. TOURNAMENT SCORE, TAKE THE FIRST ONE (WLOG)
-        bestPopulationAndOffspringIndices = []
-        duplicateCounter = 0
-        for i in range(len(population[0])):
-            placeholder = np.argwhere(populationAndOffspring[0] == populationAndOffspringSorted[i]).flatten()
-            if len(placeholder) == 1:
-                bestPopulationAndOffspringIndices.append(placeholder[0])
+    # DEFINE THE METHOD THAT IMPLEMENTS THE muCommaLambda ALGORITHM FOR A WHOLE GENERATION OF OFFSPRING
+    def batchMuCommaLambda(self, population, offspring, offspringFitness):
+        """
+        " ... the selection takes place among the λ offspring only, that is, the parents are discarded no matter how good
+        their fitness is " - (Eiben et al., 2015). This needs λ >= μ
+        :param population: The Population of μ parents
+        :param offspring: A (λ x n) matrix of offspring tours
+        :param offspringFitness: The fitness of each offspring tour
+        :return: newPopulation - A Population object holding the tour matrix and fitness vector
+        """
+        if len(offspring) < len(population):
+            raise Exception('(mu, lambda) selection needs at least as many offspring as parents, got ',
+                            len(offspring), len(population))
+        return self.keepBest(population, np.asarray(offspring), np.asarray(offspringFitness, dtype=np.float64),
+                             offspringStart=0)
+
+    # DEFINE THE METHOD THAT KEEPS THE len(population) BEST MEMBERS OF A POOL OF CANDIDATES
+    def keepBest(self, population, candidateTours, candidateFitness, offspringStart=0):
+        """
+        :param offspringStart: The index of the first offspring among the candidates (the ones before it are parents)
+        """
+        rankingFitness = candidateFitness
+        if self.duplicatePolicy is not None:
+            # AN OFFSPRING IS A DUPLICATE IF THE SAME TOUR APPEARS EARLIER IN THE POOL (PARENTS COME FIRST)
+            seenTours = set()
+            duplicates = np.zeros(len(candidateTours), dtype=bool)
+            for i, canonicalTour in enumerate(canonicalTours(candidateTours, population.symmetric)):
+                key = canonicalTour.tobytes()
+                duplicates[i] = i >= offspringStart and key in seenTours
+                seenTours.add(key)
+
+            if self.duplicatePolicy == 'penalise':
+                candidateFitness = np.where(duplicates, candidateFitness * (1 + self.duplicatePenalty), candidateFitness)
+                rankingFitness = candidateFitness
             else:
-                bestPopulationAndOffspringIndices.append(placeholder[duplicateCounter])
-                if duplicateCounter == len(placeholder) - 1:
-                    duplicateCounter = 0
-                else:
-                    duplicateCounter += 1
-        # given np.argwhere() returns an ndarray, we are flattening it and taken the resultant first element
+                # REJECTED DUPLICATES ARE RANKED LAST, SO THEY ARE ONLY KEPT IF THERE ARE TOO FEW OTHER CANDIDATES
+                rankingFitness = np.where(duplicates, np.inf, candidateFitness)
 
-        # ADD THE RESULTANT VALUES FOR THE TOURNAMENT VICTORS TO newPopulation
-        for i in range(len(bestPopulationAndOffspringIndices)):
-            newPopulation[0][i] = populationAndOffspring[0][bestPopulationAndOffspringIndices[i]]
-            newPopulation[1][i] = populationAndOffspring[1][bestPopulationAndOffspringIndices[i]]
+        # PARTIALLY SORT THE CANDIDATES SO THAT THE BEST len(population) COME FIRST (THEIR ORDER IS NOT NEEDED)
+        if len(candidateFitness) > len(population):
+            bestCandidates = np.argpartition(rankingFitness, len(population) - 1)[:len(population)]
+        else:
+            bestCandidates = np.arange(len(candidateFitness))
 
-        return newPopulation
\ No newline at end of file
+        if self.inPlace:
+            population.assign(candidateTours[bestCandidates], candidateFitness[bestCandidates])
+            return population
+        return Population(candidateTours[bestCandidates], candidateFitness[bestCandidates],
+                          population.trackDuplicates, population.symmetric)
@@ -1,24 +1,90 @@
+import json
+import os
 import numpy as np
-import copy
+from time import perf_counter
 from costFunction import *
 from Algorithm.adj_mat import *
 from Algorithm.CrossoverOperator import *
 from Algorithm.MutationOperator import *
+from Algorithm.Population import *
 from Algorithm.Replacement import *
+from Algorithm.LocalSearch import *
+from Algorithm.FitnessCache import *
+from Algorithm.Instrumentation import *
+from Algorithm import jitKernels
+from TSPtoADJ import TSPInstance
 
 class EA:
     # INITIALISE ALGORITHM CONSTRUCTOR
-    def __init__(self, TSP, populationSize, tournamentSize, mutationType='singleSwap', crossoverType='orderedCrossover', RNG_Seed=42,replacementType = 'FIFO', terminationCriterion=10000):
+    def __init__(self, TSP, populationSize, tournamentSize, mutationType='singleSwap', crossoverType='orderedCrossover', RNG_Seed=42,replacementType = 'FIFO', terminationCriterion=10000,
+                 evolutionMode='steadyState', offspringSize=None,
+                 localSearch=None, localSearchBudget=1000, neighbourCount=8,
+                 checkpointFile=None, checkpointInterval=1000, fitnessCacheSize=None,
+                 duplicatePolicy=None, duplicatePenalty=0.05, restartDiversity=None, restartElite=1,
+                 instrumentation=None):
+        """
+        :param evolutionMode: 'steadyState' (two children per generation inserted with replacementType),
+                              'muPlusLambda' or 'muCommaLambda' (offspringSize children per generation, produced and
+                              evaluated in batch, with survivors chosen from parents + offspring or offspring only)
+        :param offspringSize: λ, the number of children per generation in the generational modes
+                              (defaults to populationSize)
+        :param localSearch: None (no local search), 'offspring' (2-opt/Or-opt applied to every generation's children
+                            before replacement) or 'elite' (applied to the best member after replacement)
+        :param localSearchBudget: The number of candidate local search moves evaluated per generation
+        :param neighbourCount: The length of the nearest neighbour candidate lists used by the local search
+        :param checkpointFile: If given, the state of the run is saved to this .npz file every checkpointInterval
+                               generations, and resume() continues the run from it
+        :param checkpointInterval: The number of generations between checkpoints
+        :param fitnessCacheSize: If given, every tour is evaluated through a FitnessCache holding up to this many
+                                 recently seen tours, so tours that reappear are not re-evaluated
+        :param duplicatePolicy: None, 'reject' (a child that is already in the population is not inserted) or
+                                'penalise' (it is inserted with its fitness worsened by duplicatePenalty), see Replacement
+        :param duplicatePenalty: The relative fitness penalty of a duplicate child under the 'penalise' policy
+        :param restartDiversity: If given, whenever the share of distinct tours in the population falls below this
+                                 value every member except the restartElite best is replaced by a random tour
+        :param restartElite: The number of best members kept by a diversity restart
+        :param instrumentation: None (off), True or an Instrumentation (e.g. with a callback or a cProfile file) that
+                                records the time and calls of every stage of the run, see getInstrumentation
+        """
 
         self.TSP = TSP
+
+        # PARSE THE TSP INSTANCE ONCE SO THAT EVERY GENERATION SHARES THE SAME DISTANCE MATRIX
+        self.instance = TSP if isinstance(TSP, TSPInstance) else TSPInstance(TSP)
         self.populationSize = populationSize
+
+        # STORE EVERY TOUR WITH THE NARROWEST INTEGER TYPE THAT HOLDS ALL CITY INDICES OF THE INSTANCE
+        self.tourDtype = tourDtype(len(self.instance))
         self.tournamentSize = tournamentSize
         self.terminationCriterion = terminationCriterion
         self.mutationType = mutationType
         self.crossoverType = crossoverType
         self.replacementType = replacementType
 
-        # DEFINE A NUMPY RANDOM NUMBER GENERATOR FOR THE ALGORITHM TO USE
+        # STEADY STATE OR GENERATIONAL (μ+λ)/(μ,λ) EVOLUTION
+        if evolutionMode not in ['steadyState', 'muPlusLambda', 'muCommaLambda']:
+            raise Exception('Invalid Evolution Mode ( ' + evolutionMode + ' ).\n Valid options are ',
+                            ['steadyState', 'muPlusLambda', 'muCommaLambda'])
+        self.evolutionMode = evolutionMode
+        self.offspringSize = populationSize if offspringSize is None else offspringSize
+        if evolutionMode == 'muCommaLambda' and self.offspringSize < populationSize:
+            raise Exception('(mu, lambda) selection needs offspringSize >= populationSize, got ', self.offspringSize)
+
+        # OPTIONAL MEMETIC (LOCAL SEARCH) STAGE
+        if localSearch not in [None, 'offspring', 'elite']:
+            raise Exception('Invalid Local Search ( ' + str(localSearch) + ' ).\n Valid options are ',
+                            [None, 'offspring', 'elite'])
+        if localSearch is not None and not self.instance.symmetric:
+            raise Exception('2-opt/Or-opt local search needs a symmetric TSP instance')
+        self.localSearchMode = localSearch
+        self.localSearchBudget = localSearchBudget
+        self.localSearch = None if localSearch is None else LocalSearch(self.instance.adj_mat, neighbourCount)
+
+        # COMPILE THE OPTIONAL NUMBA KERNELS NOW (ONCE PER PROCESS) RATHER THAN INSIDE THE FIRST GENERATION
+        jitKernels.compileKernels()
+
+        # DEFINE THE ONE NUMPY RANDOM NUMBER GENERATOR THAT THE ALGORITHM AND ALL OF ITS OPERATORS DRAW FROM
+        # (RNG_Seed MAY ALSO BE A SeedSequence, E.G. ONE OF THE SeedSequence.spawn CHILDREN GIVEN TO PARALLEL WORKERS)
         self.RNG_Seed = RNG_Seed
         self.RNG = np.random.default_rng(seed=self.RNG_Seed)
 
@@ -28,112 +94,520 @@ class EA:
         # FOR FIFO REPLACEMENT FUNCTION
         self.replacement_FIFOindex = 0
 
+        # THE STATE OF THE CURRENT RUN: SET UP BY initialiseRun AND ADVANCED BY evolve, SO THAT A RUN CAN BE CONTINUED
+        # IN SEVERAL PARTS (E.G. BETWEEN THE MIGRATIONS OF AN IslandModel)
+        self.population = None
+        self.replacement = None
+        self.generation = 0
+
+        # OPTIONAL LRU CACHE OF TOUR FITNESSES, SHARED BY EVERY EVALUATION OF THE RUN
+        self.fitnessCache = None if fitnessCacheSize is None else \
+            FitnessCache(self.instance.adj_mat, fitnessCacheSize, self.instance.symmetric)
+
+        # OPTIONAL PERIODIC CHECKPOINTS OF THE RUN
+        if checkpointFile is not None and checkpointInterval < 1:
+            raise Exception('checkpointInterval must be at least 1, got ', checkpointInterval)
+        self.checkpointFile = checkpointFile
+        self.checkpointInterval = checkpointInterval
+
+        # OPTIONAL DUPLICATE TOUR HANDLING AND DIVERSITY RESTARTS (BOTH NEED THE POPULATION TO COUNT ITS DISTINCT TOURS)
+        if duplicatePolicy not in [None, 'reject', 'penalise']:
+            raise Exception('Invalid Duplicate Policy ( ' + str(duplicatePolicy) + ' ).\n Valid options are ',
+                            [None, 'reject', 'penalise'])
+        if restartDiversity is not None and not 1 <= restartElite < populationSize:
+            raise Exception('restartElite must be between 1 and populationSize - 1, got ', restartElite)
+        self.duplicatePolicy = duplicatePolicy
+        self.duplicatePenalty = duplicatePenalty
+        self.restartDiversity = restartDiversity
+        self.restartElite = restartElite
+        self.trackDuplicates = duplicatePolicy is not None or restartDiversity is not None
+        self.restarts = 0
+
+        # MUTATIONS WHOSE COST CHANGE IS COMPUTED FROM THE 2-4 EDGES EACH MOVE TOUCHES (SEE processMutationWithDelta;
+        # REVERSING A SEGMENT ONLY HAS AN O(1) DELTA ON A SYMMETRIC INSTANCE, AND SCRAMBLE HAS NONE). THE CROSSOVER
+        # CHILDREN STILL NEED ONE FULL EVALUATION EACH, SO THE DELTA IS ONLY USED WHEN BOTH MUTATED CHILDREN WOULD BE
+        # EVALUATED ANYWAY (FIFO REPLACEMENT ONLY EVALUATES THE ONE CHILD IT KEEPS)
+        self.deltaEvaluation = (mutationType in ['singleSwap', 'multiSwap', 'insert'] or
+                                (mutationType == 'inversion' and self.instance.symmetric)) and \
+                               (replacementType != 'FIFO' or duplicatePolicy == 'penalise' or localSearch == 'offspring')
+
+        # OPTIONAL PER-STAGE TIMING (EVERY STAGE TESTS self.instrumentation IS None, SO IT COSTS ALMOST NOTHING WHEN OFF)
+        self.instrumentation = Instrumentation() if instrumentation is True else (instrumentation or None)
+        if self.instrumentation is not None:
+            self.evaluate = self.instrumentation.timedEvaluation(self.evaluate)
+
     # SET MUTATION OPERATOR multiSwapAmount CONSTRUCTOR METHOD
     def setMultiSwapAmount(self, value=5):
         self.multiSwapAmount = value
 
     # DEFINE THE FUNCTION FOR CONVERTING TSPLIB XML TO EQUIVALENT ADJACENCY MATRIX
     def adjacency_matrix(self):
-        return adj_mat(self.TSP)
+        return self.instance.adj_mat
 
-    # DEFINE THE FUNCTION THAT RETURNS AN ARRAY OF ARRAYS REPRESENTING EACH INITIAL POPULATION MEMBER
+    # DEFINE THE FUNCTION THAT RETURNS A Population REPRESENTING EACH INITIAL POPULATION MEMBER
     def population_init(self):
         """
-         CONSTRUCT A 2D ARRAY OF SIZE populationSize WITH THE SECOND COLUMN
-         BEING A 1 x (size of D) VECTOR OF RANDOMLY GENERATED INTEGERS FROM 0 TO (size of D)-1
-        AND THE FIRST COLUMN BEING ITS ASSOCIATED FITNESS FUNCTION
+         CONSTRUCT A (populationSize x size of D) TOUR MATRIX, EACH ROW BEING A VECTOR OF RANDOMLY GENERATED
+         INTEGERS FROM 0 TO (size of D)-1, TOGETHER WITH THE VECTOR OF THEIR ASSOCIATED FITNESS FUNCTIONS
         """
-        D = self.adjacency_matrix() # construct the adjacency matrix
+        D = self.adjacency_matrix() # the adjacency matrix parsed when the EA was built
 
-        population = np.zeros((2, self.populationSize), dtype=object)  # initialise population array with 2 columns and
-        # populationSize number of rows
+        # Construct each Tour Vector as one row of the tour matrix
+        tours = np.stack([self.RNG.permutation(range(len(D))) for i in range(self.populationSize)]).astype(self.tourDtype)
 
-        for i in range(self.populationSize):
-            population[1][i] = self.RNG.permutation(range(len(D)))  # Construct second column Tour Vector
-            population[0][i] = cost(D,population[1][i],len(D)) # Evaluate fitness of this member
-        return population
+        # EVALUATE THE FITNESS OF EVERY MEMBER IN ONE VECTORISED CALL
+        return Population(tours, self.evaluate(tours), self.trackDuplicates, self.instance.symmetric)
+
+    # DEFINE THE METHOD THAT EVALUATES A TOUR (OR A MATRIX OF TOURS), THROUGH THE FITNESS CACHE IF THERE IS ONE
+    def evaluate(self, tours):
+        if self.fitnessCache is not None:
+            return self.fitnessCache.evaluate(tours)
+        return jitKernels.tourCost(self.adjacency_matrix(), tours)
 
     # DEFINE THE METHOD THAT PERFORMS TOURNAMENT SELECTION
     def tournamentSelection(self, population):
-        # CHOOSE N RANDOM CHROMOSOMES FROM population (WITHOUT ANY DUPLICATE CHOICES)
-        tournament = self.RNG.choice(population, self.tournamentSize, replace=False, axis=1)
+        selectedParent = population.tours[self.tournamentSelectionIndices(population, 1)[0]]
 
-        # USE THE CALCULATED FITNESS FUNCTIONS TO FIND THE BEST CANDIDATE CHROMOSOME
-        tournamentFitness = tournament[0]
-        tournament_Victors = list(np.where(tournamentFitness==(np.min(tournamentFitness)))[0]) # find and return all instances with the lowest fitness
-        # Note we also have to add list(...[0]) syntax as np.where returns a tuple of (array[],) in this case
+        return selectedParent
 
+    # DEFINE THE METHOD THAT RUNS numParents TOURNAMENTS AND RETURNS THE POPULATION INDEX OF EACH WINNER
+    def tournamentSelectionIndices(self, population, numParents):
+        """
+        Run every tournament of a generation at once. The tournaments are drawn as one (numParents x tournamentSize)
+        index matrix and the winners are found from the fitness vector alone, so no tour data is touched here
+        :param population: The Population to select from
+        :param numParents: The number of tournaments (i.e. parents) to run
+        :return: selectedParentIndices - The population index of each tournament winner
+        """
+        if self.tournamentSize > len(population):
+            raise Exception('Tournament size ', self.tournamentSize, ' is larger than the population, ', len(population))
+
+        # CHOOSE N RANDOM CHROMOSOMES FROM population FOR EVERY TOURNAMENT (WITHOUT ANY DUPLICATE CHOICES IN A ROW)
+        if self.tournamentSize ** 2 <= 2 * len(population):
+            # SMALL TOURNAMENTS: DRAW WITH REPLACEMENT AND REDRAW THE (FEW) ROWS THAT CONTAIN A DUPLICATE
+            tournaments = self.RNG.integers(0, len(population), size=(numParents, self.tournamentSize))
+            sortedTournaments = np.sort(tournaments, axis=1)
+            duplicateRows = np.any(sortedTournaments[:, 1:] == sortedTournaments[:, :-1], axis=1)
+            while np.any(duplicateRows):
+                tournaments[duplicateRows] = self.RNG.integers(0, len(population),
+                                                               size=(np.count_nonzero(duplicateRows), self.tournamentSize))
+                sortedTournaments = np.sort(tournaments, axis=1)
+                duplicateRows = np.any(sortedTournaments[:, 1:] == sortedTournaments[:, :-1], axis=1)
+        else:
+            # LARGE TOURNAMENTS: TAKE THE tournamentSize SMALLEST OF ONE RANDOM KEY PER POPULATION MEMBER
+            randomKeys = self.RNG.random((numParents, len(population)))
+            tournaments = np.argpartition(randomKeys, self.tournamentSize - 1, axis=1)[:, :self.tournamentSize]
+
+        # USE THE CALCULATED FITNESS FUNCTIONS TO FIND THE BEST CANDIDATE CHROMOSOME OF EVERY TOURNAMENT
+        tournamentFitness = population.fitness[tournaments]
+        tournament_Victors = tournamentFitness == np.min(tournamentFitness, axis=1, keepdims=True)
 
         # IF THERE ARE MORE THAN 1 CHROMOSOME WITH THE LOWEST FITNESS, THEN RANDOMLY SELECT ONE OF THEM
-        selectedParentIndex = self.RNG.choice(tournament_Victors)
-        selectedParent = tournament[1][selectedParentIndex]
+        # (EACH VICTOR GETS A RANDOM KEY IN [0, 1) AND EVERY OTHER PLAYER -1, THE LARGEST KEY WINS)
+        victorKeys = np.where(tournament_Victors, self.RNG.random(tournaments.shape), -1.0)
+        selectedColumns = np.argmax(victorKeys, axis=1)
 
-        return selectedParent
+        return tournaments[np.arange(numParents), selectedColumns]
+
+    # DEFINE THE METHOD THAT APPLIES THE LOCAL SEARCH TO A BATCH OF TOURS WITHIN ONE GENERATION'S BUDGET
+    def applyLocalSearch(self, tours, toursFitness):
+        """
+        Improve each tour with 2-opt/Or-opt, best tour first, until localSearchBudget move evaluations have been spent
+        :param tours: A (k x n) matrix of tours
+        :param toursFitness: The fitness of each tour
+        :return: improvedTours, improvedToursFitness
+        """
+        improvedTours = np.array(tours, copy=True)
+        improvedToursFitness = np.array(toursFitness, dtype=np.float64, copy=True)
+
+        remainingBudget = self.localSearchBudget
+        for i in np.argsort(improvedToursFitness, kind='stable'):
+            if remainingBudget <= 0:
+                break
+            improvedTours[i], improvedToursFitness[i], evaluations = self.localSearch.improve(
+                improvedTours[i], improvedToursFitness[i], remainingBudget)
+            remainingBudget -= evaluations
+
+        return improvedTours, improvedToursFitness
+
+    # DEFINE THE METHOD THAT APPLIES THE LOCAL SEARCH TO THE BEST MEMBER OF THE POPULATION (IN PLACE)
+    def improveElite(self, population):
+        eliteIndex = population.argmin()
+        improvedTours, improvedToursFitness = self.applyLocalSearch(population.tours[[eliteIndex]],
+                                                                    population.fitness[[eliteIndex]])
+        if improvedToursFitness[0] < population.fitness[eliteIndex]:
+            population.replace(eliteIndex, improvedTours[0], improvedToursFitness[0])
+
+    # DEFINE THE METHOD THAT RESTARTS A POPULATION THAT HAS LOST ITS DIVERSITY (IN PLACE)
+    def maintainDiversity(self, population):
+        """
+        If fewer than restartDiversity of the members are distinct tours, keep the restartElite best members and
+        replace every other member with a new random tour
+        """
+        if self.restartDiversity is None or population.diversity >= self.restartDiversity:
+            return
+
+        tours = np.stack([self.RNG.permutation(population.numCities) for i in range(len(population))]).astype(self.tourDtype)
+        fitness = np.empty(len(population), dtype=np.float64)
+        eliteIndices = population.bestIndices(self.restartElite)
+        tours[:self.restartElite] = population.tours[eliteIndices]
+        fitness[:self.restartElite] = population.fitness[eliteIndices]
+        fitness[self.restartElite:] = self.evaluate(tours[self.restartElite:])
+
+        population.assign(tours, fitness)
+        self.restarts += 1
+        if self.instrumentation is not None:
+            self.instrumentation.count('restarts')
 
     # DEFINE THE METHOD THAT APPLIES THE ALGORITHM
     def applyEA(self):
+        if self.instrumentation is not None:
+            self.instrumentation.reset()
+
         # INITIALISE POPULATION MATRIX WITH ASSOCIATED FITNESS FUNCTIONS IN FIRST COLUMN
-        population = self.population_init()
-        updatedPopulation = copy.deepcopy(population)
+        self.initialiseRun()
 
-        # INITIALISE ANY RECURRING INDICES AND CONSTANTS
-        FIFOindex = self.replacement_FIFOindex
+        # EVOLVE THE POPULATION FOR terminationCriterion GENERATIONS
+        self.evolve(self.terminationCriterion)
 
-        # LOOP OVER THIS SUPER-ALGORITHM UP TO terminationCriterion TIMES
-        for i in range(self.terminationCriterion):
+        # CHECK THAT THE FINAL TOUR IS VALID (I.E. A PERMUTATION OF SUBSET [1:len(D)]
+        # checkPermutation(selectedTour, np.arange(len(population[1][0])))
+
+        return self.selectBest(self.population)
+
+    # DEFINE THE METHOD THAT STARTS A NEW RUN FROM A RANDOM (OR GIVEN) POPULATION
+    def initialiseRun(self, population=None):
+        if self.instrumentation is not None:
+            stageStart = perf_counter()
+        self.population = self.population_init() if population is None else population
+        self.generation = 0
+        self.restarts = 0
+
+        # BUILD THE REPLACEMENT STRATEGY ONCE, IT KEEPS ITS OWN STATE (E.G. THE FIFO INDEX) BETWEEN GENERATIONS
+        # AND OVERWRITES ONLY THE REPLACED SLOTS OF THE POPULATION
+        self.replacement = Replacement(self.adjacency_matrix(),
+                                       self.replacementType if self.evolutionMode == 'steadyState' else self.evolutionMode,
+                                       RNG_Seed=self.RNG_Seed,
+                                       replacement_FIFOindex=self.replacement_FIFOindex,
+                                       inPlace=True,
+                                       RNG=self.RNG,
+                                       fitnessCache=self.fitnessCache,
+                                       duplicatePolicy=self.duplicatePolicy,
+                                       duplicatePenalty=self.duplicatePenalty)
+
+        if self.instrumentation is not None:
+            self.replacement.evaluate = self.instrumentation.timedEvaluation(self.replacement.evaluate)
+            self.instrumentation.record('initialisation', stageStart)
+
+    # DEFINE THE METHOD THAT CONTINUES THE CURRENT RUN FOR numGenerations MORE GENERATIONS
+    def evolve(self, numGenerations):
+        if self.population is None:
+            raise Exception('No run to continue, call initialiseRun (or applyEA) first')
+
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            instrumentation.startProfiling()
+
+        remainingGenerations = numGenerations
+        while remainingGenerations > 0:
+            # STOP AT EVERY MULTIPLE OF checkpointInterval TO SAVE A CHECKPOINT (THE GENERATIONS THEMSELVES DO NOT
+            # DEPEND ON WHERE THE RUN IS SPLIT, SO THE RESULT IS THE SAME EITHER WAY)
+            stepGenerations = remainingGenerations
+            if self.checkpointFile is not None:
+                stepGenerations = min(stepGenerations,
+                                      self.checkpointInterval - self.generation % self.checkpointInterval)
+            if instrumentation is not None and instrumentation.callbackInterval is not None:
+                stepGenerations = min(stepGenerations, instrumentation.callbackInterval -
+                                      self.generation % instrumentation.callbackInterval)
+
+            if self.evolutionMode == 'steadyState':
+                self.population = self.applySteadyState(self.population, stepGenerations)
+            else:
+                self.population = self.applyGenerational(self.population, stepGenerations)
+            remainingGenerations -= stepGenerations
 
-            # PERFORM TOURNAMENT SELECTION TWICE TO GET TWO PARENTS
-            parentA = self.tournamentSelection(updatedPopulation)
-            parentB = self.tournamentSelection(updatedPopulation)
+            if self.checkpointFile is not None and self.generation % self.checkpointInterval == 0:
+                self.saveCheckpoint(self.checkpointFile)
 
+            if instrumentation is not None:
+                instrumentation.count('generations', stepGenerations)
+                if instrumentation.callback is not None and instrumentation.callbackInterval is not None and \
+                        self.generation % instrumentation.callbackInterval == 0:
+                    instrumentation.callback(self.getInstrumentation())
+
+        if instrumentation is not None:
+            instrumentation.stopProfiling()
+            if instrumentation.callback is not None and instrumentation.callbackInterval is None:
+                instrumentation.callback(self.getInstrumentation())
+
+        return self.population
+
+    # DEFINE THE METHOD THAT RETURNS THE PER-STAGE TIMES AND COUNTERS OF THE RUN (OR None WITHOUT INSTRUMENTATION)
+    def getInstrumentation(self):
+        """
+        :return: report - As Instrumentation.report, with the generation reached and the fitness cache counters added
+        """
+        if self.instrumentation is None:
+            return None
+        report = self.instrumentation.report()
+        report['counters']['generation'] = self.generation
+        if self.fitnessCache is not None:
+            report['counters'].update(cacheHits=self.fitnessCache.hits, cacheMisses=self.fitnessCache.misses,
+                                      cacheHitRate=self.fitnessCache.hitRate)
+        return report
+
+    # DEFINE THE METHOD THAT RETURNS THE TOUR (AND ITS FITNESS) WITH THE LOWEST FITNESS IN population
+    def selectBest(self, population):
+        # UNDER THE 'penalise' POLICY SOME STORED FITNESSES ARE PENALISED, SO THE TRUE ONES ARE COMPARED INSTEAD
+        fitness = self.evaluate(population.tours) if self.duplicatePolicy == 'penalise' else population.fitness
+
+        # EVALUATE WHICH TOUR HAS THE LOWEST FITNESS
+        finalPopulation_Victors = np.flatnonzero(
+            fitness == np.min(fitness))  # find and return all instances with the lowest fitness
+
+        # IF THERE ARE MORE THAN 1 CHROMOSOME WITH THE LOWEST FITNESS, THEN RANDOMLY SELECT ONE OF THEM
+        selectedTourIndex = self.RNG.choice(finalPopulation_Victors)
+        return population.tours[selectedTourIndex], fitness[selectedTourIndex]
+
+    # DEFINE THE METHODS THAT SAVE AND RESTORE THE STATE OF THE CURRENT RUN
+    def getState(self):
+        """
+        :return: state - A dictionary of plain arrays and values (so it can be pickled to another process) from which
+                 setState continues the run exactly where it was left
+        """
+        return {'tours': self.population.tours,
+                'fitness': self.population.fitness,
+                'generation': self.generation,
+                'restarts': self.restarts,
+                'RNG': self.RNG.bit_generator.state,
+                'replacement': self.replacement.getState()}
+
+    def setState(self, state):
+        self.initialiseRun(Population(state['tours'], state['fitness'], self.trackDuplicates, self.instance.symmetric))
+        self.generation = state['generation']
+        self.restarts = state.get('restarts', 0)
+        self.RNG.bit_generator.state = state['RNG']
+        self.replacement.setState(state['replacement'])
+
+    # DEFINE THE METHOD THAT RETURNS THE OPERATOR SETTINGS A CHECKPOINT CAN ONLY BE RESUMED WITH
+    def checkpointSettings(self):
+        return {'crossoverType': self.crossoverType,
+                'mutationType': self.mutationType,
+                'multiSwapAmount': self.multiSwapAmount,
+                'replacementType': self.replacementType,
+                'evolutionMode': self.evolutionMode,
+                'offspringSize': self.offspringSize,
+                'tournamentSize': self.tournamentSize,
+                'duplicatePolicy': self.duplicatePolicy,
+                'localSearch': self.localSearchMode}
+
+    # DEFINE THE METHOD THAT WRITES THE STATE OF THE CURRENT RUN TO A BINARY .npz FILE
+    def saveCheckpoint(self, checkpointFile):
+        state = self.getState()
+
+        # THE BIT GENERATOR STATES HOLD INTEGERS WIDER THAN 64 BITS, SO THEY ARE STORED AS JSON TEXT
+        checkpoint = {'tours': state['tours'],
+                      'fitness': state['fitness'],
+                      'generation': np.array(state['generation']),
+                      'restarts': np.array(state['restarts']),
+                      'RNG': np.array(json.dumps(state['RNG'])),
+                      'replacement': np.array(json.dumps(state['replacement'])),
+                      'RNG_Seed': np.array(repr(self.RNG_Seed)),
+                      'settings': np.array(json.dumps(self.checkpointSettings()))}
+
+        # WRITE TO A TEMPORARY FILE FIRST SO THAT A RUN KILLED MID-WRITE LEAVES THE PREVIOUS CHECKPOINT INTACT
+        temporaryFile = checkpointFile + '.tmp'
+        with open(temporaryFile, 'wb') as file:
+            np.savez(file, **checkpoint)
+        os.replace(temporaryFile, checkpointFile)
+
+    # DEFINE THE METHOD THAT READS A CHECKPOINT WRITTEN BY saveCheckpoint BACK INTO THIS EA
+    def loadCheckpoint(self, checkpointFile):
+        with np.load(checkpointFile) as checkpoint:
+            if str(checkpoint['RNG_Seed']) != repr(self.RNG_Seed) or \
+                    checkpoint['tours'].shape != (self.populationSize, len(self.adjacency_matrix())):
+                raise Exception('Checkpoint ' + checkpointFile + ' was not written by an EA with the same RNG_Seed, '
+                                'populationSize and TSP instance')
+
+            # REFUSE TO CONTINUE THE RUN WITH DIFFERENT OPERATORS (IT WOULD SILENTLY BECOME A DIFFERENT EXPERIMENT)
+            settings = json.loads(str(checkpoint['settings'])) if 'settings' in checkpoint else None
+            if settings != self.checkpointSettings():
+                raise Exception('Checkpoint ' + checkpointFile + ' was written with the settings ', settings,
+                                ' but this EA uses ', self.checkpointSettings())
+            self.setState({'tours': checkpoint['tours'],
+                           'fitness': checkpoint['fitness'],
+                           'generation': int(checkpoint['generation']),
+                           'restarts': int(checkpoint['restarts']) if 'restarts' in checkpoint else 0,
+                           'RNG': json.loads(str(checkpoint['RNG'])),
+                           'replacement': json.loads(str(checkpoint['replacement']))})
+
+    # DEFINE THE METHOD THAT CONTINUES A RUN FROM ITS LAST CHECKPOINT UP TO terminationCriterion GENERATIONS
+    def resume(self, checkpointFile=None):
+        """
+        Continue a run that was stopped, giving exactly the same result as an uninterrupted applyEA() with the same
+        arguments. If there is no checkpoint yet, the run is started from scratch
+        :param checkpointFile: The checkpoint to resume from (defaults to the EA's checkpointFile)
+        :return: selectedTour, selectedTourFitness - As returned by applyEA
+        """
+        checkpointFile = self.checkpointFile if checkpointFile is None else checkpointFile
+        if checkpointFile is None or not os.path.exists(checkpointFile):
+            return self.applyEA()
+
+        if self.instrumentation is not None:
+            self.instrumentation.reset()
+        self.loadCheckpoint(checkpointFile)
+        self.evolve(max(self.terminationCriterion - self.generation, 0))
+
+        return self.selectBest(self.population)
+
+    # DEFINE THE METHOD THAT RUNS THE STEADY STATE ALGORITHM (TWO CHILDREN PER GENERATION)
+    def applySteadyState(self, population, numGenerations):
+        D = self.adjacency_matrix()
+        updatedPopulation = population
+        replacement = self.replacement
+        instrumentation = self.instrumentation # None unless the stages are timed
+
+        # LOOP OVER THIS SUPER-ALGORITHM numGenerations TIMES, CONTINUING THE GENERATION COUNT OF THE CURRENT RUN
+        for i in range(self.generation, self.generation + numGenerations):
+            if instrumentation is not None:
+                stageStart = perf_counter()
+
+            # PERFORM BOTH TOURNAMENT SELECTIONS IN ONE CALL TO GET TWO PARENTS
+            parentA, parentB = updatedPopulation.tours[self.tournamentSelectionIndices(updatedPopulation, 2)]
+            if instrumentation is not None:
+                stageStart = instrumentation.record('selection', stageStart)
 
             # APPLY A SINGLE POINT CROSSOVER TO THE TWO PARENTS TO GET TWO CHILDREN childC and childD RESP.
-            crossover = CrossoverOperator(parentA, parentB, self.crossoverType, self.RNG_Seed + i) # create crossover object
+            crossover = CrossoverOperator(parentA, parentB, self.crossoverType, RNG=self.RNG) # create crossover object
             childC, childD = crossover.processCrossover()
+            if instrumentation is not None:
+                stageStart = instrumentation.record('crossover', stageStart)
 
             # APPLY A MUTATION OPERATOR TO THE TWO CHILDREN TO GET TWO MUTATED CHILDREN childE and childF RESP.
             mutationC = MutationOperator(
-                np.array(childC,dtype=np.int8),
+                np.array(childC, dtype=self.tourDtype),
                 self.mutationType,
                 multiSwapAmount=self.multiSwapAmount,
-                RNG_Seed=self.RNG_Seed + i)
+                RNG=self.RNG)
             mutationD = MutationOperator(
-                np.array(childD,dtype=np.int8),
+                np.array(childD, dtype=self.tourDtype),
                 self.mutationType,
                 multiSwapAmount=self.multiSwapAmount,
-                RNG_Seed=2*self.RNG_Seed + i) # To add extra pseudorandomness
-
-            childE = mutationC.processMutation()
-            childF = mutationD.processMutation()
-
-
-            # APPLY A REPLACEMENT FUNCTION (CHECK IF IT IS FIFO AS IT HAS DIFFERENT RETURN VALUES)
-            replacement = Replacement(updatedPopulation,
-                                      self.adjacency_matrix(),
-                                      childE, childF,
-                                      self.replacementType,
-                                      RNG_Seed=(self.RNG_Seed + i),
-                                      replacement_FIFOindex=FIFOindex)
-            if self.replacementType == 'FIFO':
-                FIFOindex, updatedPopulation = replacement.applyReplacement()
+                RNG=self.RNG)
+
+            # WHEN BOTH CHILDREN ARE SCORED ANYWAY AND THE MUTATION HAS AN O(1) COST DELTA, SCORE THE TWO CROSSOVER
+            # CHILDREN IN ONE CALL AND ADD THE DELTA OF THE MUTATION'S MOVES INSTEAD (OTHERWISE REPLACEMENT SCORES THEM)
+            childEFitness, childFFitness = None, None
+            if self.deltaEvaluation:
+                childCFitness, childDFitness = self.evaluate(np.array([childC, childD], dtype=self.tourDtype))
+                childE, childEDelta = mutationC.processMutationWithDelta(D, self.instance.symmetric)
+                childF, childFDelta = mutationD.processMutationWithDelta(D, self.instance.symmetric)
+                childEFitness = childCFitness + childEDelta
+                childFFitness = childDFitness + childFDelta
             else:
-                updatedPopulation = replacement.applyReplacement()
-
-        # EVALUATE WHICH TOUR HAS THE LOWEST FITNESS AFTER THE ITERATIONS HAVE FINISHED
-        finalPopulationFitness = updatedPopulation[0]
-        finalPopulation_Victors = list(np.where(
-            finalPopulationFitness == (np.min(finalPopulationFitness)))[0])  # find and return all instances with the lowest fitness
-
-        # IF THERE ARE MORE THAN 1 CHROMOSOME WITH THE LOWEST FITNESS, THEN RANDOMLY SELECT ONE OF THEM
-        selectedTourIndex = self.RNG.choice(finalPopulation_Victors)
-        selectedTour = updatedPopulation[1][selectedTourIndex]
-        selectedTourFitness = updatedPopulation[0][selectedTourIndex]
-
-        # CHECK THAT THE FINAL TOUR IS VALID (I.E. A PERMUTATION OF SUBSET [1:len(D)]
-        # checkPermutation(selectedTour, np.arange(len(population[1][0])))
-
-        return selectedTour, selectedTourFitness
-
+                childE = mutationC.processMutation()
+                childF = mutationD.processMutation()
+            if instrumentation is not None:
+                stageStart = instrumentation.record('mutation', stageStart)
+
+            # OPTIONALLY IMPROVE BOTH CHILDREN WITH LOCAL SEARCH (THEIR FITNESS IS THEN ALREADY KNOWN FOR REPLACEMENT)
+            if self.localSearchMode == 'offspring':
+                children = np.array([childE, childF])
+                childrenFitness = self.evaluate(children) if childEFitness is None else \
+                    np.array([childEFitness, childFFitness])
+                children, childrenFitness = self.applyLocalSearch(children, childrenFitness)
+                (childE, childF), (childEFitness, childFFitness) = children, childrenFitness
+                if instrumentation is not None:
+                    stageStart = instrumentation.record('localSearch', stageStart)
+
+            # APPLY THE REPLACEMENT FUNCTION
+            updatedPopulation = replacement.applyReplacement(updatedPopulation, childE, childF,
+                                                             childEFitness, childFFitness)
+            if instrumentation is not None:
+                stageStart = instrumentation.record('replacement', stageStart)
+
+            if self.localSearchMode == 'elite':
+                self.improveElite(updatedPopulation)
+                if instrumentation is not None:
+                    stageStart = instrumentation.record('localSearch', stageStart)
+            if self.restartDiversity is not None:
+                self.maintainDiversity(updatedPopulation)
+                if instrumentation is not None:
+                    instrumentation.record('diversity', stageStart)
+
+            self.generation = i + 1
+
+        return updatedPopulation
+
+    # DEFINE THE METHOD THAT RUNS THE GENERATIONAL (μ+λ) / (μ,λ) ALGORITHM
+    def applyGenerational(self, population, numGenerations):
+        """
+        Every generation selects all parents at once, recombines and mutates them as (k x n) matrices with the batch
+        operators, scores every child with one vectorised cost call and then keeps the best populationSize members of
+        parents + offspring (muPlusLambda) or of the offspring only (muCommaLambda)
+        :param population: The initial Population
+        :param numGenerations: The number of generations to run
+        :return: updatedPopulation - The Population after numGenerations generations
+        """
+        numPairs = (self.offspringSize + 1) // 2 # crossover produces children in pairs
+
+        # THE SURVIVOR SELECTION STRATEGY WRITES THE SURVIVORS BACK INTO population
+        replacement = self.replacement
+        instrumentation = self.instrumentation # None unless the stages are timed
+
+        for i in range(self.generation, self.generation + numGenerations):
+            if instrumentation is not None:
+                stageStart = perf_counter()
+
+            # PERFORM TOURNAMENT SELECTION FOR EVERY PARENT OF THIS GENERATION AND GATHER THEM AS PAIRS
+            parentIndices = self.tournamentSelectionIndices(population, 2 * numPairs)
+            parents = population.tours[parentIndices]
+            if instrumentation is not None:
+                stageStart = instrumentation.record('selection', stageStart)
+
+            # APPLY THE CROSSOVER TO EVERY PAIR OF PARENTS AT ONCE
+            crossover = CrossoverOperator(parents[:numPairs], parents[numPairs:], self.crossoverType, RNG=self.RNG)
+            childrenA, childrenB = crossover.processBatchCrossover()
+            offspring = np.concatenate([childrenA, childrenB], axis=0)[:self.offspringSize]
+            if instrumentation is not None:
+                stageStart = instrumentation.record('crossover', stageStart)
+
+            # APPLY THE MUTATION OPERATOR TO EVERY CHILD AT ONCE
+            mutation = MutationOperator(offspring,
+                                        self.mutationType,
+                                        multiSwapAmount=self.multiSwapAmount,
+                                        RNG=self.RNG)
+            offspring = mutation.processBatchMutation()
+            if instrumentation is not None:
+                stageStart = instrumentation.record('mutation', stageStart)
+
+            # EVALUATE EVERY CHILD IN ONE VECTORISED CALL (AND OPTIONALLY IMPROVE THEM) AND SELECT THE SURVIVORS
+            # (THE EVALUATION IS TIMED BY THE INSTRUMENTED self.evaluate ITSELF)
+            offspringFitness = self.evaluate(offspring)
+            if instrumentation is not None:
+                stageStart = perf_counter()
+            if self.localSearchMode == 'offspring':
+                offspring, offspringFitness = self.applyLocalSearch(offspring, offspringFitness)
+                if instrumentation is not None:
+                    stageStart = instrumentation.record('localSearch', stageStart)
+            population = replacement.applyBatchReplacement(population, offspring, offspringFitness)
+            if instrumentation is not None:
+                stageStart = instrumentation.record('replacement', stageStart)
+
+            if self.localSearchMode == 'elite':
+                self.improveElite(population)
+                if instrumentation is not None:
+                    stageStart = instrumentation.record('localSearch', stageStart)
+            if self.restartDiversity is not None:
+                self.maintainDiversity(population)
+                if instrumentation is not None:
+                    instrumentation.record('diversity', stageStart)
+
+            self.generation = i + 1
 
+        return population
 
 
+# THE ISLAND MODEL AND THE EXPERIMENT RUNNER BUILD EA OBJECTS, SO THEY ARE IMPORTED ONCE EA IS DEFINED
+from Algorithm.IslandModel import *
+from Algorithm.Experiment import *
@@ -97,4 +97,34 @@ import numpy as np
 # A helper function to check if operators applied to a genetic chromosome preserve TSP constraints
 def checkPermutation(inputChromosome, outputChromosome):
 	if len(np.unique(outputChromosome)) != len(inputChromosome):
-		raise Exception('Genetic Operator Failed: There are duplicates in the output chromosome', outputChromosome)
\ No newline at end of file
+		raise Exception('Genetic Operator Failed: There are duplicates in the output chromosome', outputChromosome)
+
+# A helper function to check that every row of a batch of genetic chromosomes is a permutation of [0, n)
+def checkBatchPermutation(outputChromosomes):
+	sortedChromosomes = np.sort(outputChromosomes, axis=1)
+	if not np.array_equal(sortedChromosomes, np.broadcast_to(np.arange(outputChromosomes.shape[1]), sortedChromosomes.shape)):
+		raise Exception('Genetic Operator Failed: There are duplicates in the output chromosomes', outputChromosomes)
+
+# A helper function that returns the narrowest integer dtype able to hold every city index of a tour
+# (int16 up to 32768 cities, int32 above that)
+def tourDtype(numCities):
+	if numCities <= np.iinfo(np.int16).max + 1:
+		return np.dtype(np.int16)
+	return np.dtype(np.int32)
+
+# A helper function that puts every row of a tour matrix into a canonical form: rotated to start at city 0 and, for a
+# symmetric TSP, walked in the direction whose second city is the smaller of city 0's two neighbours. Tours that
+# are the same closed tour (and so have the same cost) then have the same canonical form (in one fixed dtype)
+def canonicalTours(tours, symmetric=True):
+	tours = np.atleast_2d(np.asarray(tours))
+	numCities = tours.shape[1]
+
+	startPositions = np.argmax(tours == 0, axis=1)
+	rotation = (startPositions[:, None] + np.arange(numCities)) % numCities
+	canonical = np.take_along_axis(tours, rotation, axis=1).astype(tourDtype(numCities), copy=False)
+
+	if symmetric and numCities > 2:
+		reversedRows = canonical[:, 1] > canonical[:, -1]
+		canonical[reversedRows, 1:] = canonical[reversedRows, :0:-1]
+
+	return canonical
@@ -0,0 +1,310 @@
+import numpy as np
+
+from costFunction import batch_cost, inversion_cost_delta
+
+# NUMBA IS AN OPTIONAL DEPENDENCY: WHEN IT IS INSTALLED THE KERNELS BELOW ARE COMPILED TO MACHINE CODE (nopython mode),
+# OTHERWISE EVERY KERNEL FALLS BACK TO AN EQUIVALENT PURE NUMPY IMPLEMENTATION. EITHER WAY THE KERNELS ARE
+# DETERMINISTIC (ALL RANDOM CHOICES ARE DRAWN BY THE CALLING OPERATOR), SO BOTH BACKENDS GIVE IDENTICAL RESULTS
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+BACKEND = 'numba' if NUMBA_AVAILABLE else 'numpy'
+
+
+def jit(function):
+    # cache=True KEEPS THE COMPILED CODE ON DISK BETWEEN RUNS (AND PROCESSES), nogil=True LETS THREADED CALLERS RUN
+    # ALONGSIDE PYTHON CODE
+    return numba.njit(cache=True, nogil=True)(function) if NUMBA_AVAILABLE else None
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# NOPYTHON KERNELS (PLAIN LOOPS OVER INTEGER ARRAYS, ONLY COMPILED WHEN NUMBA IS AVAILABLE)
+# ---------------------------------------------------------------------------------------------------------------------
+
+def _tourCostLoop(D, tours):
+    numTours, numCities = tours.shape
+    costs = np.empty(numTours, dtype=np.float64)
+    for t in range(numTours):
+        total = D[tours[t, numCities - 1], tours[t, 0]] # the closing edge
+        for i in range(numCities - 1):
+            total += D[tours[t, i], tours[t, i + 1]]
+        costs[t] = total
+    return costs
+
+
+def _orderedChildLoop(parent, donor, crossoverPoint):
+    numCities = len(parent)
+    child = np.empty_like(parent)
+    inRightSwap = np.zeros(numCities, dtype=np.bool_)
+    for i in range(crossoverPoint, numCities):
+        inRightSwap[donor[i]] = True
+        child[i] = donor[i]
+
+    # FILL THE LEFT HAND SIDE WITH THE REMAINING CITIES IN THE ORDER OF THE PARENT
+    position = 0
+    for i in range(numCities):
+        if not inRightSwap[parent[i]]:
+            child[position] = parent[i]
+            position += 1
+    return child
+
+
+def _orderedCrossoverLoop(parent1, parent2, crossoverPoint):
+    return _orderedChildLoop(parent1, parent2, crossoverPoint), _orderedChildLoop(parent2, parent1, crossoverPoint)
+
+
+def _cycleCrossoverLoop(parent1, parent2):
+    numCities = len(parent1)
+    parent1_position = np.empty(numCities, dtype=np.intp)
+    for i in range(numCities):
+        parent1_position[parent1[i]] = i
+
+    # LABEL EVERY CYCLE IN A SINGLE PASS, ALTERNATE CYCLES ARE TAKEN FROM THE OTHER PARENT
+    child1 = np.empty_like(parent1)
+    child2 = np.empty_like(parent2)
+    cycles = np.zeros(numCities, dtype=np.intp)
+    cycle_no = 1
+    for cyclestart in range(numCities):
+        if cycles[cyclestart]:
+            continue
+        pos = cyclestart
+        while not cycles[pos]:
+            cycles[pos] = cycle_no
+            if cycle_no % 2 == 1:
+                child1[pos], child2[pos] = parent1[pos], parent2[pos]
+            else:
+                child1[pos], child2[pos] = parent2[pos], parent1[pos]
+            pos = parent1_position[parent2[pos]]
+        cycle_no += 1
+    return child1, child2
+
+
+def _swapLoop(tour, swaps):
+    mutatedTour = tour.copy()
+    for k in range(swaps.shape[0]):
+        i, j = swaps[k, 0], swaps[k, 1]
+        mutatedTour[i], mutatedTour[j] = mutatedTour[j], mutatedTour[i]
+    return mutatedTour
+
+
+def _inversionLoop(tour, lo, hi):
+    mutatedTour = tour.copy()
+    while lo < hi:
+        mutatedTour[lo], mutatedTour[hi] = tour[hi], tour[lo]
+        lo += 1
+        hi -= 1
+    return mutatedTour
+
+
+def _insertLoop(tour, lo, hi):
+    mutatedTour = tour.copy()
+    mutatedTour[lo] = tour[hi]
+    for i in range(lo + 1, hi + 1):
+        mutatedTour[i] = tour[i - 1]
+    return mutatedTour
+
+
+def _scrambleLoop(tour, lo, hi, order):
+    mutatedTour = tour.copy()
+    for k in range(min(hi, len(tour) - 1) - lo + 1):
+        mutatedTour[lo + k] = tour[lo + order[k]]
+    return mutatedTour
+
+
+def _twoOptDeltaLoop(D, tour, lo, hi):
+    n = len(tour)
+    if hi - lo + 1 >= n - 1:
+        return 0.0
+    before, first, last, after = tour[(lo - 1) % n], tour[lo], tour[hi], tour[(hi + 1) % n]
+    return D[before, last] + D[first, after] - D[before, first] - D[last, after]
+
+
+if NUMBA_AVAILABLE:
+    # _orderedChildLoop IS CALLED FROM INSIDE orderedCrossoverKernel, SO IT HAS TO BE COMPILED TOO
+    _orderedChildLoop = jit(_orderedChildLoop)
+
+tourCostKernel = jit(_tourCostLoop)
+orderedCrossoverKernel = jit(_orderedCrossoverLoop)
+cycleCrossoverKernel = jit(_cycleCrossoverLoop)
+swapKernel = jit(_swapLoop)
+inversionKernel = jit(_inversionLoop)
+insertKernel = jit(_insertLoop)
+scrambleKernel = jit(_scrambleLoop)
+twoOptDeltaKernel = jit(_twoOptDeltaLoop)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# PUBLIC FUNCTIONS: USE THE COMPILED KERNEL IF THERE IS ONE, OTHERWISE THE NUMPY IMPLEMENTATION
+# ---------------------------------------------------------------------------------------------------------------------
+
+def isDenseMatrix(adj_mat):
+    # THE COMPILED KERNELS READ THE DISTANCES DIRECTLY, SO THEY NEED A REAL float64 MATRIX (A memmap IS ONE) RATHER
+    # THAN A LAZY DISTANCE OBJECT SUCH AS CoordinateDistances
+    return isinstance(adj_mat, np.ndarray) and adj_mat.ndim == 2 and adj_mat.dtype == np.float64
+
+
+def tourCost(adj_mat, tours):
+    """
+    The closed tour length of every tour, as batch_cost
+    :param adj_mat: The Adjacency Matrix representing the TSP (or a lazy distance object)
+    :param tours: Either a 2D array with one tour per row, or a single 1D tour
+    :return: A vector holding the length of each tour (or a scalar for a single tour)
+    """
+    if NUMBA_AVAILABLE and isDenseMatrix(adj_mat):
+        tours = np.asarray(tours)
+        costs = tourCostKernel(adj_mat, np.atleast_2d(tours))
+        return costs[0] if tours.ndim == 1 else costs
+    return batch_cost(adj_mat, tours)
+
+
+def orderedCrossover(parent1, parent2, crossoverPoint):
+    """
+    The ordered crossover of one pair of parents at crossoverPoint (see CrossoverOperator.orderedCrossover)
+    :return: child1, child2
+    """
+    parent1 = np.asarray(parent1)
+    parent2 = np.asarray(parent2)
+    if NUMBA_AVAILABLE:
+        return orderedCrossoverKernel(parent1, parent2, crossoverPoint)
+
+    # SWAP THE RIGHT HAND SIDES AND MARK THEIR CITIES IN A BOOLEAN LOOKUP TABLE INDEXED BY CITY
+    parent1_rightSwap = parent2[crossoverPoint:]
+    parent2_rightSwap = parent1[crossoverPoint:]
+    parent1_inRightSwap = np.zeros(len(parent1), dtype=bool)
+    parent1_inRightSwap[parent1_rightSwap] = True
+    parent2_inRightSwap = np.zeros(len(parent2), dtype=bool)
+    parent2_inRightSwap[parent2_rightSwap] = True
+
+    # MASKING THE PARENT KEEPS THE REMAINDER IN THE ORDER OF THE ORIGINAL RESP. PARENT, SO NO SORTING IS NEEDED
+    child1 = np.concatenate([parent1[~parent1_inRightSwap[parent1]], parent1_rightSwap], axis=0)
+    child2 = np.concatenate([parent2[~parent2_inRightSwap[parent2]], parent2_rightSwap], axis=0)
+    return child1, child2
+
+
+def cycleCrossover(parent1, parent2):
+    """
+    The cycle crossover of one pair of parents (see CrossoverOperator.cycleCrossover)
+    :return: child1, child2
+    """
+    parent1 = np.asarray(parent1)
+    parent2 = np.asarray(parent2)
+    if NUMBA_AVAILABLE:
+        return cycleCrossoverKernel(parent1, parent2)
+
+    # THE CYCLE WALK FROM pos GOES STRAIGHT TO THE POSITION OF parent2[pos] IN parent1 (THE INVERSE PERMUTATION)
+    parent1_position = np.empty(len(parent1), dtype=np.intp)
+    parent1_position[parent1] = np.arange(len(parent1))
+    nextPosition = parent1_position[parent2].tolist()
+
+    cycles = [0] * len(parent1)
+    cycle_no = 1
+    for cyclestart in range(len(cycles)):
+        if cycles[cyclestart]:
+            continue
+        pos = cyclestart
+        while not cycles[pos]:
+            cycles[pos] = cycle_no
+            pos = nextPosition[pos]
+        cycle_no += 1
+
+    oddCycles = np.array(cycles) % 2 == 1
+    return np.where(oddCycles, parent1, parent2), np.where(oddCycles, parent2, parent1)
+
+
+def swapMutation(tour, swaps):
+    """
+    Swap the cities at every (i, j) position pair of swaps in turn (one pair for singleSwap, several for multiSwap)
+    :param tour: The tour vector (it is not modified)
+    :param swaps: A (k x 2) integer array of position pairs
+    :return: mutatedTour
+    """
+    tour = np.asarray(tour)
+    swaps = np.asarray(swaps, dtype=np.intp).reshape(-1, 2)
+    if NUMBA_AVAILABLE:
+        return swapKernel(tour, swaps)
+
+    mutatedTour = tour.copy()
+    for i, j in swaps.tolist():
+        mutatedTour[i], mutatedTour[j] = mutatedTour[j], mutatedTour[i]
+    return mutatedTour
+
+
+def inversionMutation(tour, lo, hi):
+    # REVERSE tour[lo..hi] (INCLUSIVE)
+    tour = np.asarray(tour)
+    if NUMBA_AVAILABLE:
+        return inversionKernel(tour, int(lo), int(hi))
+
+    mutatedTour = tour.copy()
+    mutatedTour[lo:hi + 1] = tour[lo:hi + 1][::-1]
+    return mutatedTour
+
+
+def insertMutation(tour, lo, hi):
+    # MOVE THE CITY AT POSITION hi TO POSITION lo, SHIFTING THE CITIES IN BETWEEN ONE PLACE TO THE RIGHT
+    tour = np.asarray(tour)
+    if NUMBA_AVAILABLE:
+        return insertKernel(tour, int(lo), int(hi))
+
+    mutatedTour = tour.copy()
+    mutatedTour[lo:hi + 1] = np.roll(tour[lo:hi + 1], 1)
+    return mutatedTour
+
+
+def scrambleMutation(tour, lo, hi, order):
+    # REORDER tour[lo..hi] (INCLUSIVE, hi MAY RUN PAST THE END) SO THAT ITS kTH CITY BECOMES tour[lo + order[k]]
+    tour = np.asarray(tour)
+    order = np.asarray(order, dtype=np.intp)
+    if NUMBA_AVAILABLE:
+        return scrambleKernel(tour, int(lo), int(hi), order)
+
+    mutatedTour = tour.copy()
+    mutatedTour[lo:hi + 1] = tour[lo:hi + 1][order]
+    return mutatedTour
+
+
+def twoOptDelta(adj_mat, tour, lo, hi):
+    # CHANGE IN TOUR LENGTH WHEN tour[lo..hi] IS REVERSED (SEE costFunction.inversion_cost_delta)
+    if NUMBA_AVAILABLE and isDenseMatrix(adj_mat):
+        return float(twoOptDeltaKernel(adj_mat, np.asarray(tour), int(lo), int(hi)))
+    return inversion_cost_delta(adj_mat, tour, lo, hi)
+
+
+# ---------------------------------------------------------------------------------------------------------------------
+# PRECOMPILATION
+# ---------------------------------------------------------------------------------------------------------------------
+
+# NOTHING IS COMPILED AT IMPORT: A COMPILER THREAD LEFT RUNNING AT IMPORT COULD STILL HOLD NUMBA'S COMPILER LOCK WHEN
+# IslandModel OR Experiment FORK THEIR WORKER POOL, DEADLOCKING THE CHILDREN. INSTEAD compileKernels IS CALLED ONCE PER
+# PROCESS (OR, WITH cache=True, LOADS THE KERNELS FROM DISK): BY THE IslandModel AND Experiment WORKERS WHEN THEY START,
+# BEFORE ANY JOB IS TIMED, AND BY EA WHEN IT IS BUILT, SO THAT IT IS NEVER PAID INSIDE A GENERATION
+kernelsCompiled = False
+
+
+def compileKernels():
+    """
+    Compile every kernel for the argument types the EA uses (int16 and int32 tours, a float64 matrix) by calling it
+    once on a tiny instance, so that the first real call does not pay the compilation time. Only the first call in a
+    process does any work
+    """
+    global kernelsCompiled
+    if kernelsCompiled or not NUMBA_AVAILABLE:
+        return
+    D = np.ones((4, 4), dtype=np.float64)
+    order = np.arange(2, dtype=np.intp)
+    swaps = np.array([[0, 1]], dtype=np.intp)
+    for dtype in (np.int16, np.int32):
+        tours = np.tile(np.arange(4, dtype=dtype), (2, 1))
+        tour = tours[0]
+        tourCostKernel(D, tours)
+        orderedCrossoverKernel(tour, tour, 2)
+        cycleCrossoverKernel(tour, tour)
+        swapKernel(tour, swaps)
+        inversionKernel(tour, 0, 2)
+        insertKernel(tour, 0, 2)
+        scrambleKernel(tour, 0, 1, order)
+        twoOptDeltaKernel(D, tour, 0, 1)
+    kernelsCompiled = True
@@ -1 +1,4 @@
-from TSPtoADJ._tsp import read_tsplib, print_matrix
\ No newline at end of file
+from TSPtoADJ._tsp import read_tsplib, print_matrix
+from TSPtoADJ._coords import read_tsplib_coords, CoordinateDistances
+from TSPtoADJ._cache import load_tsplib_cached, write_tsplib_cache
+from TSPtoADJ._instance import TSPInstance
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+from TSPtoADJ._tsp import read_tsplib
+
+
+def cache_paths(file_name):
+    """
+    Returns the .npy file holding the parsed matrix of file_name and the .json file describing it,
+    both kept next to file_name
+    """
+    return str(file_name) + '.npy', str(file_name) + '.npy.json'
+
+
+def file_hash(file_name, chunk_size=1 << 20):
+    # SHA-256 OF THE FILE CONTENTS, READ IN CHUNKS SO THAT LARGE FILES ARE NOT HELD IN MEMORY
+    digest = hashlib.sha256()
+    with open(file_name, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_tsplib_cache(file_name):
+    """
+    This function parses an XML file defining a TSP (see read_tsplib) and writes the Adjacency Matrix to a float64
+    .npy file next to it, together with a .json file recording the source's size, mtime and hash and whether the
+    matrix is symmetric.
+
+    Args:
+            file_name (string): The XML file to be converted.
+    Returns:
+            metadata (dict): The contents written to the .json file.
+    Raises:
+            ValueError, xml.etree.ElementTree.ParseError: The XML file could not be parsed (see read_tsplib).
+    """
+    adj_mat = np.ascontiguousarray(read_tsplib(file_name), dtype=np.float64)
+
+    status = os.stat(file_name)
+    metadata = {'size': status.st_size,
+                'mtime_ns': status.st_mtime_ns,
+                'sha256': file_hash(file_name),
+                'shape': list(adj_mat.shape),
+                'symmetric': bool(np.array_equal(adj_mat, adj_mat.T))}
+
+    # WRITE BOTH FILES UNDER TEMPORARY NAMES FIRST SO THAT AN INTERRUPTED CONVERSION NEVER LEAVES A HALF WRITTEN CACHE
+    matrix_file, metadata_file = cache_paths(file_name)
+    with open(matrix_file + '.tmp', 'wb') as file:
+        np.save(file, adj_mat)
+    with open(metadata_file + '.tmp', 'w') as file:
+        json.dump(metadata, file)
+    os.replace(matrix_file + '.tmp', matrix_file)
+    os.replace(metadata_file + '.tmp', metadata_file)
+
+    return metadata
+
+
+def read_tsplib_cache_metadata(file_name):
+    """
+    Returns the cache metadata of file_name if its cache is still valid, otherwise None. The cache is valid if the
+    source's size and mtime are unchanged or, when only its mtime changed (e.g. after a copy or checkout), if its
+    contents still hash to the recorded value
+    """
+    matrix_file, metadata_file = cache_paths(file_name)
+    if not os.path.exists(matrix_file) or not os.path.exists(metadata_file):
+        return None
+    try:
+        with open(metadata_file) as file:
+            metadata = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    status = os.stat(file_name)
+    if status.st_size != metadata.get('size'):
+        return None
+    if status.st_mtime_ns != metadata.get('mtime_ns'):
+        if file_hash(file_name) != metadata.get('sha256'):
+            return None
+
+        # SAME CONTENTS: RECORD THE NEW mtime SO THAT THE NEXT LOAD DOES NOT HASH THE FILE AGAIN
+        metadata['mtime_ns'] = status.st_mtime_ns
+        try:
+            with open(metadata_file + '.tmp', 'w') as file:
+                json.dump(metadata, file)
+            os.replace(metadata_file + '.tmp', metadata_file)
+        except OSError:
+            pass
+    return metadata
+
+
+def load_tsplib_cached(file_name):
+    """
+    This function returns the Adjacency Matrix of an XML file defining a TSP as a read-only float64 array
+    memory-mapped from its .npy cache, writing the cache first if it is missing or out of date. Loading an existing
+    cache only maps the file, and processes that map the same file share its pages.
+
+    Args:
+            file_name (string): The XML file to be loaded.
+    Returns:
+            adj_mat (numpy.memmap): Adjacency Matrix, 0 per diagonal.
+            symmetric (bool): Whether adj_mat is symmetric.
+    Raises:
+            ValueError, xml.etree.ElementTree.ParseError: The XML file could not be parsed (see read_tsplib).
+    """
+    metadata = read_tsplib_cache_metadata(file_name)
+    if metadata is None:
+        try:
+            metadata = write_tsplib_cache(file_name)
+        except OSError:
+            # THE DIRECTORY IS NOT WRITABLE: FALL BACK TO PARSING THE XML FILE EVERY TIME
+            adj_mat = np.ascontiguousarray(read_tsplib(file_name), dtype=np.float64)
+            return adj_mat, bool(np.array_equal(adj_mat, adj_mat.T))
+
+    adj_mat = np.load(cache_paths(file_name)[0], mmap_mode='r')
+    return adj_mat, metadata['symmetric']
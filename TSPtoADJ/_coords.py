@@ -0,0 +1,165 @@
+import math
+import numpy as np
+
+# THE TSPLIB EDGE WEIGHT TYPES THAT ARE COMPUTED FROM NODE COORDINATES
+# (Reinelt, TSPLIB 95, Section 2: http://comopt.ifi.uni-heidelberg.de/software/TSPLIB95/tsp95.pdf)
+COORDINATE_EDGE_WEIGHT_TYPES = ['EUC_2D', 'CEIL_2D', 'GEO', 'ATT']
+
+
+def read_tsplib_coords(file_name):
+    """
+    This function parses a TSPLIB .tsp file that defines its cities by a NODE_COORD_SECTION and returns
+    the distances between them as a CoordinateDistances object, which computes each distance from the coordinates
+    when it is indexed instead of storing all n^2 of them
+
+    Args:
+            file_name (string): The .tsp file to be opened for parsing.
+    Returns:
+            adj_mat (CoordinateDistances): Indexes like a (n x n) Adjacency Matrix, 0 per diagonal.
+    Raises:
+            Exception: The file has no NODE_COORD_SECTION, an unsupported EDGE_WEIGHT_TYPE or a malformed
+            coordinate line.
+    """
+    specification = {}
+    coords = []
+    with open(file_name) as file:
+        lines = iter(file)
+
+        # READ THE "KEY : VALUE" SPECIFICATION PART UP TO THE COORDINATES
+        for line in lines:
+            line = line.strip()
+            if line.startswith('NODE_COORD_SECTION'):
+                break
+            if ':' in line:
+                key, value = line.split(':', 1)
+                specification[key.strip()] = value.strip()
+        else:
+            raise Exception('No NODE_COORD_SECTION in ' + str(file_name))
+
+        # READ ONE "index x y" LINE PER CITY UNTIL THE NEXT SECTION OR EOF
+        for line in lines:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == 'EOF' or fields[0].endswith('_SECTION'):
+                break
+            if len(fields) < 3:
+                raise Exception('Invalid coordinate line in ' + str(file_name) + ': ', line.strip())
+            coords.append((float(fields[1]), float(fields[2])))
+
+    edgeWeightType = specification.get('EDGE_WEIGHT_TYPE')
+    if edgeWeightType not in COORDINATE_EDGE_WEIGHT_TYPES:
+        raise Exception('Unsupported EDGE_WEIGHT_TYPE ( ' + str(edgeWeightType) + ' ) in ' + str(file_name) +
+                        '.\n Valid options are ', COORDINATE_EDGE_WEIGHT_TYPES)
+    if 'DIMENSION' in specification and int(specification['DIMENSION']) != len(coords):
+        raise Exception('DIMENSION of ' + str(file_name) + ' is ' + specification['DIMENSION'] + ' but there are ',
+                        len(coords), ' coordinates')
+
+    return CoordinateDistances(np.array(coords, dtype=np.float64).reshape(-1, 2), edgeWeightType)
+
+
+class CoordinateDistances:
+    def __init__(self, coords, edgeWeightType='EUC_2D'):
+        """
+        CONSTRUCTOR METHOD FOR CoordinateDistances CLASS. A LAZY (n x n) DISTANCE MATRIX THAT ONLY HOLDS THE n CITY
+        COORDINATES, SO MEMORY IS O(n) RATHER THAN O(n^2). IT IS INDEXED LIKE A NUMPY MATRIX:
+        D[i, j] GIVES ONE DISTANCE, D[cities1, cities2] GIVES THE DISTANCES BETWEEN TWO BROADCAST INDEX ARRAYS (E.G. A
+        TOUR MATRIX AND ITS SUCCESSORS, AS USED BY batch_cost) AND D[rows] GIVES WHOLE ROWS.
+        Distances are rounded to integers as TSPLIB specifies for each edge weight type, and returned as float64.
+        :param coords: A (n x 2) array of city coordinates (latitude and longitude, in TSPLIB's DDD.MM form, for GEO)
+        :param edgeWeightType: One of EUC_2D, CEIL_2D, GEO and ATT
+        """
+        if edgeWeightType not in COORDINATE_EDGE_WEIGHT_TYPES:
+            raise Exception('Invalid Edge Weight Type ( ' + str(edgeWeightType) + ' ).\n Valid options are ',
+                            COORDINATE_EDGE_WEIGHT_TYPES)
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64)
+        self.edgeWeightType = edgeWeightType
+        self.numCities = len(self.coords)
+
+        # LOOK LIKE A (n x n) float64 MATRIX TO CODE THAT CHECKS ITS SIZE
+        self.shape = (self.numCities, self.numCities)
+        self.ndim = 2
+        self.dtype = np.dtype(np.float64)
+
+        if edgeWeightType == 'GEO':
+            # CONVERT DDD.MM DEGREES AND MINUTES TO RADIANS ONCE, WITH TSPLIB'S OWN VALUE OF PI
+            degrees = np.trunc(self.coords)
+            radians = 3.141592 * (degrees + 5.0 * (self.coords - degrees) / 3.0) / 180.0
+            self.x, self.y = radians[:, 0].copy(), radians[:, 1].copy()
+        else:
+            self.x, self.y = self.coords[:, 0].copy(), self.coords[:, 1].copy()
+
+        # PYTHON LISTS FOR THE SINGLE DISTANCE LOOKUPS OF SCALAR LOOPS (E.G. THE LOCAL SEARCH)
+        self.xList, self.yList = self.x.tolist(), self.y.tolist()
+
+    def __len__(self):
+        return self.numCities
+
+    def __getitem__(self, key):
+        rows, columns = key if isinstance(key, tuple) else (key, slice(None))
+
+        # ONE EDGE: COMPUTE IT WITH PLAIN PYTHON FLOATS, WHICH IS MUCH FASTER THAN GOING THROUGH NUMPY
+        if isinstance(rows, (int, np.integer)) and isinstance(columns, (int, np.integer)):
+            return self.distance(int(rows), int(columns))
+
+        # WHOLE ROWS (OR COLUMNS): PAIR EVERY ROW INDEX WITH EVERY COLUMN INDEX
+        if isinstance(rows, slice):
+            rows = np.arange(self.numCities)[rows]
+            if isinstance(columns, slice):
+                return self.distances(rows[:, None], np.arange(self.numCities)[columns])
+            return self.distances(rows[:, None], np.asarray(columns))
+        if isinstance(columns, slice):
+            return self.distances(np.asarray(rows)[..., None], np.arange(self.numCities)[columns])
+
+        return self.distances(np.asarray(rows), np.asarray(columns))
+
+    # DEFINE THE METHOD THAT COMPUTES THE DISTANCES BETWEEN TWO BROADCAST ARRAYS OF CITY INDICES
+    def distances(self, cities1, cities2):
+        if self.edgeWeightType == 'GEO':
+            # GREAT CIRCLE DISTANCE ON TSPLIB'S IDEALISED SPHERE, IN KILOMETRES
+            q1 = np.cos(self.y[cities1] - self.y[cities2])
+            q2 = np.cos(self.x[cities1] - self.x[cities2])
+            q3 = np.cos(self.x[cities1] + self.x[cities2])
+            angle = np.arccos(np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0))
+            return np.where(cities1 == cities2, 0.0, np.trunc(6378.388 * angle + 1.0))
+
+        dx = self.x[cities1] - self.x[cities2]
+        dy = self.y[cities1] - self.y[cities2]
+        if self.edgeWeightType == 'EUC_2D':
+            return np.floor(np.sqrt(dx * dx + dy * dy) + 0.5)
+        if self.edgeWeightType == 'CEIL_2D':
+            return np.ceil(np.sqrt(dx * dx + dy * dy))
+
+        # ATT: PSEUDO-EUCLIDEAN DISTANCE, ROUNDED UP WHENEVER ROUNDING TO THE NEAREST INTEGER WOULD ROUND DOWN
+        r = np.sqrt((dx * dx + dy * dy) / 10.0)
+        t = np.floor(r + 0.5)
+        return np.where(t < r, t + 1.0, t)
+
+    # DEFINE THE METHOD THAT COMPUTES THE DISTANCE BETWEEN TWO CITIES (THE SCALAR FORM OF distances)
+    def distance(self, city1, city2):
+        if self.edgeWeightType == 'GEO':
+            if city1 == city2:
+                return 0.0
+            q1 = math.cos(self.yList[city1] - self.yList[city2])
+            q2 = math.cos(self.xList[city1] - self.xList[city2])
+            q3 = math.cos(self.xList[city1] + self.xList[city2])
+            angle = math.acos(min(1.0, max(-1.0, 0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3))))
+            return float(math.trunc(6378.388 * angle + 1.0))
+
+        dx = self.xList[city1] - self.xList[city2]
+        dy = self.yList[city1] - self.yList[city2]
+        if self.edgeWeightType == 'EUC_2D':
+            return float(math.floor(math.sqrt(dx * dx + dy * dy) + 0.5))
+        if self.edgeWeightType == 'CEIL_2D':
+            return float(math.ceil(math.sqrt(dx * dx + dy * dy)))
+
+        r = math.sqrt((dx * dx + dy * dy) / 10.0)
+        t = math.floor(r + 0.5)
+        return float(t + 1 if t < r else t)
+
+    # DEFINE THE METHOD THAT BUILDS THE FULL (n x n) MATRIX (ONLY SENSIBLE FOR SMALL INSTANCES)
+    def toMatrix(self):
+        return self[:, :]
+
+    def __repr__(self):
+        return 'CoordinateDistances(numCities=' + str(self.numCities) + ', edgeWeightType=' + self.edgeWeightType + ')'
@@ -0,0 +1,55 @@
+import numpy as np
+
+from TSPtoADJ._tsp import read_tsplib
+from TSPtoADJ._coords import read_tsplib_coords, CoordinateDistances
+from TSPtoADJ._cache import load_tsplib_cached
+
+
+class TSPInstance:
+    def __init__(self, file_name, cache=False):
+        """
+        A TSP INSTANCE THAT IS PARSED ONCE AND THEN SHARED BY EVERY STAGE OF THE ALGORITHM.
+        :param file_name: The TSPLIB XML file (full distance matrix) or .tsp file (NODE_COORD_SECTION) defining the
+                          problem. A .tsp file gives a CoordinateDistances adj_mat, which computes distances when they
+                          are indexed and so needs O(n) rather than O(n^2) memory
+        :param cache: If True, an XML file's matrix is converted once to a .npy file next to it (rebuilt whenever the
+                      XML file changes) and later instances memory-map that file read-only instead of parsing the XML
+        """
+        self.file_name = file_name
+
+        if str(file_name).lower().endswith('.tsp'):
+            # READ THE COORDINATES ONCE, EVERY COORDINATE EDGE WEIGHT TYPE IS SYMMETRIC
+            self.adj_mat = read_tsplib_coords(file_name)
+            self.num_cities = len(self.adj_mat)
+            self.symmetric = True
+        elif cache:
+            # MAP THE CACHED MATRIX READ-ONLY, THE SYMMETRY TEST WAS RECORDED WHEN THE CACHE WAS WRITTEN
+            self.adj_mat, self.symmetric = load_tsplib_cached(file_name)
+            self.num_cities = len(self.adj_mat)
+        else:
+            # PARSE THE XML FILE ONCE AND HOLD THE RESULT AS A CONTIGUOUS float64 MATRIX
+            self.adj_mat = np.ascontiguousarray(read_tsplib(file_name), dtype=np.float64)
+            self.num_cities = len(self.adj_mat)
+
+            # SYMMETRIC INSTANCES HAVE D[i][j] == D[j][i] FOR EVERY PAIR OF CITIES
+            self.symmetric = bool(np.array_equal(self.adj_mat, self.adj_mat.T))
+
+    # DEFINE THE ALTERNATIVE CONSTRUCTOR THAT WRAPS AN ALREADY BUILT DISTANCE MATRIX (E.G. ONE IN SHARED MEMORY)
+    @classmethod
+    def fromMatrix(cls, adj_mat, file_name=None, symmetric=None):
+        """
+        :param adj_mat: The distance matrix, used as it is (it is not copied)
+        :param file_name: The file the matrix was read from, if any
+        :param symmetric: Whether the matrix is symmetric, computed from adj_mat if None
+        """
+        instance = cls.__new__(cls)
+        instance.file_name = file_name
+        instance.adj_mat = adj_mat
+        instance.num_cities = len(adj_mat)
+        if symmetric is None:
+            symmetric = isinstance(adj_mat, CoordinateDistances) or bool(np.array_equal(adj_mat, adj_mat.T))
+        instance.symmetric = symmetric
+        return instance
+
+    def __len__(self):
+        return self.num_cities
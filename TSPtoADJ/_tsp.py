@@ -4,53 +4,73 @@ def read_tsplib(file_name):
     http://www.iwr.uni-heidelberg.de/groups/comopt/software/TSPLIB95/)
     and returns the Adjacency Matrix that can be used for developing Travelling Salesman Problems
 
+    The file is streamed with ElementTree.iterparse: each <vertex> is written straight into a preallocated
+    float64 matrix and then cleared, so peak memory is about the size of the returned matrix.
+
     Args:
             file_name (string): The XML file to be opened for parsing.
     Returns:
-            adj_mat (double): Adjacency Matrix, 0 per diagonal.
+            adj_mat (numpy.ndarray): (n x n) float64 Adjacency Matrix, 0 per diagonal.
     Raises:
     IOError:
             The input file was not found.
-    TypeError:
-            At least one of the attributes in an edge
-            of the XML file is missing or of the wrong type.
-    xml.etree.ElementTreeParseError:
+    ValueError:
+            The file has no vertices, one of the attributes in an edge
+            of the XML file is missing or of the wrong type, or a vertex
+            has the wrong number of edges.
+    xml.etree.ElementTree.ParseError:
             There was an error parsing the file.
-            See: https://docs.python.org/2.7/library/xml.etree.elementtree.html
+            See: https://docs.python.org/3/library/xml.etree.elementtree.html
 
     """
     import xml.etree.ElementTree as ET
-    try:
-        tree = ET.parse(file_name)
-    except ET.ParseError as e:
-        print('There was a problem parsing', fileName, ':\n', e)
-        return
-    except IOError as e:
-        print('There was a problem opening the file:\n', e)
-        return
+    import numpy as np
 
-    # get root
-    root = tree.getroot()
+    adj_mat = None
+    graph = None
+    idx_from = 0
+    for event, element in ET.iterparse(file_name, events=('start', 'end')):
+        if event == 'start':
+            if element.tag == 'graph':
+                graph = element
+            continue
+        if element.tag != 'vertex':
+            continue
 
-    # graph data (list of list: [[]])
-    adj_mat = []
-    symmetric = False
-    try:  # in case vertex.cost attribute is not set or incorrect type
-        for idx_from, vertice in enumerate(root.iter('vertex')):
-            tmp = []
-            for idx_to, edge in enumerate(vertice):
+        # graph data: one row of costs per vertex
+        row = []
+        for idx_to, edge in enumerate(element):
+            try:  # in case vertex.cost attribute is not set or incorrect type
                 # symmetric problems don't have values for main diagonal
                 if idx_from == idx_to != int(edge.text):  # insert diagonal 0's
-                    tmp.append(0)
-                    symmetric = True
-                tmp.append(float(edge.get('cost')))
-            adj_mat.append(tmp)
-        if symmetric:
-            adj_mat[idx_to + 1].append(0)  # set last diagonal element to 0
-    except TypeError:
-        print('One of the values of the graph attributes is not valid.')
-        print('Hint:', idx_from, '->', idx_to, '=', edge.get('cost'))
-        return
+                    row.append(0.0)
+                row.append(float(edge.get('cost')))
+            except (TypeError, ValueError):
+                raise ValueError('One of the values of the graph attributes is not valid in ' + str(file_name) +
+                                 ': ' + str(idx_from) + ' -> ' + str(idx_to) + ' = ' + str(edge.get('cost')))
+
+        # THE FIRST ROW (WITH ITS DIAGONAL 0 INSERTED) HAS ONE ENTRY PER CITY, WHICH GIVES THE SIZE OF THE MATRIX
+        if adj_mat is None:
+            adj_mat = np.zeros((len(row), len(row)), dtype=np.float64)
+
+        # (the diagonal element of the last vertex of a symmetric problem is never reached, so it is left as 0)
+        if idx_from >= len(adj_mat) or not (len(row) == len(adj_mat) or len(row) == idx_from == len(adj_mat) - 1):
+            raise ValueError('Vertex ' + str(idx_from) + ' of ' + str(file_name) + ' has ' + str(len(row)) +
+                             ' edges, expected ' + str(len(adj_mat)) + ' vertices with ' + str(len(adj_mat)) +
+                             ' edges each')
+        adj_mat[idx_from, :len(row)] = row
+
+        # DROP THE PROCESSED VERTEX SO THAT THE ELEMENT TREE NEVER HOLDS MORE THAN ONE OF THEM
+        element.clear()
+        if graph is not None:
+            graph.clear()
+        idx_from += 1
+
+    if adj_mat is None:
+        raise ValueError('No vertices found in ' + str(file_name))
+    if idx_from != len(adj_mat):
+        raise ValueError(str(file_name) + ' has ' + str(idx_from) + ' vertices but ' + str(len(adj_mat)) +
+                         ' edges per vertex')
 
     return adj_mat
 
@@ -0,0 +1,334 @@
+"""
+BENCHMARK SUITE FOR THE EA: MICRO-BENCHMARKS OF EVERY CrossoverOperator, MutationOperator AND Replacement STRATEGY,
+OF THE COST FUNCTIONS AND OF read_tsplib, PLUS THE END-TO-END GENERATIONS PER SECOND OF EA.applyEA, ALL ON SYNTHETIC
+RANDOM EUCLIDEAN INSTANCES. THE RESULTS ARE WRITTEN AS JSON SO THAT RUNS ON DIFFERENT COMMITS CAN BE COMPARED.
+
+Usage (from the repository root):
+    python benchmarks/benchmark.py                          # every benchmark at n = 14, 58, 500, 5000
+                                                            # (and the crossovers also at n = 1000, 10000)
+    python benchmarks/benchmark.py --quick                  # shorter timings, n = 14, 58, 500 (crossovers also
+                                                            # at n = 1000, 10000)
+    python benchmarks/benchmark.py --groups cost ea --sizes 58 500
+    python benchmarks/benchmark.py --compare benchmarks/results/<older run>.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+# MAKE THE REPOSITORY ROOT IMPORTABLE WHEN THIS FILE IS RUN AS A SCRIPT
+repositoryRoot = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repositoryRoot)
+
+import Algorithm
+from Algorithm import jitKernels
+from costFunction import cost, batch_cost
+from TSPtoADJ import read_tsplib, TSPInstance
+
+GROUPS = ['crossover', 'mutation', 'replacement', 'cost', 'read_tsplib', 'ea']
+CROSSOVER_TYPES = ['orderedCrossover', 'cycleCrossover']
+MUTATION_TYPES = ['singleSwap', 'multiSwap', 'inversion', 'insert', 'scramble']
+REPLACEMENT_TYPES = ['FIFO', 'Random', 'ReplaceWorst', 'Elitism', 'RoundRobin', 'muPlusLambda']
+BATCH_REPLACEMENT_TYPES = ['muPlusLambda', 'muCommaLambda']
+
+
+# DEFINE THE FUNCTION THAT BUILDS A RANDOM EUCLIDEAN INSTANCE (CITIES UNIFORM IN A 1000 x 1000 SQUARE, EUC_2D ROUNDING)
+def randomInstance(numCities, seed=0):
+    x, y = np.random.default_rng(seed).uniform(0.0, 1000.0, size=(2, numCities))
+    adj_mat = np.empty((numCities, numCities), dtype=np.float64)
+    for start in range(0, numCities, 500): # a block of rows at a time, so no (n x n) temporaries are needed
+        rows = slice(start, start + 500)
+        adj_mat[rows] = np.floor(np.hypot(x[rows, None] - x[None, :], y[rows, None] - y[None, :]) + 0.5)
+    return adj_mat
+
+
+# DEFINE THE FUNCTION THAT WRITES A DISTANCE MATRIX AS A TSPLIB XML FILE IN THE FORMAT OF assets/*.xml
+def writeTsplibXml(adj_mat, file_name):
+    with open(file_name, 'w') as file:
+        file.write('<?xml version="1.0" encoding="UTF-8" standalone="no" ?>\n<travellingSalesmanProblemInstance>\n'
+                   '  <name>random' + str(len(adj_mat)) + '</name>\n  <graph>\n')
+        for i, row in enumerate(adj_mat.tolist()):
+            file.write('    <vertex>\n')
+            file.write(''.join('      <edge cost="%.15e">%d</edge>\n' % (distance, j)
+                               for j, distance in enumerate(row) if j != i))
+            file.write('    </vertex>\n')
+        file.write('  </graph>\n</travellingSalesmanProblemInstance>\n')
+
+
+# DEFINE THE FUNCTION THAT TIMES A CALL, IN THE MANNER OF timeit: CALLS ARE BATCHED SO THAT EACH REPEAT LASTS AT LEAST
+# minTime / repeats SECONDS, AND THE PER-CALL TIMES OF THE REPEATS ARE SUMMARISED
+def timeCall(function, minTime=0.5, repeats=5):
+    """
+    :return: timing - A dictionary with the calls per repeat (number), the number of repeats and the best, median and
+             mean time per call in seconds
+    """
+    repeatTime = minTime / repeats
+    number = 1
+    while True:
+        startTime = time.perf_counter()
+        for i in range(number):
+            function()
+        elapsedTime = time.perf_counter() - startTime
+        if elapsedTime >= repeatTime or number >= 1 << 20:
+            break
+        number *= 2 if elapsedTime <= 0 else max(2, min(10, int(1.5 * repeatTime / elapsedTime)))
+
+    perCall = [elapsedTime / number]
+    for repeat in range(repeats - 1):
+        startTime = time.perf_counter()
+        for i in range(number):
+            function()
+        perCall.append((time.perf_counter() - startTime) / number)
+
+    return {'number': number,
+            'repeats': repeats,
+            'best': float(np.min(perCall)),
+            'median': float(np.median(perCall)),
+            'mean': float(np.mean(perCall))}
+
+
+class BenchmarkSuite:
+    def __init__(self, sizes, readSizes, groups, populationSize=50, generations=200, minTime=0.5, repeats=5, seed=0,
+                 crossoverSizes=None):
+        """
+        CONSTRUCTOR METHOD FOR BenchmarkSuite CLASS.
+        :param sizes: The instance sizes (numbers of cities) of every benchmark except read_tsplib
+        :param readSizes: The instance sizes read_tsplib is timed at (the XML file grows as n^2)
+        :param groups: The benchmark groups to run (see GROUPS)
+        :param populationSize: The population (and batch) size used by the replacement, batch and EA benchmarks
+        :param generations: The number of generations of every EA.applyEA run
+        :param minTime: The least total time (s) spent timing each benchmark
+        :param repeats: The number of timed repeats of each benchmark
+        :param seed: The seed of the random instances, tours and operators
+        :param crossoverSizes: The instance sizes the crossovers are timed at (defaults to sizes). They only need
+                               tours, so they can be timed at sizes too large to build a distance matrix for
+        """
+        invalidGroups = [group for group in groups if group not in GROUPS]
+        if invalidGroups:
+            raise Exception('Invalid Benchmark Groups ', invalidGroups, '.\n Valid options are ', GROUPS)
+        self.sizes = sizes
+        self.readSizes = readSizes
+        self.crossoverSizes = sizes if crossoverSizes is None else crossoverSizes
+        self.groups = groups
+        self.populationSize = populationSize
+        self.generations = generations
+        self.minTime = minTime
+        self.repeats = repeats
+        self.seed = seed
+        self.results = []
+
+    # DEFINE THE METHOD THAT TIMES ONE BENCHMARK AND RECORDS ITS RESULT
+    def record(self, group, name, numCities, function, parameters=None, minTime=None, repeats=None):
+        timing = timeCall(function, self.minTime if minTime is None else minTime,
+                          self.repeats if repeats is None else repeats)
+        result = {'group': group, 'name': name, 'numCities': numCities, 'parameters': parameters or {},
+                  'seconds': timing, 'callsPerSecond': 1.0 / timing['median']}
+        self.results.append(result)
+        print('%-12s %-48s n=%-6d %12.3f us/call' % (group, name, numCities, 1e6 * timing['median']), flush=True)
+        return result
+
+    # DEFINE THE METHOD THAT RUNS EVERY SELECTED BENCHMARK GROUP AT EVERY SIZE
+    def runBenchmarks(self):
+        """
+        :return: report - The environment of the run and every benchmark result, ready to be written as JSON
+        """
+        # COMPILE THE OPTIONAL NUMBA KERNELS BEFORE ANYTHING IS TIMED
+        jitKernels.compileKernels()
+
+        crossoverSizes = set(self.crossoverSizes) if 'crossover' in self.groups else set()
+        readSizes = set(self.readSizes) if 'read_tsplib' in self.groups else set()
+        for numCities in sorted(set(self.sizes) | crossoverSizes | readSizes):
+            if numCities in crossoverSizes:
+                self.benchmarkCrossover(numCities)
+
+            # EVERY OTHER GROUP NEEDS THE DISTANCE MATRIX, WHICH IS ONLY BUILT AT THE SIZES THAT USE IT
+            if numCities not in self.sizes and numCities not in readSizes:
+                continue
+            adj_mat = randomInstance(numCities, self.seed)
+            if numCities in self.sizes:
+                if 'mutation' in self.groups:
+                    self.benchmarkMutation(adj_mat)
+                if 'replacement' in self.groups:
+                    self.benchmarkReplacement(adj_mat)
+                if 'cost' in self.groups:
+                    self.benchmarkCost(adj_mat)
+                if 'ea' in self.groups:
+                    self.benchmarkEA(adj_mat)
+            if 'read_tsplib' in self.groups and numCities in self.readSizes:
+                self.benchmarkReadTsplib(adj_mat)
+
+        return {'environment': self.environment(),
+                'settings': {'sizes': self.sizes, 'readSizes': self.readSizes, 'crossoverSizes': self.crossoverSizes,
+                             'groups': self.groups,
+                             'populationSize': self.populationSize, 'generations': self.generations,
+                             'minTime': self.minTime, 'repeats': self.repeats, 'seed': self.seed},
+                'results': self.results}
+
+    # DEFINE THE METHOD THAT RETURNS populationSize RANDOM TOURS OF adj_mat AND THEIR FITNESS
+    def randomTours(self, adj_mat, RNG):
+        tours = self.randomPermutations(len(adj_mat), RNG)
+        return tours, batch_cost(adj_mat, tours)
+
+    def randomPermutations(self, numCities, RNG):
+        return np.stack([RNG.permutation(numCities) for i in range(self.populationSize)]).astype(
+            Algorithm.tourDtype(numCities))
+
+    def benchmarkCrossover(self, numCities):
+        RNG = np.random.default_rng(self.seed)
+        tours = self.randomPermutations(numCities, RNG)
+        half = len(tours) // 2
+        for crossoverType in CROSSOVER_TYPES:
+            self.record('crossover', crossoverType, numCities,
+                        lambda: Algorithm.CrossoverOperator(tours[0], tours[1], crossoverType,
+                                                            RNG=RNG).processCrossover())
+            self.record('crossover', crossoverType + '/batch', numCities,
+                        lambda: Algorithm.CrossoverOperator(tours[:half], tours[half:2 * half], crossoverType,
+                                                            RNG=RNG).processBatchCrossover(),
+                        {'pairs': half})
+
+    def benchmarkMutation(self, adj_mat):
+        RNG = np.random.default_rng(self.seed)
+        tours, fitness = self.randomTours(adj_mat, RNG)
+        for mutationType in MUTATION_TYPES:
+            self.record('mutation', mutationType, len(adj_mat),
+                        lambda: Algorithm.MutationOperator(tours[0], mutationType, RNG=RNG).processMutation())
+            self.record('mutation', mutationType + '/batch', len(adj_mat),
+                        lambda: Algorithm.MutationOperator(tours, mutationType, RNG=RNG).processBatchMutation(),
+                        {'tours': len(tours)})
+
+    def benchmarkReplacement(self, adj_mat):
+        RNG = np.random.default_rng(self.seed)
+        tours, fitness = self.randomTours(adj_mat, RNG)
+        children, childrenFitness = self.randomTours(adj_mat, RNG)
+
+        # EVERY STRATEGY WORKS IN PLACE ON ITS OWN COPY OF THE SAME POPULATION, WITH THE CHILDREN UNEVALUATED AS IN EA
+        for replacementType in REPLACEMENT_TYPES:
+            population = Algorithm.Population(tours.copy(), fitness.copy())
+            replacement = Algorithm.Replacement(adj_mat, replacementType, RNG=RNG, inPlace=True)
+            self.record('replacement', replacementType, len(adj_mat),
+                        lambda: replacement.applyReplacement(population, children[0], children[1]))
+
+        for replacementType in BATCH_REPLACEMENT_TYPES:
+            population = Algorithm.Population(tours.copy(), fitness.copy())
+            replacement = Algorithm.Replacement(adj_mat, replacementType, RNG=RNG, inPlace=True)
+            self.record('replacement', replacementType + '/batch', len(adj_mat),
+                        lambda: replacement.applyBatchReplacement(population, children, childrenFitness),
+                        {'offspring': len(children)})
+
+    def benchmarkCost(self, adj_mat):
+        tours, fitness = self.randomTours(adj_mat, np.random.default_rng(self.seed))
+        self.record('cost', 'cost', len(adj_mat), lambda: cost(adj_mat, tours[0], len(adj_mat)))
+        self.record('cost', 'batch_cost', len(adj_mat), lambda: batch_cost(adj_mat, tours), {'tours': len(tours)})
+        self.record('cost', 'jitKernels.tourCost', len(adj_mat), lambda: jitKernels.tourCost(adj_mat, tours),
+                    {'tours': len(tours), 'backend': jitKernels.BACKEND})
+
+    def benchmarkReadTsplib(self, adj_mat):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, 'random' + str(len(adj_mat)) + '.xml')
+            writeTsplibXml(adj_mat, file_name)
+            result = self.record('read_tsplib', 'read_tsplib', len(adj_mat), lambda: read_tsplib(file_name),
+                                 {'fileBytes': os.path.getsize(file_name)},
+                                 repeats=min(self.repeats, 3))
+            result['parameters']['matchesMatrix'] = bool(np.array_equal(read_tsplib(file_name), adj_mat))
+
+    # DEFINE THE METHOD THAT TIMES WHOLE EA RUNS (INITIAL POPULATION INCLUDED) AND REPORTS GENERATIONS PER SECOND
+    def benchmarkEA(self, adj_mat):
+        instance = TSPInstance.fromMatrix(adj_mat, symmetric=True)
+        configurations = [('steadyState', {'replacementType': 'FIFO', 'mutationType': 'inversion'}),
+                          ('steadyState', {'replacementType': 'ReplaceWorst', 'mutationType': 'singleSwap',
+                                           'crossoverType': 'cycleCrossover'}),
+                          ('muPlusLambda', {'evolutionMode': 'muPlusLambda', 'mutationType': 'inversion'})]
+        for name, arguments in configurations:
+            parameters = dict(arguments, populationSize=self.populationSize, tournamentSize=5,
+                              terminationCriterion=self.generations)
+            result = self.record('ea', 'applyEA/' + name + '/' + '/'.join(str(value) for value in arguments.values()
+                                                                          if value != name),
+                                 len(adj_mat),
+                                 lambda: Algorithm.EA(instance, RNG_Seed=self.seed, **parameters).applyEA(),
+                                 parameters, minTime=0.0, repeats=min(self.repeats, 3))
+            result['generationsPerSecond'] = self.generations / result['seconds']['median']
+
+    # DEFINE THE METHOD THAT DESCRIBES WHERE THE BENCHMARKS WERE RUN
+    def environment(self):
+        try:
+            commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repositoryRoot, capture_output=True,
+                                    text=True, timeout=10).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            commit = None
+        return {'commit': commit,
+                'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'backend': jitKernels.BACKEND,
+                'platform': platform.platform(),
+                'processor': platform.processor() or platform.machine(),
+                'cpuCount': os.cpu_count()}
+
+
+# DEFINE THE FUNCTION THAT PRINTS THE CHANGE IN MEDIAN TIME OF EVERY BENCHMARK PRESENT IN TWO REPORTS
+def compareReports(baseline, current):
+    baselineResults = {(result['group'], result['name'], result['numCities']): result for result in baseline['results']}
+    print('\nCompared with commit', baseline['environment'].get('commit'), '(ratio > 1 means faster now)')
+    for result in current['results']:
+        key = (result['group'], result['name'], result['numCities'])
+        if key in baselineResults:
+            ratio = baselineResults[key]['seconds']['median'] / result['seconds']['median']
+            print('%-12s %-48s n=%-6d %8.2fx' % (key + (ratio,)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the EA operators and end-to-end throughput')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[14, 58, 500, 5000])
+    parser.add_argument('--read-sizes', type=int, nargs='+', default=None,
+                        help='sizes to time read_tsplib at (default: the sizes up to 500, a 5000 city XML file '
+                             'is over 1 GB)')
+    parser.add_argument('--crossover-sizes', type=int, nargs='+', default=None,
+                        help='sizes to time the crossovers at (default: the sizes and 1000, 10000, as the crossovers '
+                             'only need tours)')
+    parser.add_argument('--groups', nargs='+', default=GROUPS, choices=GROUPS)
+    parser.add_argument('--population-size', type=int, default=50)
+    parser.add_argument('--generations', type=int, default=200)
+    parser.add_argument('--min-time', type=float, default=0.5)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quick', action='store_true',
+                        help='n = 14, 58, 500 (crossovers also at 1000, 10000) with shorter timings')
+    parser.add_argument('--output', default=None,
+                        help='the JSON file to write (default: benchmarks/results/<timestamp>-<commit>.json)')
+    parser.add_argument('--compare', default=None, help='an earlier JSON report to compare with')
+    arguments = parser.parse_args()
+
+    if arguments.quick:
+        arguments.sizes = [size for size in arguments.sizes if size <= 500]
+        arguments.minTime, arguments.repeats, arguments.generations = 0.1, 3, min(arguments.generations, 50)
+    else:
+        arguments.minTime = arguments.min_time
+    readSizes = arguments.read_sizes if arguments.read_sizes is not None else \
+        [size for size in arguments.sizes if size <= 500]
+    crossoverSizes = arguments.crossover_sizes if arguments.crossover_sizes is not None else \
+        sorted(set(arguments.sizes) | {1000, 10000})
+
+    suite = BenchmarkSuite(arguments.sizes, readSizes, arguments.groups, arguments.population_size,
+                           arguments.generations, arguments.minTime, arguments.repeats, arguments.seed,
+                           crossoverSizes)
+    report = suite.runBenchmarks()
+
+    outputFile = arguments.output
+    if outputFile is None:
+        outputFile = os.path.join(repositoryRoot, 'benchmarks', 'results',
+                                  time.strftime('%Y%m%d-%H%M%S') + '-' + (report['environment']['commit'] or 'nogit')[:10]
+                                  + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(outputFile)), exist_ok=True)
+    with open(outputFile, 'w') as file:
+        json.dump(report, file, indent=2)
+    print('\nWrote', outputFile)
+
+    if arguments.compare is not None:
+        with open(arguments.compare) as file:
+            compareReports(json.load(file), report)
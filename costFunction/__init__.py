@@ -2,15 +2,77 @@ import numpy as np
 
 
 def cost(adj_mat, tour_vec, num_cities):
-    # Make into arrays the Adjacency Matrix and tour Vector
-    D = np.array(adj_mat)
-    C = np.array(tour_vec)
-
-    # Initialise the running cost to be 0
-    running_cost = 0
-
-    # Compute the sum using the formula given
-    # (NOTE: Because Python is zero indexed this is reflected in the for loop)
-    for i in range(0, num_cities-2):
-        running_cost += D[C[i]][C[i+1]] + D[C[num_cities-1]][C[0]]
-    return running_cost
+    # The tour is closed, so the edge from the last city back to the first is counted exactly once
+    # (NOTE: this is a thin wrapper over batch_cost, kept so that single tours can still be scored by name)
+    return batch_cost(adj_mat, np.asarray(tour_vec)[:num_cities])
+
+
+def batch_cost(adj_mat, tours):
+    """
+    Evaluate the closed tour length of every tour in a batch with a single fancy indexing call.
+    :param adj_mat: The Adjacency Matrix representing the TSP (or a lazy distance object indexed the same way, such
+                    as TSPtoADJ.CoordinateDistances)
+    :param tours: Either a 2D array with one tour per row, or a single 1D tour
+    :return: A vector holding the length of each tour (or a scalar for a single tour)
+    """
+    # View the Adjacency Matrix and tours as arrays (no copy is made if they already are, and lazy distance objects
+    # are indexed directly so that only the edges of the tours are computed)
+    D = np.asarray(adj_mat) if isinstance(adj_mat, (list, tuple)) else adj_mat
+    T = np.asarray(tours)
+
+    # PAIR EVERY CITY WITH ITS SUCCESSOR, THE LAST CITY'S SUCCESSOR BEING THE FIRST CITY (CLOSING EDGE)
+    successors = np.roll(T, -1, axis=-1)
+
+    # GATHER ALL EDGE COSTS AT ONCE AND SUM THEM ALONG EACH TOUR
+    return D[T, successors].sum(axis=-1)
+
+
+# DELTA EVALUATION: THE CHANGE IN CLOSED TOUR LENGTH CAUSED BY A SINGLE MOVE, COMPUTED FROM THE 2-4 EDGES IT CHANGES
+# (tour IS THE TOUR BEFORE THE MOVE AND EVERY POSITION IS TAKEN MODULO THE TOUR LENGTH, SO MOVES MAY WRAP AROUND)
+
+def swap_cost_delta(adj_mat, tour, i, j):
+    """
+    Change in tour length when the cities at positions i and j are swapped
+    (only the edges leaving positions i-1, i, j-1 and j change)
+    """
+    n = len(tour)
+    i, j = int(i), int(j)
+    if i == j:
+        return 0.0
+    changedEdges = {(i - 1) % n, i, (j - 1) % n, j % n}
+
+    def city_after_swap(p):
+        p %= n
+        return tour[j] if p == i else tour[i] if p == j else tour[p]
+
+    delta = 0.0
+    for p in changedEdges:
+        delta += adj_mat[city_after_swap(p), city_after_swap(p + 1)] - adj_mat[tour[p], tour[(p + 1) % n]]
+    return float(delta)
+
+
+def inversion_cost_delta(adj_mat, tour, lo, hi):
+    """
+    Change in tour length when the segment tour[lo..hi] (inclusive) is reversed, i.e. a 2-opt move
+    (only the edges entering and leaving the segment change; this assumes a symmetric adj_mat)
+    """
+    n = len(tour)
+    lo, hi = int(lo), int(hi)
+    if hi - lo + 1 >= n - 1:
+        return 0.0 # reversing the whole tour (or all but one city) gives the same closed tour in reverse
+    before, first, last, after = tour[(lo - 1) % n], tour[lo], tour[hi], tour[(hi + 1) % n]
+    return float(adj_mat[before, last] + adj_mat[first, after] - adj_mat[before, first] - adj_mat[last, after])
+
+
+def insert_cost_delta(adj_mat, tour, lo, hi):
+    """
+    Change in tour length when the city at position hi is moved to position lo (lo < hi) and the cities in
+    between are shifted one place to the right, as in the insert mutation
+    """
+    n = len(tour)
+    lo, hi = int(lo), int(hi)
+    if hi - lo + 1 >= n:
+        return 0.0 # moving the last city to the front only rotates the closed tour
+    before, first, moved, beforeMoved, after = tour[(lo - 1) % n], tour[lo], tour[hi], tour[hi - 1], tour[(hi + 1) % n]
+    return float(adj_mat[before, moved] + adj_mat[moved, first] + adj_mat[beforeMoved, after]
+                 - adj_mat[before, first] - adj_mat[beforeMoved, moved] - adj_mat[moved, after])
@@ -17,8 +17,8 @@ if __name__ == '__main__':
     #
     # David.tournamentSelection(test)
     #
-    # testParent1 = test[1][0]
-    # testParent2 = test[1][4]
+    # testParent1 = test.tours[0]
+    # testParent2 = test.tours[4]
     #
     # # print('Parent1: ', testParent1, " , Parent2: ", testParent2)
     #
@@ -34,8 +34,9 @@ if __name__ == '__main__':
     # # print('Child2 before mutation: ', child2)
     # # print('Child2 after mutation: ', mutatedChild)
     #
-    # Favour = Algorithm.Replacement(test, David.adjacency_matrix(), child1, mutatedChild,'FIFO',RNG_Seed=54,replacement_FIFOindex=4)
-    # FIFOindex,newPopulation = Favour.applyReplacement()
+    # Favour = Algorithm.Replacement(David.adjacency_matrix(),'FIFO',RNG_Seed=54,replacement_FIFOindex=4)
+    # newPopulation = Favour.applyReplacement(test, child1, mutatedChild)
+    # FIFOindex = Favour.FIFOindex
     #
     # print('new Population ', newPopulation)
     # print('FIFO index ', FIFOindex)
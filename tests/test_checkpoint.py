@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+from Algorithm import *
+
+BURMA14 = os.path.join(os.path.dirname(__file__), '..', 'assets', 'burma14.xml')
+
+
+@pytest.fixture
+def checkpointFile(tmp_path):
+    checkpointFile = str(tmp_path / 'run.npz')
+    EA(BURMA14, 30, 5, RNG_Seed=1, terminationCriterion=40, checkpointFile=checkpointFile,
+       checkpointInterval=10).applyEA()
+    return checkpointFile
+
+
+def test_resumeMatchesUninterruptedRun(checkpointFile):
+    resumed = EA(BURMA14, 30, 5, RNG_Seed=1, terminationCriterion=80)
+    resumed.resume(checkpointFile)
+    uninterrupted = EA(BURMA14, 30, 5, RNG_Seed=1, terminationCriterion=80)
+    uninterrupted.applyEA()
+    assert (resumed.population.tours == uninterrupted.population.tours).all()
+
+
+@pytest.mark.parametrize('eaArguments', [{'crossoverType': 'cycleCrossover'},
+                                         {'mutationType': 'insert'},
+                                         {'replacementType': 'ReplaceWorst'},
+                                         {'evolutionMode': 'muPlusLambda'}])
+def test_resumeWithDifferentSettingsRaises(checkpointFile, eaArguments):
+    with pytest.raises(Exception, match='was written with the settings'):
+        EA(BURMA14, 30, 5, RNG_Seed=1, terminationCriterion=80, **eaArguments).resume(checkpointFile)
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from Algorithm import *
+
+BURMA14 = os.path.join(os.path.dirname(__file__), '..', 'assets', 'burma14.xml')
+
+
+# RUN THE STEADY STATE EA AND RETURN THE NUMBER OF TOURS THAT WERE FULLY EVALUATED
+def fullEvaluations(deltaEvaluation, **eaArguments):
+    algorithm = EA(BURMA14, 30, 5, RNG_Seed=1, terminationCriterion=200, instrumentation=True, **eaArguments)
+    algorithm.deltaEvaluation = deltaEvaluation and algorithm.deltaEvaluation
+    algorithm.applyEA()
+    return algorithm.instrumentation.report()['counters']['evaluations']
+
+
+@pytest.mark.parametrize('mutationType', ['singleSwap', 'multiSwap', 'insert', 'inversion'])
+@pytest.mark.parametrize('eaArguments', [{'replacementType': 'FIFO'},
+                                         {'replacementType': 'ReplaceWorst'},
+                                         {'replacementType': 'Elitism'},
+                                         {'replacementType': 'FIFO', 'duplicatePolicy': 'penalise'},
+                                         {'replacementType': 'FIFO', 'localSearch': 'offspring',
+                                          'localSearchBudget': 5}])
+def test_deltaEvaluationNeverAddsFullEvaluations(mutationType, eaArguments):
+    assert fullEvaluations(True, mutationType=mutationType, **eaArguments) <= \
+           fullEvaluations(False, mutationType=mutationType, **eaArguments)
+
+
+def test_deltaFitnessMatchesTourCost():
+    algorithm = EA(BURMA14, 30, 5, RNG_Seed=3, terminationCriterion=300, mutationType='insert',
+                   replacementType='ReplaceWorst')
+    assert algorithm.deltaEvaluation
+    algorithm.applyEA()
+    assert algorithm.population.fitness == pytest.approx(batch_cost(algorithm.adjacency_matrix(),
+                                                                     algorithm.population.tours))
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('numba')
+
+from Algorithm import jitKernels
+
+NUM_CITIES = 50
+
+
+@pytest.fixture
+def numpyFallback(monkeypatch):
+    # THE PUBLIC FUNCTIONS USE THE NUMPY IMPLEMENTATION WHEN NUMBA IS NOT AVAILABLE
+    def fallback(function, *arguments):
+        with monkeypatch.context() as patch:
+            patch.setattr(jitKernels, 'NUMBA_AVAILABLE', False)
+            return function(*arguments)
+    return fallback
+
+
+@pytest.fixture
+def RNG():
+    return np.random.default_rng(7)
+
+
+@pytest.fixture
+def D(RNG):
+    coordinates = RNG.random((NUM_CITIES, 2))
+    return np.ascontiguousarray(np.linalg.norm(coordinates[:, None] - coordinates[None, :], axis=2))
+
+
+def randomTours(RNG, dtype, count=8):
+    return np.array([RNG.permutation(NUM_CITIES) for _ in range(count)], dtype=dtype)
+
+
+def test_compileKernels():
+    jitKernels.compileKernels()
+    assert jitKernels.BACKEND == 'numba' and jitKernels.kernelsCompiled
+
+
+@pytest.mark.parametrize('dtype', [np.int16, np.int32])
+def test_tourCostKernelMatchesNumpy(numpyFallback, RNG, D, dtype):
+    tours = randomTours(RNG, dtype)
+    assert jitKernels.tourCostKernel(D, tours) == pytest.approx(numpyFallback(jitKernels.tourCost, D, tours))
+
+
+@pytest.mark.parametrize('dtype', [np.int16, np.int32])
+def test_crossoverKernelsMatchNumpy(numpyFallback, RNG, dtype):
+    for parent1, parent2 in zip(randomTours(RNG, dtype), randomTours(RNG, dtype)):
+        crossoverPoint = int(RNG.integers(1, NUM_CITIES))
+        for kernel, function, arguments in [
+                (jitKernels.orderedCrossoverKernel, jitKernels.orderedCrossover, (parent1, parent2, crossoverPoint)),
+                (jitKernels.cycleCrossoverKernel, jitKernels.cycleCrossover, (parent1, parent2))]:
+            for compiledChild, numpyChild in zip(kernel(*arguments), numpyFallback(function, *arguments)):
+                np.testing.assert_array_equal(compiledChild, numpyChild)
+
+
+@pytest.mark.parametrize('dtype', [np.int16, np.int32])
+def test_mutationKernelsMatchNumpy(numpyFallback, RNG, D, dtype):
+    for tour in randomTours(RNG, dtype):
+        lo, hi = (int(position) for position in np.sort(RNG.choice(NUM_CITIES, 2, replace=False)))
+        swaps = RNG.choice(NUM_CITIES, (5, 2), replace=False).astype(np.intp)
+        order = RNG.permutation(hi - lo + 1).astype(np.intp)
+        for kernel, function, arguments in [
+                (jitKernels.swapKernel, jitKernels.swapMutation, (tour, swaps)),
+                (jitKernels.inversionKernel, jitKernels.inversionMutation, (tour, lo, hi)),
+                (jitKernels.insertKernel, jitKernels.insertMutation, (tour, lo, hi)),
+                (jitKernels.scrambleKernel, jitKernels.scrambleMutation, (tour, lo, hi, order))]:
+            np.testing.assert_array_equal(kernel(*arguments), numpyFallback(function, *arguments))
+
+        assert jitKernels.twoOptDeltaKernel(D, tour, lo, hi) == \
+               pytest.approx(numpyFallback(jitKernels.twoOptDelta, D, tour, lo, hi))